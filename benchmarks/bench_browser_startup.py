@@ -0,0 +1,54 @@
+"""
+Cold versus warm browser startup: a ChromeDriverManager lookup against the cached
+driver path, and (with --login, using docs/config.ini) a form login against a
+restored session. Needs Chrome installed.
+"""
+from pathlib import Path
+import configparser
+import argparse
+import tempfile
+import time
+import sys
+import os
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from browser import create_driver
+
+
+def driver_startup(runs=3):
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_file = Path(tmp) / "chromedriver_path.txt"
+        for run in range(runs):
+            label = "cold" if run == 0 else "warm"
+            driver, timings = create_driver(headless=True, cache_file=cache_file)
+            driver.quit()
+            print(f"{label}: driver {timings['source']} in {timings['resolve']:.2f}s, "
+                  f"launch {timings['launch']:.2f}s")
+
+
+def login_startup():
+    # DigitalLibraryUploader reads ../docs relative to src/
+    os.chdir(Path(__file__).resolve().parent.parent / "src")
+    from file_uploader import DigitalLibraryUploader
+
+    config = configparser.ConfigParser()
+    config.read('../docs/config.ini')
+    account, password = config['Credentials']['account'], config['Credentials']['password']
+    for label in ("form login", "restored session"):
+        start = time.perf_counter()
+        uploader = DigitalLibraryUploader(headless=True)
+        if label == "form login" and uploader.session_file.exists():
+            uploader.session_file.unlink()
+        uploader.login(account, password)
+        print(f"{label}: ready in {time.perf_counter() - start:.2f}s")
+        uploader.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--login", action="store_true", help="also time login against the configured site")
+    args = parser.parse_args()
+    driver_startup()
+    if args.login:
+        login_startup()
@@ -0,0 +1,60 @@
+"""Upload transcripts with the HTTP backend against the local stand-in server"""
+from pathlib import Path
+import tempfile
+import time
+import csv
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from drupal_standin import DrupalStandIn, StandInState
+from http_uploader import HttpDigitalLibraryUploader
+from identifier_registry import IdentifierRegistry
+from stage_timing import read_timings, timing_report
+
+
+def main(count=50, latency=0.0, lock_failures=2):
+    state = StandInState(latency=latency, lock_failures=lock_failures)
+    with tempfile.TemporaryDirectory() as tmp, DrupalStandIn(state) as server:
+        tmp = Path(tmp)
+        mapping_file = tmp / "uuid_mapping.csv"
+        with open(mapping_file, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['OriginalIdentifier', 'BaseIdentifier', 'UUID'])
+            for i in range(count):
+                base_id = f"mvp_1.1_{i:03d}"
+                writer.writerow([base_id, base_id, state.add_item(base_id)])
+
+        config_file = tmp / "config.ini"
+        config_file.write_text(
+            "[Credentials]\naccount = account\npassword = password\n"
+            f"base_url = {server.url}\ncollection_href = {state.collection_href}\n"
+            f"[Progress]\ntimings = {tmp / 'upload_timings.jsonl'}\n"
+        )
+
+        uploader = HttpDigitalLibraryUploader(
+            identifiers=IdentifierRegistry(mapping_file), config_path=config_file
+        )
+        uploader.login(state.account, state.password)
+
+        start = time.perf_counter()
+        for i in range(count):
+            base_id = f"mvp_1.1_{i:03d}"
+            pdf_path = tmp / f"{base_id}_transcript.pdf"
+            txt_path = tmp / f"{base_id}_transcript.txt"
+            pdf_path.write_bytes(b"%PDF-1.4\n" + b"0" * 2048)
+            txt_path.write_text("transcript " * 200)
+            uploader.upload_transcript(base_id, pdf_path, txt_path)
+        elapsed = time.perf_counter() - start
+        uploader.close()
+
+        items = list(state.items.values())
+        assert all(len(item['transcripts']) == 2 for item in items), "metadata not saved"
+        assert len(state.media) == 2 * count, "media not created"
+        print(f"Uploaded {count} items in {elapsed:.2f}s "
+              f"({elapsed / count * 1000:.1f} ms/item, {state.request_count / count:.1f} requests/item)")
+        print("\n".join(timing_report(read_timings(tmp / "upload_timings.jsonl"))))
+
+
+if __name__ == "__main__":
+    main()
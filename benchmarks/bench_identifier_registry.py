@@ -0,0 +1,53 @@
+"""Per-lookup cost of IdentifierRegistry versus re-reading uuid_mapping.csv per record"""
+from pathlib import Path
+import tempfile
+import timeit
+import random
+import uuid
+import csv
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from identifier_registry import IdentifierRegistry
+import pandas as pd
+
+
+def write_mapping(path, count):
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['OriginalIdentifier', 'BaseIdentifier', 'UUID'])
+        for i in range(count):
+            base_id = f"mvp_{i // 1000}.{i % 10}_{i:06d}"
+            writer.writerow([f"{base_id}_001", base_id, str(uuid.uuid4())])
+
+
+def main(count=100_000, lookups=100_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        mapping_file = Path(tmp) / "uuid_mapping.csv"
+        write_mapping(mapping_file, count)
+        keys = [f"mvp_{i // 1000}.{i % 10}_{i:06d}" for i in random.sample(range(count), 1000)]
+
+        registry = IdentifierRegistry(mapping_file)
+        load_time = timeit.timeit(registry._refresh, number=1)
+        print(f"Mappings: {count}")
+        print(f"Registry initial load: {load_time * 1000:.1f} ms")
+
+        def registry_lookups():
+            for i in range(lookups):
+                registry.uuid_for(keys[i % len(keys)])
+
+        elapsed = timeit.timeit(registry_lookups, number=1)
+        print(f"Registry lookup (with mtime/size check): {elapsed / lookups * 1e6:.2f} µs")
+
+        def legacy_lookup():
+            df = pd.read_csv(mapping_file)
+            dict(zip(df['BaseIdentifier'], df['UUID']))[keys[0]]
+
+        runs = 5
+        elapsed = timeit.timeit(legacy_lookup, number=runs)
+        print(f"Legacy pandas re-read per lookup: {elapsed / runs * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
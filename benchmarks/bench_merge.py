@@ -0,0 +1,69 @@
+"""Serial versus process-pool process_transcripts on a generated corpus, with an output equivalence check"""
+from contextlib import redirect_stdout
+from pathlib import Path
+import tempfile
+import hashlib
+import random
+import time
+import sys
+import io
+import os
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from merge_txt_to_pdf import process_transcripts
+
+WORDS = "the college letter trustees vassar poughkeepsie founder building observatory library".split()
+
+
+def make_corpus(root, groups=200, pages=5, big_groups=2, big_pages=60, seed=7):
+    """Many small multi-page groups, a few large ones, and some single-page files"""
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+
+    def text(lines):
+        return '\n'.join(' '.join(rng.choice(WORDS) for _ in range(rng.randint(5, 30))) for _ in range(lines))
+
+    for g in range(groups):
+        count = big_pages if g < big_groups else pages
+        for p in range(1, count + 1):
+            (root / f"mvp_1.{g % 9}_{g:03d}_{p:03d}.txt").write_text(text(40), encoding='utf-8')
+    for s in range(groups // 10):
+        (root / f"mvp_single_{s:03d}.txt").write_text(text(40), encoding='utf-8')
+
+
+def digest(output_root):
+    hashes = {}
+    for path in sorted(Path(output_root).rglob('*')):
+        if path.is_file():
+            hashes[str(path.relative_to(output_root))] = hashlib.sha256(path.read_bytes()).hexdigest()
+    return hashes
+
+
+def timed_run(input_dir, output_root, workers):
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        results = process_transcripts(input_dir, output_root, workers=workers)
+    return time.perf_counter() - start, results
+
+
+def main(workers=None):
+    workers = workers or max(2, os.cpu_count() or 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        make_corpus(tmp / "input")
+
+        serial_time, serial_results = timed_run(tmp / "input", tmp / "serial", 1)
+        parallel_time, parallel_results = timed_run(tmp / "input", tmp / "parallel", workers)
+
+        assert [r['group'] for r in serial_results] == [r['group'] for r in parallel_results]
+        assert digest(tmp / "serial") == digest(tmp / "parallel"), "parallel output differs from serial"
+
+        print(f"Groups: {len(serial_results)}")
+        print(f"Serial: {serial_time:.2f}s")
+        print(f"Parallel ({workers} workers): {parallel_time:.2f}s ({serial_time / parallel_time:.1f}x)")
+        print("Serial and parallel outputs are byte-identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Wall time of the sharded listing crawl against the stand-in server as workers increase"""
+from pathlib import Path
+import time
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from drupal_standin import DrupalStandIn, StandInState
+from uuid_harvester import harvest_sharded
+
+
+def main(items=400, page_size=20, latency=0.05, requests_per_second=50.0):
+    state = StandInState(page_size=page_size, latency=latency)
+    for i in range(items):
+        state.add_item(f"mvp_1.{i % 9}_{i:04d}")
+
+    with DrupalStandIn(state) as server:
+        collection_url = f"{server.url}{state.collection_path}?f%5B0%5D=collection%3A6077"
+        baseline = None
+        for workers in (1, 2, 4, 8):
+            start = time.perf_counter()
+            rows, pages, _ = harvest_sharded(collection_url, workers=workers,
+                                             requests_per_second=requests_per_second)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            assert len(rows) == items, f"expected {items} unique rows, got {len(rows)}"
+            print(f"{workers} workers: {pages} pages, {len(rows)} items in {elapsed:.2f}s "
+                  f"(speedup {baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Row-by-row iterrows reconciliation versus the columnar join in spreadsheet_editor,
+at 10k, 100k and 1M sheet rows, with a check that both give the same status values,
+also for a sheet whose identifier column is entirely blank.
+
+The iterrows baseline is skipped above --loop-limit rows (default 100k) because it
+takes minutes there; its time is extrapolated linearly from the largest measured size.
+"""
+from pathlib import Path
+import argparse
+import random
+import time
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from spreadsheet_editor import reconcile_status
+import pandas as pd
+import numpy as np
+
+STATUSES = ['Yes', 'No', 'no', ' Yes ', '', None, np.nan, 'Pending']
+
+
+def make_data(rows, seed=11):
+    """A sheet with 1-3 identifiers per row in assorted spellings, and a progress table covering most of them"""
+    rng = random.Random(seed)
+    identifiers, pdf, uploaded = [], [], []
+    for i in range(rows):
+        parts = [f"mvp_{i % 50}.{i % 7}_{i:07d}"]
+        for _ in range(rng.randint(0, 2)):
+            parts.append(f"mvp_{rng.randint(0, 49)}.{rng.randint(0, 6)}_{rng.randrange(rows):07d}")
+        if rng.random() < 0.05:
+            parts.append("other_id")
+        identifiers.append(rng.choice([', ', ',', ': ', ', :']).join(parts) if rng.random() > 0.02 else np.nan)
+        pdf.append(rng.choice(STATUSES))
+        uploaded.append(rng.choice(STATUSES))
+    sheet = pd.DataFrame({'field_identifier': identifiers, 'PDF/TXT Created?': pdf, 'Transcript Uploaded?': uploaded})
+
+    progress = pd.DataFrame({
+        'BaseIdentifier': [f"mvp_{i % 50}.{i % 7}_{i:07d}" for i in range(0, rows, 2)],
+        'PDF': [rng.choice(['Yes', 'No']) for _ in range(0, rows, 2)],
+        'Metadata': [rng.choice(['Yes', 'No', '']) for _ in range(0, rows, 2)],
+    })
+    return sheet, progress
+
+
+def reconcile_iterrows(df, progress):
+    """The previous per-row loop, kept here as the reference implementation"""
+    csv_data = {row.BaseIdentifier: (row.PDF, row.Metadata) for row in progress.itertuples()}
+    for index, row in df.iterrows():
+        identifiers = str(row['field_identifier']).split(',')
+
+        pdf_created = str(df.at[index, 'PDF/TXT Created?']).strip()
+        transcript_uploaded = str(df.at[index, 'Transcript Uploaded?']).strip()
+
+        pdf_created = pdf_created if pdf_created in ['Yes', 'No'] else 'No'
+        transcript_uploaded = transcript_uploaded if transcript_uploaded in ['Yes', 'No'] else 'No'
+
+        for part in identifiers:
+            cleaned_part = part.strip().lstrip(':').strip()
+            if cleaned_part.startswith('mvp_') and cleaned_part in csv_data:
+                pdf_val, metadata_val = csv_data[cleaned_part]
+                if pdf_val == 'Yes' and pdf_created != 'Yes':
+                    pdf_created = 'Yes'
+                if metadata_val == 'Yes' and transcript_uploaded != 'Yes':
+                    transcript_uploaded = 'Yes'
+
+        df.at[index, 'PDF/TXT Created?'] = pdf_created
+        df.at[index, 'Transcript Uploaded?'] = transcript_uploaded
+    return df
+
+
+def check_blank_identifiers(progress):
+    """A sheet whose identifier column is entirely blank reconciles like the row loop, to all 'No'"""
+    sheet = pd.DataFrame({'field_identifier': [np.nan, None, np.nan],
+                          'PDF/TXT Created?': ['Yes', np.nan, 'No'], 'Transcript Uploaded?': [np.nan] * 3})
+    columnar = reconcile_status(sheet.copy(), progress)
+    looped = reconcile_iterrows(sheet.copy().astype(object), progress)
+    for column in ['PDF/TXT Created?', 'Transcript Uploaded?']:
+        assert columnar[column].tolist() == looped[column].tolist(), f"{column} differs for blank identifiers"
+
+
+def main(sizes, loop_limit):
+    loop_rate = None
+    for rows in sizes:
+        sheet, progress = make_data(rows)
+
+        start = time.perf_counter()
+        columnar = reconcile_status(sheet.copy(), progress)
+        columnar_time = time.perf_counter() - start
+
+        if rows <= loop_limit:
+            start = time.perf_counter()
+            looped = reconcile_iterrows(sheet.copy().astype(object), progress)
+            loop_time = time.perf_counter() - start
+            loop_rate = loop_time / rows
+            for column in ['PDF/TXT Created?', 'Transcript Uploaded?']:
+                assert columnar[column].tolist() == looped[column].tolist(), f"{column} differs at {rows} rows"
+            baseline = f"iterrows {loop_time:7.2f}s"
+        elif loop_rate:
+            loop_time = loop_rate * rows
+            baseline = f"iterrows ~{loop_time:6.0f}s (extrapolated)"
+        else:
+            loop_time, baseline = None, "iterrows skipped"
+
+        speedup = f", {loop_time / columnar_time:.0f}x" if loop_time else ""
+        print(f"{rows:>9,} rows: columnar {columnar_time:6.2f}s, {baseline}{speedup}")
+
+    check_blank_identifiers(progress)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="*", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--loop-limit", type=int, default=100_000)
+    args = parser.parse_args()
+    main(args.rows, args.loop_limit)
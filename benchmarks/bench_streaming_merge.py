@@ -0,0 +1,77 @@
+"""
+Peak memory and time of merging one synthetic transcript group of increasing size.
+
+Each size runs in a fresh interpreter and reports its own peak RSS, which must stay
+under --max-rss-mb whatever the group size. The full verification run is
+`python bench_streaming_merge.py --size-mb 500`.
+"""
+from pathlib import Path
+import subprocess
+import argparse
+import resource
+import tempfile
+import random
+import time
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+WORDS = "the college letter trustees vassar poughkeepsie founder building observatory library".split()
+PAGE_MB = 4
+
+
+def make_group(root, size_mb, seed=3):
+    """One group of PAGE_MB page files adding up to size_mb"""
+    rng = random.Random(seed)
+    line = ' '.join(rng.choice(WORDS) for _ in range(14)) + '\n'
+    page = line * (PAGE_MB * 1024 * 1024 // len(line))
+    root.mkdir(parents=True, exist_ok=True)
+    for p in range(1, max(1, size_mb // PAGE_MB) + 1):
+        (root / f"mvp_9.9_999_{p:03d}.txt").write_text(page, encoding='utf-8')
+
+
+def child(input_dir, output_dir):
+    from merge_txt_to_pdf import _collect_groups, _merge_group
+
+    output_dir = Path(output_dir)
+    (output_dir / "pdf").mkdir(parents=True, exist_ok=True)
+    (output_dir / "txt").mkdir(parents=True, exist_ok=True)
+    groups = _collect_groups(Path(input_dir), verbose=False)
+    start = time.perf_counter()
+    for group_id, files in groups.items():
+        result = _merge_group(group_id, files, output_dir / "txt", output_dir / "pdf", verbose=False)
+        assert not result['error'], result['error']
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.2f} {peak_mb:.1f}")
+
+
+def main(sizes, max_rss_mb):
+    peaks = {}
+    for size_mb in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            make_group(tmp / "input", size_mb)
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", str(tmp / "input"), str(tmp / "output")],
+                check=True, capture_output=True, text=True
+            ).stdout.split()
+            elapsed, peak_mb = float(output[-2]), float(output[-1])
+            print(f"{size_mb:>5} MB transcript: {elapsed:7.1f}s, peak RSS {peak_mb:7.1f} MB")
+            peaks[size_mb] = peak_mb
+
+    over = {size_mb: peak_mb for size_mb, peak_mb in peaks.items() if peak_mb > max_rss_mb}
+    assert not over, f"peak RSS above the {max_rss_mb} MB ceiling: {over}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, nargs="*", default=[8, 32, 128])
+    parser.add_argument("--max-rss-mb", type=float, default=64,
+                        help="peak RSS every size must stay under; merging must not grow with the group")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(*args.child)
+    else:
+        main(args.size_mb, args.max_rss_mb)
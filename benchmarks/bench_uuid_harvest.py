@@ -0,0 +1,111 @@
+"""
+Listing-page harvesting versus the per-item crawl, on saved HTML fixtures.
+
+The fixtures are served by a local server with a fixed per-request latency. The
+per-item baseline fetches every detail page one after another, the way
+UUIDMapper._process_page does with browser tabs; it leaves out the tab and
+render cost, so the real Selenium crawl is slower than this baseline.
+"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+from pathlib import Path
+import threading
+import time
+import sys
+import re
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from uuid_harvester import UUIDHarvester, parse_listing
+from http_uploader import HttpSession, parse_page
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+LISTING = (FIXTURES / "collection_page.html").read_text()
+ITEM = (FIXTURES / "item_page.html").read_text()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    pages = 10
+    latency = 0.02
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        parts = urlsplit(self.path)
+        if parts.path == "/collections/other-collections":
+            page = int(dict(parse_qsl(parts.query)).get('page', 0))
+            # Unique UUIDs per page, and a pager that stops at the last page
+            body = LISTING.replace("6f1c2a", f"{page:06x}")
+            body = re.sub(r'page=1"( title="Go to next page")',
+                          rf'page={page + 1}"\1', body)
+            if page + 1 >= self.pages:
+                body = re.sub(r'<li class="pager__item pager__item--next">.*?</li>', '', body, flags=re.S)
+        else:
+            body = ITEM
+        content = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def parse_throughput(runs=500):
+    start = time.perf_counter()
+    for _ in range(runs):
+        items = parse_listing(LISTING).items
+    listing_rate = runs * len(items) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        parse_page(ITEM).properties['dcterms:identifier']
+    detail_rate = runs / (time.perf_counter() - start)
+    print(f"Parse: listing {listing_rate:,.0f} items/s, detail page {detail_rate:,.0f} items/s")
+
+
+def per_item_crawl(collection_url):
+    session = HttpSession()
+    page_url, count = collection_url, 0
+    while page_url:
+        listing = parse_listing(session.get(page_url).text)
+        for item in listing.items:
+            parse_page(session.get(f"{collection_url.split('/collections')[0]}{item['href']}").text)
+            count += 1
+        page_url = f"{collection_url.split('?')[0]}{listing.next_href}" if listing.next_href else None
+    session.close()
+    return count
+
+
+def main(pages=10, latency=0.02):
+    parse_throughput()
+
+    FixtureHandler.pages, FixtureHandler.latency = pages, latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    collection_url = f"http://127.0.0.1:{server.server_address[1]}/collections/other-collections?page=0"
+
+    try:
+        start = time.perf_counter()
+        count = per_item_crawl(collection_url)
+        baseline = time.perf_counter() - start
+        print(f"Per-item crawl: {count} items in {baseline:.2f}s ({count / baseline:.1f} items/s)")
+
+        harvester = UUIDHarvester(detail_workers=4)
+        start = time.perf_counter()
+        rows = list(harvester.harvest_listing(collection_url))
+        elapsed = time.perf_counter() - start
+        harvester.close()
+        print(f"Listing harvest: {len(rows)} items in {elapsed:.2f}s ({len(rows) / elapsed:.1f} items/s), "
+              f"{harvester.stats['detail_pages']} detail pages opened, {baseline / elapsed:.1f}x faster")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
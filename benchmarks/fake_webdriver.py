@@ -0,0 +1,413 @@
+"""
+A stand-in for Selenium's Chrome WebDriver that fetches pages over plain HTTP.
+
+It implements the part of the WebDriver API that DigitalLibraryUploader,
+UUIDMapper, PageLoader and NetworkWatcher use: element lookup by id, a CSS
+selector subset and an XPath subset, form submission, the scripts those classes
+run, several windows, cookies and a DevTools performance log of its own requests.
+There is no JavaScript, so widgets that upload over AJAX are not covered.
+"""
+from selenium.common import NoSuchElementException
+from selenium.webdriver.common.by import By
+from urllib.parse import urljoin, urlsplit, urlencode
+from html.parser import HTMLParser
+from pathlib import Path
+import itertools
+import base64
+import json
+import sys
+import re
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from http_uploader import HttpSession
+
+KEEP_BODIES = 100  # Chrome also forgets response bodies after a while
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+COMPOUND = re.compile(r'([\w*-]+)|#([\w-]+)|\.([\w-]+)|\[([\w-]+)(?:([\^$*]?=)(?:"([^"]*)"|\'([^\']*)\'|([^\]]*)))?\]')
+XPATH = re.compile(r'^//([\w*]+)(?:\[(.+)\])?$')
+XPATH_TEST = re.compile(r"^(?:@([\w:-]+)\s*=\s*'([^']*)'|contains\((text\(\)|@[\w:-]+),\s*'([^']*)'\))$")
+
+
+class Node:
+    def __init__(self, tag, attrs, parent=None):
+        self.tag = tag
+        self.attrs = attrs
+        self.parent = parent
+        self.children = []
+        self.text = []  # Direct text, in order
+        self.value = attrs.get('value', '')
+        self.files = None
+
+    def iter(self):
+        for child in self.children:
+            yield child
+            yield from child.iter()
+
+    def text_content(self):
+        parts = list(self.text)
+        for child in self.children:
+            parts.append(child.text_content())
+        return ''.join(parts)
+
+    def ancestor(self, tag):
+        node = self.parent
+        while node is not None and node.tag != tag:
+            node = node.parent
+        return node
+
+
+class DomBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = Node('#document', {})
+        self.current = self.root
+
+    def handle_starttag(self, tag, attrs):
+        node = Node(tag, {name: value if value is not None else '' for name, value in attrs}, self.current)
+        self.current.children.append(node)
+        if tag not in VOID_TAGS:
+            self.current = node
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.current = self.current.parent
+
+    def handle_endtag(self, tag):
+        node = self.current
+        while node is not self.root and node.tag != tag:
+            node = node.parent
+        if node is not self.root:
+            self.current = node.parent
+
+    def handle_data(self, data):
+        self.current.text.append(data)
+
+
+def parse_dom(html):
+    builder = DomBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.root
+
+
+def _matches_compound(node, compound):
+    for tag, node_id, cls, attr, op, dq, sq, bare in COMPOUND.findall(compound):
+        if tag and tag != '*' and node.tag != tag:
+            return False
+        if node_id and node.attrs.get('id') != node_id:
+            return False
+        if cls and cls not in node.attrs.get('class', '').split():
+            return False
+        if attr:
+            actual = node.attrs.get(attr)
+            expected = dq or sq or bare
+            if actual is None:
+                return False
+            if op == '=' and actual != expected:
+                return False
+            if op == '^=' and not actual.startswith(expected):
+                return False
+            if op == '$=' and not actual.endswith(expected):
+                return False
+            if op == '*=' and expected not in actual:
+                return False
+    return True
+
+
+def select(root, selector):
+    """Nodes matching a CSS selector made of compound selectors and descendant combinators"""
+    steps = re.findall(r'(?:[^\s\[]|\[[^\]]*\])+', selector)
+    found = []
+    for node in root.iter():
+        if not _matches_compound(node, steps[-1]):
+            continue
+        ancestor, remaining = node.parent, steps[:-1]
+        while remaining and ancestor is not None:
+            if _matches_compound(ancestor, remaining[-1]):
+                remaining = remaining[:-1]
+            ancestor = ancestor.parent
+        if not remaining:
+            found.append(node)
+    return found
+
+
+def xpath(root, expression):
+    """Nodes matching //tag[test and test ...] with @a='v', contains(@a, 'v') and contains(text(), 'v')"""
+    match = XPATH.match(expression.strip())
+    if not match:
+        raise NotImplementedError(f"Unsupported XPath: {expression}")
+    tag, predicate = match.groups()
+    tests = [XPATH_TEST.match(test.strip()) for test in predicate.split(' and ')] if predicate else []
+    if not all(tests):
+        raise NotImplementedError(f"Unsupported XPath predicate: {expression}")
+
+    def accepts(node):
+        if tag != '*' and node.tag != tag:
+            return False
+        for test in tests:
+            attr, value, target, needle = test.groups()
+            if attr is not None and node.attrs.get(attr) != value:
+                return False
+            if target == 'text()' and needle not in ''.join(node.text):
+                return False
+            if target and target != 'text()' and needle not in node.attrs.get(target[1:], ''):
+                return False
+        return True
+
+    return [node for node in root.iter() if accepts(node)]
+
+
+class FakeElement:
+    def __init__(self, driver, node):
+        self._driver = driver
+        self._node = node
+
+    @property
+    def tag_name(self):
+        return self._node.tag
+
+    @property
+    def text(self):
+        return ' '.join(self._node.text_content().split())
+
+    def get_attribute(self, name):
+        if name == 'value':
+            return self._node.value
+        value = self._node.attrs.get(name)
+        if name in ('href', 'src', 'action') and value is not None:
+            return urljoin(self._driver.current_url, value)
+        return value
+
+    def is_displayed(self):
+        return self._node.attrs.get('type') != 'hidden'
+
+    def is_enabled(self):
+        return 'disabled' not in self._node.attrs
+
+    def clear(self):
+        self._node.value = ''
+
+    def send_keys(self, *values):
+        text = ''.join(str(value) for value in values)
+        if self._node.attrs.get('type') == 'file':
+            self._node.files = text
+        else:
+            self._node.value += text
+
+    def click(self):
+        node = self._node
+        if node.tag in ('input', 'button') and node.attrs.get('type', 'submit') == 'submit':
+            form = node.ancestor('form')
+            if form is not None:
+                self._driver._submit(form, node)
+                return
+        link = node if node.tag == 'a' else node.ancestor('a')
+        if link is not None and link.attrs.get('href'):
+            self._driver.get(urljoin(self._driver.current_url, link.attrs['href']))
+
+    def find_element(self, by, value):
+        return self._driver._find(self._node, by, value, single=True)
+
+    def find_elements(self, by, value):
+        return self._driver._find(self._node, by, value)
+
+
+class _Window:
+    def __init__(self, handle):
+        self.handle = handle
+        self.url = 'about:blank'
+        self.html = ''
+        self.dom = parse_dom('')
+
+
+class _SwitchTo:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def window(self, handle):
+        self._driver._current = next(w for w in self._driver._windows if w.handle == handle)
+
+
+class FakeDriver:
+    """Drop-in for webdriver.Chrome against a site that needs no JavaScript (such as DrupalStandIn)"""
+
+    def __init__(self, timeout=30):
+        self.session = HttpSession(timeout=timeout)
+        self._handles = (f"window-{n}" for n in itertools.count(1))
+        self._current = _Window(next(self._handles))
+        self._windows = [self._current]
+        self._request_ids = itertools.count(1)
+        self._events = []
+        self._bodies = {}
+        self.switch_to = _SwitchTo(self)
+        self.request_count = 0
+
+    # Navigation
+
+    @property
+    def current_url(self):
+        return self._current.url
+
+    @property
+    def page_source(self):
+        return self._current.html
+
+    @property
+    def title(self):
+        titles = select(self._current.dom, 'title')
+        return titles[0].text_content() if titles else ''
+
+    @property
+    def window_handles(self):
+        return [window.handle for window in self._windows]
+
+    def get(self, url):
+        self._load('GET', url)
+
+    def _load(self, method, url, fields=None, files=None):
+        """Request a document, log it like Chrome's Network domain and make it the current page"""
+        request_id = str(next(self._request_ids))
+        self._event('Network.requestWillBeSent', requestId=request_id, type='Document',
+                    request={'method': method, 'url': url})
+        self.request_count += 1
+        if method == 'POST':
+            response = self.session.post(url, fields or [], files)
+        else:
+            response = self.session.get(url)
+        if response.url != url:
+            self._event('Network.requestWillBeSent', requestId=request_id, type='Document',
+                        request={'method': 'GET', 'url': response.url},
+                        redirectResponse={'url': url, 'status': 303})
+        self._event('Network.responseReceived', requestId=request_id, type='Document',
+                    response={'url': response.url, 'status': response.status})
+        self._event('Network.loadingFinished', requestId=request_id)
+        self._bodies[request_id] = response.text
+        if len(self._bodies) > KEEP_BODIES:
+            del self._bodies[next(iter(self._bodies))]
+
+        self._current.url = response.url
+        self._current.html = response.text
+        self._current.dom = parse_dom(response.text)
+
+    def _submit(self, form, button):
+        fields, files = [], []
+        for node in form.iter():
+            name = node.attrs.get('name')
+            if not name:
+                continue
+            kind = node.attrs.get('type', 'text')
+            if node.tag == 'input' and kind == 'file':
+                if node.files:
+                    files.append((name, node.files))
+            elif node.tag == 'input' and kind in ('submit', 'button', 'image', 'reset'):
+                continue
+            elif node.tag == 'input' and kind in ('checkbox', 'radio') and 'checked' not in node.attrs:
+                continue
+            elif node.tag in ('input', 'textarea'):
+                fields.append((name, node.value if node.tag == 'input' else node.text_content()))
+            elif node.tag == 'select':
+                options = [o for o in node.iter() if o.tag == 'option']
+                chosen = next((o for o in options if 'selected' in o.attrs), options[0] if options else None)
+                if chosen is not None:
+                    fields.append((name, chosen.attrs.get('value', chosen.text_content())))
+        if button.attrs.get('name'):
+            fields.append((button.attrs['name'], button.attrs.get('value', '')))
+
+        action = urljoin(self.current_url, form.attrs.get('action') or self.current_url)
+        if form.attrs.get('method', 'get').lower() == 'post':
+            self._load('POST', action, fields, files)
+        else:
+            self._load('GET', f"{action.split('?')[0]}?{urlencode(fields)}")
+
+    # Elements
+
+    def _find(self, root, by, value, single=False):
+        if by == By.ID:
+            nodes = [node for node in root.iter() if node.attrs.get('id') == value]
+        elif by == By.CSS_SELECTOR:
+            nodes = select(root, value)
+        elif by == By.XPATH:
+            nodes = xpath(root, value)
+        elif by == By.NAME:
+            nodes = [node for node in root.iter() if node.attrs.get('name') == value]
+        elif by == By.TAG_NAME:
+            nodes = [node for node in root.iter() if node.tag == value]
+        else:
+            raise NotImplementedError(f"Unsupported locator: {by}")
+        elements = [FakeElement(self, node) for node in nodes]
+        if single:
+            if not elements:
+                raise NoSuchElementException(f"No element for {by}={value}")
+            return elements[0]
+        return elements
+
+    def find_element(self, by=By.ID, value=None):
+        return self._find(self._current.dom, by, value, single=True)
+
+    def find_elements(self, by=By.ID, value=None):
+        return self._find(self._current.dom, by, value)
+
+    # Scripts, DevTools and windows
+
+    def execute_script(self, script, *args):
+        if 'arguments[0].click()' in script:
+            return args[0].click()
+        if 'scrollIntoView' in script:
+            return None
+        if 'window.open' in script:
+            window = _Window(next(self._handles))
+            self._windows.append(window)
+            current, self._current = self._current, window
+            try:
+                self.get(args[0])
+            finally:
+                self._current = current
+            return None
+        if 'document.readyState' in script:
+            return 'complete'
+        query = re.search(r'querySelectorAll\((["\'])(.*?)\1\)', script)
+        if query:
+            nodes = select(self._current.dom, query.group(2))
+            hrefs = [urljoin(self.current_url, node.attrs.get('href', '')) for node in nodes]
+            if 'textContent' in script:
+                return [[href, node.text_content().strip()] for href, node in zip(hrefs, nodes)]
+            return hrefs
+        raise NotImplementedError(f"Unsupported script: {script[:80]}")
+
+    def execute_cdp_cmd(self, cmd, params):
+        if cmd == 'Network.getResponseBody':
+            body = self._bodies.get(params['requestId'])
+            if body is None:
+                raise KeyError(f"No resource with given identifier found: {params['requestId']}")
+            return {'body': body, 'base64Encoded': False}
+        if cmd == 'Network.setCookie':
+            self.session.cookies[params['name']] = params['value']
+        return {}
+
+    def get_log(self, log_type):
+        if log_type != 'performance':
+            return []
+        events, self._events = self._events, []
+        return events
+
+    def _event(self, method, **params):
+        self._events.append({'message': json.dumps({'message': {'method': method, 'params': params}})})
+
+    def get_cookies(self):
+        domain = urlsplit(self.current_url).hostname or ''
+        return [{'name': name, 'value': value, 'domain': domain, 'path': '/'}
+                for name, value in self.session.cookies.items()]
+
+    def get_screenshot_as_base64(self):
+        return base64.b64encode(b'').decode('ascii')
+
+    def close(self):
+        self._windows.remove(self._current)
+        if self._windows:
+            self._current = self._windows[0]
+
+    def quit(self):
+        self._windows = []
+        self.session.close()
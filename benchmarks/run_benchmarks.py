@@ -0,0 +1,348 @@
+"""
+Offline benchmark suite: transcript merging, spreadsheet reconciliation, progress
+store cost as it grows, and the browser uploader, HTTP uploader and UUID mapper
+against the local Drupal stand-in (the browser ones through fake_webdriver).
+
+Every measurement is written to one JSON file (default benchmarks/results/<time>.json)
+as {suite, case, metric, value, unit}; --compare prints the ratio to an earlier file.
+
+    python benchmarks/run_benchmarks.py --quick
+    python benchmarks/run_benchmarks.py --suite browser_upload uuid_map --latency 0.05 --compare old.json
+"""
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+from pathlib import Path
+import subprocess
+import configparser
+import platform
+import argparse
+import tempfile
+import time
+import json
+import csv
+import sys
+import io
+import os
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "src"))
+
+from drupal_standin import DrupalStandIn, StandInState
+from fake_webdriver import FakeDriver
+
+RESULTS_DIR = BENCH_DIR / "results"
+
+
+class Results:
+    def __init__(self):
+        self.rows = []
+
+    def add(self, suite, case, metric, value, unit, **params):
+        self.rows.append({'suite': suite, 'case': case, 'metric': metric,
+                          'value': round(value, 6), 'unit': unit, 'params': params})
+        print(f"{suite:>15} {case:<28} {metric:<20} {value:>12.4f} {unit}")
+
+
+@contextmanager
+def quiet(verbose=False):
+    if verbose:
+        yield
+        return
+    with redirect_stdout(io.StringIO()):
+        yield
+
+
+@contextmanager
+def site_layout(config):
+    """Temporary repo layout: the uploaders and mapper read ../docs relative to the working directory"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / "docs").mkdir()
+        (root / "src").mkdir()
+        with open(root / "docs/config.ini", 'w') as f:
+            config.write(f)
+        os.chdir(root / "src")
+        try:
+            yield root
+        finally:
+            os.chdir(cwd)
+
+
+def site_config(server, state):
+    config = configparser.ConfigParser()
+    config['Credentials'] = {
+        'account': state.account, 'password': state.password, 'base_url': server.url,
+        'collection_url': f"{server.url}{state.collection_path}", 'collection_href': state.collection_href,
+    }
+    config['Screenshots'] = {'policy': 'off'}
+    config['Browser'] = {'session_cookies': "../docs/session_cookies.json"}
+    config['Progress'] = {'timings': "../docs/upload_timings.jsonl"}
+    return config
+
+
+# Suites
+
+def bench_merge(results, args):
+    from bench_merge import make_corpus
+    from bench_streaming_merge import make_group
+    from merge_txt_to_pdf import process_transcripts
+
+    groups = 40 if args.quick else 200
+    huge_mb = 8 if args.quick else 32
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        make_corpus(tmp / "input", groups=groups, pages=5, big_groups=2, big_pages=60)
+        make_group(tmp / "input", huge_mb)
+        pages = len(os.listdir(tmp / "input"))
+        for workers in sorted({1, args.workers}):
+            start = time.perf_counter()
+            with quiet(args.verbose):
+                merged = process_transcripts(tmp / "input", tmp / f"output_{workers}", workers=workers)
+            elapsed = time.perf_counter() - start
+            case = f"{groups}_groups_{huge_mb}mb_huge"
+            params = {'groups': len(merged), 'pages': pages, 'workers': workers}
+            results.add('merge', case, f"seconds_w{workers}", elapsed, 's', **params)
+            results.add('merge', case, f"pages_per_s_w{workers}", pages / elapsed, 'pages/s', **params)
+
+
+def bench_reconcile(results, args):
+    from bench_spreadsheet_reconcile import make_data
+    from spreadsheet_editor import reconcile_status
+
+    for rows in ([10_000] if args.quick else [10_000, 100_000, 1_000_000]):
+        sheet, progress = make_data(rows)
+        start = time.perf_counter()
+        reconcile_status(sheet, progress)
+        results.add('reconcile', f"{rows}_rows", 'seconds', time.perf_counter() - start, 's', rows=rows)
+
+
+def bench_progress(results, args):
+    from spreadsheet_editor import load_progress, reconcile_status
+    from file_uploader import ProgressTracker
+    from progress_store import ProgressStore
+    import pandas as pd
+
+    ops = 200
+    for size in ([1_000, 10_000] if args.quick else [1_000, 10_000, 100_000]):
+        with tempfile.TemporaryDirectory() as tmp:
+            base = Path(tmp)
+            (base / "docs").mkdir()
+            with open(base / "docs/upload_progress.csv", 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(ProgressStore.COLUMNS)
+                for i in range(size):
+                    done = 'Yes' if i % 3 else 'No'
+                    writer.writerow([f"mvp_1.1_{i:07d}", done, done, done, '2024-01-01T00:00:00', 1, ''])
+
+            case = f"{size}_rows"
+            config = {'base_dir': base, 'source_pdf': 'pdf', 'source_txt': 'txt', 'processed_dir': 'out'}
+            with quiet(args.verbose):
+                start = time.perf_counter()
+                tracker = ProgressTracker(config)  # First open imports the CSV
+                results.add('progress', case, 'import_s', time.perf_counter() - start, 's', rows=size)
+                tracker.close()
+
+                start = time.perf_counter()
+                tracker = ProgressTracker(config)
+                results.add('progress', case, 'open_s', time.perf_counter() - start, 's', rows=size)
+
+                start = time.perf_counter()
+                completed = tracker.store.completed_identifiers()
+                results.add('progress', case, 'read_completed_s', time.perf_counter() - start, 's',
+                            rows=size, completed=len(completed))
+
+                start = time.perf_counter()
+                for i in range(ops):
+                    tracker.store.mark_completed(f"mvp_2.1_{i:07d}")
+                results.add('progress', case, 'mark_completed_ms', (time.perf_counter() - start) / ops * 1000,
+                            'ms/op', rows=size, export_interval=tracker.store.export_interval)
+
+                start = time.perf_counter()
+                for i in range(ops):
+                    tracker.mark_failed(f"mvp_3.1_{i:07d}", "benchmark")
+                results.add('progress', case, 'mark_failed_ms', (time.perf_counter() - start) / ops * 1000,
+                            'ms/op', rows=size)
+
+                start = time.perf_counter()
+                for i in range(ops):
+                    for stage in ('pdf', 'txt', 'urls'):
+                        tracker.checkpoint(f"mvp_4.1_{i:07d}", stage, media_page="media", pdf_url="pdf", txt_url="txt")
+                results.add('progress', case, 'checkpoint_ms', (time.perf_counter() - start) / ops / 3 * 1000,
+                            'ms/op', rows=size)
+
+                start = time.perf_counter()
+                tracker.store.export_csv()
+                results.add('progress', case, 'export_csv_s', time.perf_counter() - start, 's', rows=size)
+
+                # Checkpointed but unfinished uploads must not reach the spreadsheet's status columns
+                sheet = pd.DataFrame({'field_identifier': ["mvp_4.1_0000000", "mvp_2.1_0000000"],
+                                      'PDF/TXT Created?': 'No', 'Transcript Uploaded?': 'No'})
+                sheet = reconcile_status(sheet, load_progress(tracker.progress_file))
+                assert sheet['PDF/TXT Created?'].tolist() == ['No', 'Yes'], "partial upload synced as created"
+                assert sheet['Transcript Uploaded?'].tolist() == ['No', 'Yes'], "partial upload synced as uploaded"
+                tracker.close()
+
+
+def _standin(args, items):
+    state = StandInState(latency=args.latency, lock_failures=args.lock_failures)
+    for i in range(items):
+        state.add_item(f"mvp_1.1_{i:04d}")
+    return state
+
+
+def _upload_items(results, args, suite, make_uploader):
+    """Upload every stand-in item with the uploader make_uploader(identifiers) builds; records per-item cost"""
+    from identifier_registry import IdentifierRegistry
+
+    state = _standin(args, args.items)
+    with DrupalStandIn(state) as server, site_layout(site_config(server, state)) as root:
+        mapping = root / "docs/uuid_mapping.csv"
+        with open(mapping, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['OriginalIdentifier', 'BaseIdentifier', 'UUID'])
+            for item in state.items.values():
+                writer.writerow([item['identifier'], item['base'], item['uuid']])
+        files = root / "files"
+        files.mkdir()
+
+        with quiet(args.verbose):
+            uploader = make_uploader(IdentifierRegistry(mapping))
+            start = time.perf_counter()
+            uploader.login(state.account, state.password)
+            login = time.perf_counter() - start
+            requests_before = state.request_count
+
+            start = time.perf_counter()
+            failed = 0
+            for item in state.items.values():
+                base_id = item['base']
+                pdf_path, txt_path = files / f"{base_id}.pdf", files / f"{base_id}_transcript.txt"
+                pdf_path.write_bytes(b"%PDF-1.4\n" + b"0" * 4096)
+                txt_path.write_text("transcript " * 400)
+                try:
+                    uploader.upload_transcript(base_id, pdf_path, txt_path)
+                except RuntimeError:
+                    failed += 1
+            elapsed = time.perf_counter() - start
+            uploader.close()
+
+        saved = sum(1 for item in state.items.values() if len(item['transcripts']) == 2)
+        assert saved == args.items - failed, "metadata not saved"
+        params = {'items': args.items, 'latency': args.latency, 'lock_failures': args.lock_failures, 'failed': failed}
+        case = f"{args.items}_items_{int(args.latency * 1000)}ms"
+        results.add(suite, case, 'login_s', login, 's', **params)
+        results.add(suite, case, 'ms_per_item', elapsed / args.items * 1000, 'ms', **params)
+        results.add(suite, case, 'requests_per_item', (state.request_count - requests_before) / args.items,
+                    'requests', **params)
+
+
+def bench_browser_upload(results, args):
+    from file_uploader import DigitalLibraryUploader
+
+    class FakeBrowserUploader(DigitalLibraryUploader):
+        def _init_driver(self, headless):
+            self.startup_timings = {'source': 'fake', 'resolve': 0.0, 'launch': 0.0}
+            return FakeDriver()
+
+    _upload_items(results, args, 'browser_upload', lambda identifiers: FakeBrowserUploader(identifiers=identifiers))
+
+
+def bench_http_upload(results, args):
+    from http_uploader import HttpDigitalLibraryUploader
+
+    _upload_items(results, args, 'http_upload', lambda identifiers: HttpDigitalLibraryUploader(identifiers=identifiers))
+
+
+def bench_uuid_map(results, args):
+    from uuid_mapper import UUIDMapper
+
+    items = args.items * 2
+    state = _standin(args, items)
+    with DrupalStandIn(state) as server, site_layout(site_config(server, state)) as root:
+        with quiet(args.verbose):
+            mapper = UUIDMapper()
+            mapper._driver = FakeDriver()
+            start = time.perf_counter()
+            mapper.map_uuids()
+            elapsed = time.perf_counter() - start
+        with open(root / "docs/uuid_mapping.csv", newline='') as f:
+            mapped = sum(1 for _ in csv.DictReader(f))
+
+    assert mapped == items, f"mapped {mapped} of {items} items"
+    params = {'items': items, 'latency': args.latency, 'page_size': state.page_size}
+    case = f"{items}_items_{int(args.latency * 1000)}ms"
+    results.add('uuid_map', case, 'seconds', elapsed, 's', **params)
+    results.add('uuid_map', case, 'ms_per_item', elapsed / items * 1000, 'ms', **params)
+    results.add('uuid_map', case, 'requests_per_item', state.request_count / items, 'requests', **params)
+
+
+SUITES = {
+    'merge': bench_merge,
+    'reconcile': bench_reconcile,
+    'progress': bench_progress,
+    'browser_upload': bench_browser_upload,
+    'http_upload': bench_http_upload,
+    'uuid_map': bench_uuid_map,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(rows, baseline_path):
+    """Print new/old for every measurement present in both runs"""
+    with open(baseline_path) as f:
+        baseline = {(r['suite'], r['case'], r['metric']): r['value'] for r in json.load(f)['results']}
+    print(f"\nCompared with {baseline_path}:")
+    for row in rows:
+        old = baseline.get((row['suite'], row['case'], row['metric']))
+        if old:
+            print(f"{row['suite']:>15} {row['case']:<28} {row['metric']:<20} "
+                  f"{old:>12.4f} -> {row['value']:>12.4f} ({row['value'] / old:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument("--suite", nargs="*", choices=sorted(SUITES), default=sorted(SUITES))
+    parser.add_argument("--quick", action="store_true", help="smaller corpora and row counts")
+    parser.add_argument("--items", type=int, default=20, help="items per upload run (the mapper gets twice as many)")
+    parser.add_argument("--latency", type=float, default=0.0, help="stand-in server delay per request, in seconds")
+    parser.add_argument("--lock-failures", type=int, default=0,
+                        help="the first N media saves are rejected with a file lock error")
+    parser.add_argument("--workers", type=int, default=max(2, os.cpu_count() or 1), help="merge workers")
+    parser.add_argument("--output", type=Path, help="results file (default benchmarks/results/<time>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare with")
+    parser.add_argument("--verbose", action="store_true", help="show the output of the code under test")
+    args = parser.parse_args()
+
+    started = datetime.now()
+    results = Results()
+    for name in args.suite:
+        SUITES[name](results, args)
+
+    output = args.output or RESULTS_DIR / f"{started:%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'started': started.isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'options': {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+            'results': results.rows,
+        }, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        compare(results.rows, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Several "hosts" (processes with their own lease owner) work through one progress
+database with the lease protocol: claim, heartbeat while uploading, record the
+result and release. One host crashes while holding leases; its items must come
+back once the leases expire, and no item may be completed twice.
+"""
+from collections import Counter
+from pathlib import Path
+import multiprocessing as mp
+import argparse
+import tempfile
+import random
+import time
+import sys
+import os
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from progress_store import ProgressStore, LeaseHeartbeat
+
+
+def host(host_id, directory, items, ttl, crash_after, shared):
+    """Upload loop of one host; crash_after > 0 makes it die mid-upload after that many items"""
+    store = ProgressStore(Path(directory) / "upload_progress.csv", export_interval=0, shared=shared)
+    owner = f"sim-host-{host_id}:{os.getpid()}"
+    heartbeat = LeaseHeartbeat(store.db_path, owner, ttl)
+    heartbeat.start()
+    log = open(Path(directory) / f"host_{host_id}.log", 'a', buffering=1)
+    rng = random.Random(host_id)
+    done = 0
+
+    while True:
+        pending = [item for item in items if item not in store.completed_identifiers()]
+        if not pending:
+            break
+        rng.shuffle(pending)
+        claimed = False
+        for base_name in pending:
+            if not store.claim(base_name, owner, ttl):
+                continue
+            claimed = True
+            log.write(f"start {base_name}\n")
+            time.sleep(rng.uniform(0.005, 0.03))  # the upload
+            if crash_after and done == crash_after:
+                os._exit(1)  # no release, no close: the lease has to expire
+            if rng.random() < 0.1:
+                store.mark_failed(base_name, "simulated failure")
+            else:
+                store.mark_completed(base_name)
+                log.write(f"done {base_name}\n")
+                done += 1
+            store.release(base_name, owner)
+        if not claimed:
+            # Everything left is leased elsewhere; wait for those hosts or for expiry
+            time.sleep(ttl / 10)
+
+    heartbeat.stop()
+    store.release_all(owner)
+    store.close()
+    log.close()
+
+
+def simulate(hosts=4, items=200, ttl=1.0, shared=False):
+    names = [f"mvp_1.{n // 100}_{n:04d}" for n in range(items)]
+    with tempfile.TemporaryDirectory() as tmp:
+        ProgressStore(Path(tmp) / "upload_progress.csv", shared=shared).close()
+
+        ctx = mp.get_context('spawn')
+        start = time.monotonic()
+        processes = [
+            ctx.Process(target=host, args=(host_id, tmp, names, ttl, 5 if host_id == 0 else 0, shared))
+            for host_id in range(hosts)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.monotonic() - start
+
+        starts, completions = Counter(), Counter()
+        for log_file in Path(tmp).glob("host_*.log"):
+            for line in log_file.read_text().splitlines():
+                event, base_name = line.split()
+                (starts if event == 'start' else completions)[base_name] += 1
+
+        store = ProgressStore(Path(tmp) / "upload_progress.csv", shared=shared)
+        completed = store.completed_identifiers()
+        leases = store.conn.execute("SELECT COUNT(*) FROM leases").fetchone()[0]
+        store.close()
+
+    exit_codes = [process.exitcode for process in processes]
+    retried = sum(1 for count in starts.values() if count > 1)
+    duplicates = [name for name, count in completions.items() if count > 1]
+    print(f"{hosts} hosts, {items} items in {elapsed:.1f}s (lease ttl {ttl}s), exit codes {exit_codes}")
+    print(f"completed {len(completed)}/{items}, {retried} items started more than once "
+          f"(failures and the crashed host's lease), {len(duplicates)} completed twice, {leases} leases left")
+    assert completed == set(names), "items left behind"
+    assert not duplicates, f"completed twice: {duplicates[:5]}"
+    assert leases == 0, "leases not released"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hosts", type=int, default=4)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--ttl", type=float, default=1.0, help="lease ttl in seconds")
+    parser.add_argument("--shared", action="store_true", help="use the rollback journal, as on a network share")
+    args = parser.parse_args()
+    simulate(args.hosts, args.items, args.ttl, args.shared)
@@ -0,0 +1,234 @@
+from webdriver_manager.chrome import ChromeDriverManager
+from selenium.webdriver.chrome.service import Service
+from selenium.common import SessionNotCreatedException
+from selenium import webdriver
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common import TimeoutException
+from collections import defaultdict
+from pathlib import Path
+import base64
+import json
+import time
+import os
+import re
+
+DRIVER_CACHE = "../docs/chromedriver_path.txt"
+
+# Lean mode: resources the automation never looks at
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot", "*.css", "*.css?*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*siteimproveanalytics*", "*hotjar.com*",
+]
+LEAN_PREFS = {
+    "profile.managed_default_content_settings.images": 2,
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.managed_default_content_settings.media_stream": 2,
+}
+# Form pages whose widgets may rely on the theme; they load in full in lean mode
+LEAN_ALLOWLIST = ["/media/add", "/edit"]
+
+
+def resolve_driver_path(driver_path=None, cache_file=DRIVER_CACHE, refresh=False):
+    """
+    chromedriver binary to start, and where it came from. An explicit path or
+    CHROMEDRIVER_PATH wins, then the path cached by an earlier run; only when neither
+    exists (or refresh is set) is ChromeDriverManager asked, which goes to the network.
+    """
+    explicit = driver_path or os.environ.get('CHROMEDRIVER_PATH')
+    if explicit:
+        return explicit, 'configured'
+
+    cache_file = Path(cache_file)
+    if not refresh and cache_file.exists():
+        cached = cache_file.read_text().strip()
+        if cached and os.path.exists(cached):
+            return cached, 'cached'
+
+    installed = ChromeDriverManager().install()
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text(installed)
+    return installed, 'downloaded'
+
+
+def chrome_options(headless=False, profile_dir=None, lean=False, network_log=False):
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    if profile_dir:
+        # A persistent profile keeps the site's session cookies between runs
+        options.add_argument(f"--user-data-dir={Path(profile_dir).resolve()}")
+    if lean:
+        # Return from get() at DOMContentLoaded and never fetch images
+        options.page_load_strategy = 'eager'
+        options.add_experimental_option("prefs", LEAN_PREFS)
+    if network_log:
+        # DevTools Network events for NetworkWatcher
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def create_driver(headless=False, profile_dir=None, driver_path=None, cache_file=DRIVER_CACHE, options=None,
+                  lean=False, network_log=False):
+    """
+    Start Chrome without network lookups once the driver path is cached.
+    Returns (driver, timings) where timings has the driver lookup and browser launch
+    seconds and the lookup source ('configured', 'cached' or 'downloaded').
+    """
+    options = options or chrome_options(headless, profile_dir, lean, network_log)
+
+    start = time.perf_counter()
+    path, source = resolve_driver_path(driver_path, cache_file)
+    resolved = time.perf_counter()
+    try:
+        driver = webdriver.Chrome(service=Service(path), options=options)
+    except SessionNotCreatedException:
+        if source != 'cached':
+            raise
+        # Chrome was updated past the cached driver; fetch a matching one once
+        path, source = resolve_driver_path(driver_path, cache_file, refresh=True)
+        resolved = time.perf_counter()
+        driver = webdriver.Chrome(service=Service(path), options=options)
+    launched = time.perf_counter()
+
+    timings = {'source': source, 'resolve': resolved - start, 'launch': launched - resolved}
+    print(f"🕑 Browser started in {launched - start:.2f}s "
+          f"(driver {source} in {timings['resolve']:.2f}s, launch {timings['launch']:.2f}s)")
+    return driver, timings
+
+
+def page_kind(url):
+    """URL path with ids replaced, so timings group by page type"""
+    path = re.sub(r'^[a-z]+://[^/]+', '', url).split('?')[0]
+    path = re.sub(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', '{uuid}', path)
+    return re.sub(r'/\d+(?=/|$)', '/{n}', path) or '/'
+
+
+class PageLoader:
+    """
+    driver.get with per-page-type load timings. In lean mode, images, fonts, stylesheets
+    and analytics are blocked through CDP except on allowlisted pages, which also wait
+    for the full load that the eager strategy skips.
+    """
+
+    def __init__(self, driver, lean=False, allowlist=LEAN_ALLOWLIST, blocked_urls=LEAN_BLOCKED_URLS):
+        self.driver = driver
+        self.lean = lean
+        self.allowlist = list(allowlist)
+        self.blocked_urls = list(blocked_urls)
+        self.timings = defaultdict(list)
+        self._blocking = False
+        if lean:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+
+    def _set_blocking(self, blocking):
+        # Only talk to CDP when the state changes
+        if blocking != self._blocking:
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.blocked_urls if blocking else []})
+            self._blocking = blocking
+
+    def get(self, url):
+        full = not self.lean or any(pattern in url for pattern in self.allowlist)
+        if self.lean:
+            self._set_blocking(not full)
+
+        start = time.perf_counter()
+        self.driver.get(url)
+        if self.lean and full:
+            WebDriverWait(self.driver, 20).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+        self.timings[page_kind(url)].append(time.perf_counter() - start)
+
+    def summary(self):
+        """One line per page type: count, mean and worst load time"""
+        mode = "lean" if self.lean else "full"
+        lines = []
+        for kind, values in sorted(self.timings.items()):
+            lines.append(f"{mode} {kind}: {len(values)} loads, "
+                         f"avg {sum(values) / len(values) * 1000:.0f} ms, max {max(values) * 1000:.0f} ms")
+        return lines
+
+
+class NetworkResponse:
+    """A finished request seen in the DevTools log; status and url are those of the last hop"""
+
+    def __init__(self, request_id, method, first_url):
+        self.request_id = request_id
+        self.method = method
+        self.first_url = first_url
+        self.url = first_url
+        self.resource_type = None
+        self.status = None
+        self.redirected = False
+        self.failed = None
+
+
+class NetworkWatcher:
+    """
+    Waits on Chrome's performance log (DevTools Network events) instead of polling the DOM.
+    Needs a driver started with network_log=True. Call mark() before the action that
+    triggers the request, then wait_for() a predicate on the finished NetworkResponse.
+    """
+
+    def __init__(self, driver, poll=0.05):
+        self.driver = driver
+        self.poll = poll
+        self._requests = {}
+
+    def mark(self):
+        """Forget everything logged so far"""
+        self.driver.get_log('performance')
+        self._requests = {}
+
+    def _finished(self):
+        """Requests that finished or failed since the last call"""
+        done = []
+        for entry in self.driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            method, params = message.get('method'), message.get('params', {})
+            request_id = params.get('requestId')
+            if method == 'Network.requestWillBeSent':
+                response = self._requests.get(request_id)
+                if response is None:
+                    response = NetworkResponse(request_id, params['request']['method'], params['request']['url'])
+                    self._requests[request_id] = response
+                elif params.get('redirectResponse'):
+                    # Redirects keep the requestId; the POST's own status is the redirect
+                    response.redirected = True
+                response.url = params['request']['url']
+                response.resource_type = params.get('type', response.resource_type)
+            elif method == 'Network.responseReceived' and request_id in self._requests:
+                self._requests[request_id].status = params['response']['status']
+                self._requests[request_id].url = params['response']['url']
+            elif method == 'Network.loadingFinished' and request_id in self._requests:
+                done.append(self._requests.pop(request_id))
+            elif method == 'Network.loadingFailed' and request_id in self._requests:
+                response = self._requests.pop(request_id)
+                response.failed = params.get('errorText', 'failed')
+                done.append(response)
+        return done
+
+    def wait_for(self, predicate, timeout=20):
+        """First finished request matching predicate; raises TimeoutException"""
+        deadline = time.monotonic() + timeout
+        while True:
+            for response in self._finished():
+                if predicate(response):
+                    return response
+            if time.monotonic() >= deadline:
+                raise TimeoutException(f"No matching network response within {timeout}s")
+            time.sleep(self.poll)
+
+    def body(self, response):
+        """Response body text, or '' when Chrome no longer holds it"""
+        try:
+            result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': response.request_id})
+        except Exception:
+            return ''
+        if result.get('base64Encoded'):
+            return base64.b64decode(result['body']).decode('utf-8', 'replace')
+        return result.get('body', '')
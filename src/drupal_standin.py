@@ -0,0 +1,439 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl, quote
+from email.parser import BytesParser
+from html import escape
+import email.policy
+import json
+import threading
+import secrets
+import time
+import re
+
+
+class StandInState:
+    """In-memory Drupal site: items, media and sessions served by DrupalStandIn"""
+
+    def __init__(self, account="account", password="password",
+                 collection_href="/collections/other-collections/matthew-vassar-papers/",
+                 collection_path="/collections/other-collections",
+                 latency=0.0, lock_failures=0, page_size=10, jsonapi=False):
+        self.account = account
+        self.password = password
+        self.collection_href = collection_href
+        self.collection_path = collection_path
+        self.page_size = page_size
+        self.jsonapi = jsonapi
+        self.latency = latency
+        self.lock_failures = lock_failures
+        self.items = {}
+        self.nodes = {}
+        self.media = {}
+        self.sessions = set()
+        self.form_token = secrets.token_hex(8)
+        self.request_count = 0
+        self.lock = threading.Lock()
+
+    def add_item(self, base_id, original=None, item_uuid=None, listed_identifier=True):
+        """Register an item and return its UUID; listed_identifier controls the listing card"""
+        with self.lock:
+            nid = len(self.nodes) + 1
+            item_uuid = item_uuid or f"{secrets.token_hex(4)}-{nid:04d}-4000-8000-{secrets.token_hex(6)}"
+            self.items[item_uuid] = {
+                'nid': nid,
+                'uuid': item_uuid,
+                'base': base_id,
+                'identifier': original or base_id,
+                'transcripts': [],
+                'revisions': 0,
+                'listed_identifier': listed_identifier,
+            }
+            self.nodes[nid] = item_uuid
+            return item_uuid
+
+    def item_media(self, nid):
+        return [m for m in self.media.values() if m['nid'] == nid]
+
+
+MEDIA_BUNDLES = {
+    'document': ('Document', 'document'),
+    'extracted_text': ('Extracted Text', 'extracted-text'),
+}
+
+
+def _page(title, body, head=""):
+    return (
+        f"<!DOCTYPE html><html><head><title>{escape(title)}</title>{head}</head><body>"
+        f'<div class="toolbar-tab"><a href="/admin">Manage</a></div>'
+        f"<h1>{escape(title)}</h1>{body}</body></html>"
+    )
+
+
+def _hidden(form_id, state):
+    return (
+        f'<input type="hidden" name="form_build_id" value="form-{secrets.token_hex(6)}">'
+        f'<input type="hidden" name="form_token" value="{state.form_token}">'
+        f'<input type="hidden" name="form_id" value="{form_id}">'
+    )
+
+
+def _save_button():
+    return ('<input type="submit" id="edit-submit" name="op" value="Save" '
+            'data-drupal-selector="edit-submit" class="button button--primary">')
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _logged_in(self):
+        cookies = dict(
+            part.strip().split('=', 1) for part in self.headers.get('Cookie', '').split(';') if '=' in part
+        )
+        return cookies.get('SESSstandin') in self.state.sessions
+
+    def _send(self, status, body="", headers=None, content_type='text/html; charset=utf-8'):
+        content = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _redirect(self, location, headers=None):
+        self._send(303, "", dict(headers or {}, Location=location))
+
+    def _form_data(self):
+        """Parse urlencoded or multipart bodies into (fields, files)"""
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        content_type = self.headers.get('Content-Type', '')
+        if not content_type.startswith('multipart/form-data'):
+            return dict(parse_qsl(body.decode('utf-8'), keep_blank_values=True)), {}
+
+        message = BytesParser(policy=email.policy.HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode('utf-8') + body
+        )
+        fields, files = {}, {}
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            payload = part.get_payload(decode=True) or b''
+            if part.get_filename():
+                files[name] = (part.get_filename(), payload)
+            else:
+                fields[name] = payload.decode('utf-8')
+        return fields, files
+
+    def _route(self, method):
+        with self.state.lock:
+            self.state.request_count += 1
+        if self.state.latency:
+            time.sleep(self.state.latency)
+
+        parts = urlsplit(self.path)
+        path, query = parts.path, dict(parse_qsl(parts.query))
+        routes = [
+            (r'^/user/login$', self._login),
+            (r'^/user/(\d+)$', self._user),
+            (r'^/node/(\d+)/media$', self._media_list),
+            (r'^/node/(\d+)/media/add$', self._media_chooser),
+            (r'^/media/add/(\w+)$', self._media_add),
+            (r'^/media/([\w-]+)/(\d+)$', self._media_view),
+            (r'^/admin/content/media$', self._admin_media),
+            (r'^/node/(\d+)/edit$', self._node_edit),
+            (r'^/node/(\d+)$', self._node),
+            (rf'^{re.escape(self.state.collection_href)}([\w-]+)$', self._item),
+            (rf'^{re.escape(self.state.collection_path)}/?$', self._listing),
+            (r'^/jsonapi/node/islandora_object$', self._jsonapi),
+        ]
+        for pattern, handler in routes:
+            match = re.match(pattern, path)
+            if match:
+                return handler(method, query, *match.groups())
+        self._send(404, _page("Page not found", ""))
+
+    def do_GET(self):
+        self._route('GET')
+
+    def do_POST(self):
+        self._route('POST')
+
+    def _login(self, method, query):
+        if method == 'GET':
+            if self._logged_in():
+                return self._redirect('/user/1')
+            body = (
+                '<form id="user-login-form" method="post" action="/user/login">'
+                '<input type="text" id="edit-name" name="name" value="">'
+                '<input type="password" id="edit-pass" name="pass" value="">'
+                f'{_hidden("user_login_form", self.state)}'
+                '<input type="submit" id="edit-submit" name="op" value="Log in"></form>'
+            )
+            return self._send(200, _page("Log in", body))
+
+        fields, _ = self._form_data()
+        if fields.get('name') != self.state.account or fields.get('pass') != self.state.password:
+            error = '<div role="contentinfo" class="messages messages--error"><div>Unrecognized username or password.</div></div>'
+            return self._send(200, _page("Log in", error))
+        session_id = secrets.token_hex(16)
+        self.state.sessions.add(session_id)
+        self._redirect('/user/1?check_logged_in=1',
+                       {'Set-Cookie': f'SESSstandin={session_id}; Path=/; HttpOnly'})
+
+    def _user(self, method, query, uid):
+        if not self._logged_in():
+            return self._send(403, _page("Access denied", ""))
+        self._send(200, _page(self.state.account, "<p>Member</p>"))
+
+    def _require_item(self, nid):
+        item_uuid = self.state.nodes.get(int(nid))
+        if item_uuid is None:
+            self._send(404, _page("Page not found", ""))
+            return None
+        if not self._logged_in():
+            self._send(403, _page("Access denied", ""))
+            return None
+        return self.state.items[item_uuid]
+
+    def _item(self, method, query, item_uuid):
+        item = self.state.items.get(item_uuid)
+        if item is None:
+            return self._send(404, _page("Page not found", ""))
+        head = f'<link rel="shortlink" href="/node/{item["nid"]}">'
+        transcripts = ''.join(
+            f'<div class="field--name-field-transcript-file-s"><a href="{escape(uri)}">{escape(title)}</a></div>'
+            for uri, title in item['transcripts']
+        )
+        body = (
+            f'<nav class="tabs"><a href="/node/{item["nid"]}/media">Media</a>'
+            f'<a href="/node/{item["nid"]}/edit">Edit</a></nav>'
+            f'<div property="dcterms:identifier">{escape(item["identifier"])}</div>{transcripts}'
+        )
+        self._send(200, _page(item['identifier'], body, head))
+
+    def _listing(self, method, query):
+        """Collection listing with Drupal's views pager"""
+        items = list(self.state.items.values())
+        page = int(query.get('page', 0))
+        page_count = max(1, -(-len(items) // self.state.page_size))
+        start = page * self.state.page_size
+        rows = []
+        for item in items[start:start + self.state.page_size]:
+            identifier = (f'<div property="dcterms:identifier">{escape(item["identifier"])}</div>'
+                          if item['listed_identifier'] else '')
+            rows.append(
+                f'<div class="views-row"><h2>{escape(item["base"])}</h2>{identifier}'
+                f'<a class="btn ghost" rel="bookmark" href="{self.state.collection_href}{item["uuid"]}">View</a></div>'
+            )
+
+        def page_href(number):
+            params = {k: v for k, v in query.items() if k != 'page'}
+            params['page'] = number
+            return escape('?' + '&'.join(f"{quote(k)}={quote(str(v))}" for k, v in params.items()))
+
+        pager = ''
+        if page + 1 < page_count:
+            pager = (
+                f'<li class="pager__item pager__item--next"><a href="{page_href(page + 1)}" rel="next">Next</a></li>'
+                f'<li class="pager__item pager__item--last"><a href="{page_href(page_count - 1)}">Last</a></li>'
+            )
+        body = f'<div class="view-content">{"".join(rows)}</div><nav class="pager"><ul>{pager}</ul></nav>'
+        self._send(200, _page("Matthew Vassar Papers", body))
+
+    def _jsonapi(self, method, query):
+        if not self.state.jsonapi:
+            return self._send(404, _page("Page not found", ""))
+        offset = int(query.get('page[offset]', 0))
+        limit = int(query.get('page[limit]', 50))
+        items = list(self.state.items.values())
+        document = {
+            'data': [
+                {'type': 'node--islandora_object', 'id': item['uuid'],
+                 'attributes': {'field_identifier': item['identifier']}}
+                for item in items[offset:offset + limit]
+            ],
+            'links': {},
+        }
+        if offset + limit < len(items):
+            document['links']['next'] = {
+                'href': f"/jsonapi/node/islandora_object?page%5Boffset%5D={offset + limit}&page%5Blimit%5D={limit}"
+            }
+        content = json.dumps(document)
+        self._send(200, content, content_type='application/vnd.api+json')
+
+    def _node(self, method, query, nid):
+        item_uuid = self.state.nodes.get(int(nid))
+        if item_uuid is None:
+            return self._send(404, _page("Page not found", ""))
+        self._redirect(f"{self.state.collection_href}{item_uuid}")
+
+    def _media_list(self, method, query, nid):
+        item = self._require_item(nid)
+        if item is None:
+            return
+        rows = ''.join(
+            f'<tr><td><a href="/media/{m["segment"]}/{m["mid"]}">{escape(m["filename"])}</a></td></tr>'
+            for m in self.state.item_media(item['nid'])
+        )
+        body = (
+            '<div class="toolbar-tab"><a href="/admin/content/media">Media</a></div>'
+            f'<a href="/node/{nid}/media/add" class="button">Add media</a><table>{rows}</table>'
+        )
+        self._send(200, _page(f"{item['identifier']} media", body))
+
+    def _media_chooser(self, method, query, nid):
+        item = self._require_item(nid)
+        if item is None:
+            return
+        links = ''.join(
+            f'<a href="/media/add/{bundle}?field_media_of={nid}"><span class="label">{label}</span></a>'
+            for bundle, (label, _) in MEDIA_BUNDLES.items()
+        )
+        self._send(200, _page("Add media", links))
+
+    def _media_form(self, bundle, nid, error=""):
+        action = f"/media/add/{bundle}?{quote('field_media_of')}={nid}"
+        return _page(f"Add {MEDIA_BUNDLES[bundle][0]}", (
+            f'{error}<form id="media-{bundle.replace("_", "-")}-add-form" method="post" '
+            f'action="{action}" enctype="multipart/form-data">'
+            '<input type="text" name="name[0][value]" value="">'
+            '<input type="file" name="files[field_media_file_0]">'
+            f'<input type="hidden" name="field_media_of[0][target_id]" value="{nid}">'
+            f'{_hidden(f"media_{bundle}_add_form", self.state)}{_save_button()}</form>'
+        ))
+
+    def _media_add(self, method, query, bundle):
+        if bundle not in MEDIA_BUNDLES:
+            return self._send(404, _page("Page not found", ""))
+        item = self._require_item(query.get('field_media_of', 0))
+        if item is None:
+            return
+        if method == 'GET':
+            return self._send(200, self._media_form(bundle, item['nid']))
+
+        fields, files = self._form_data()
+        upload = files.get('files[field_media_file_0]')
+        if fields.get('form_token') != self.state.form_token:
+            error = "The form has become outdated."
+        elif not upload or not upload[1]:
+            error = "File field is required."
+        else:
+            error = ""
+        with self.state.lock:
+            if not error and self.state.lock_failures > 0:
+                self.state.lock_failures -= 1
+                error = "File already locked for writing"
+        if error:
+            message = f'<div role="contentinfo" class="messages messages--error"><div>{error}</div></div>'
+            return self._send(200, self._media_form(bundle, item['nid'], message))
+
+        with self.state.lock:
+            mid = len(self.state.media) + 1
+            self.state.media[mid] = {
+                'mid': mid,
+                'nid': item['nid'],
+                'segment': MEDIA_BUNDLES[bundle][1],
+                'filename': upload[0],
+                'size': len(upload[1]),
+            }
+        self._redirect('/admin/content/media')
+
+    def _media_view(self, method, query, segment, mid):
+        media = self.state.media.get(int(mid))
+        if media is None or media['segment'] != segment:
+            return self._send(404, _page("Page not found", ""))
+        self._send(200, _page(media['filename'], f"<p>{media['size']} bytes</p>"))
+
+    def _admin_media(self, method, query):
+        if not self._logged_in():
+            return self._send(403, _page("Access denied", ""))
+        self._send(200, _page("Media", f"<p>{len(self.state.media)} media items</p>"))
+
+    def _edit_form(self, item, rows):
+        inputs = ''.join(
+            f'<tr><td><input type="text" id="edit-field-transcript-file-s-{i}-uri" '
+            f'name="field_transcript_file_s[{i}][uri]" value="{escape(uri)}">'
+            f'<input type="text" id="edit-field-transcript-file-s-{i}-title" '
+            f'name="field_transcript_file_s[{i}][title]" value="{escape(title)}"></td></tr>'
+            for i, (uri, title) in enumerate(rows)
+        )
+        return _page(f"Edit {item['identifier']}", (
+            f'<form id="node-islandora-object-edit-form" method="post" action="/node/{item["nid"]}/edit">'
+            f'<table id="field-transcript-file-s-values">{inputs}</table>'
+            '<input type="submit" name="field_transcript_file_s_add_more" value="Add another item">'
+            f'{_hidden("node_islandora_object_edit_form", self.state)}{_save_button()}</form>'
+        ))
+
+    def _node_edit(self, method, query, nid):
+        item = self._require_item(nid)
+        if item is None:
+            return
+        if method == 'GET':
+            rows = list(item['transcripts']) or [('', '')]
+            return self._send(200, self._edit_form(item, rows))
+
+        fields, _ = self._form_data()
+        rows = []
+        while f'field_transcript_file_s[{len(rows)}][uri]' in fields:
+            i = len(rows)
+            rows.append((fields[f'field_transcript_file_s[{i}][uri]'],
+                         fields.get(f'field_transcript_file_s[{i}][title]', '')))
+
+        if 'field_transcript_file_s_add_more' in fields:
+            return self._send(200, self._edit_form(item, rows + [('', '')]))
+        if fields.get('form_token') != self.state.form_token:
+            error = '<div role="contentinfo" class="messages messages--error"><div>The form has become outdated.</div></div>'
+            return self._send(200, error + self._edit_form(item, rows))
+
+        with self.state.lock:
+            item['transcripts'] = [(uri, title) for uri, title in rows if uri]
+            item['revisions'] += 1
+        self._redirect(f"{self.state.collection_href}{item['uuid']}")
+
+
+class DrupalStandIn:
+    """Local stand-in for the digital library, served on a background thread"""
+
+    def __init__(self, state=None, host="127.0.0.1", port=0):
+        self.state = state or StandInState()
+        self.server = ThreadingHTTPServer((host, port), StandInHandler)
+        self.server.daemon_threads = True
+        self.server.state = self.state
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    state = StandInState()
+    for i in range(1, 6):
+        print(f"mvp_1.1_{i:03d} -> {state.add_item(f'mvp_1.1_{i:03d}')}")
+    server = DrupalStandIn(state, port=8080)
+    print(f"Stand-in digital library running at {server.url} (login: account / password)")
+    server.server.serve_forever()
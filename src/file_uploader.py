@@ -1,44 +1,81 @@
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
+from http_uploader import HttpDigitalLibraryUploader
+from identifier_registry import get_registry
+from progress_store import ProgressStore, LeaseHeartbeat, lease_owner
+from retry_scheduler import RetryScheduler, classify_failure
+from screenshots import ScreenshotRecorder
+from stage_timing import StageTimer, read_timings, timing_report
 from selenium.common import TimeoutException
-from selenium import webdriver
-from datetime import datetime
+from browser import create_driver, PageLoader, NetworkWatcher, LEAN_ALLOWLIST
 from pathlib import Path
 import pandas as pd
 import configparser
+import argparse
 import logging
-import glob
+import json
 import time
+import zlib
+import csv
 import re
 import os
 
 
+class FileLockedError(RuntimeError):
+    """Drupal answered 'File already locked for writing'; the upload can be retried"""
+
+
 class DigitalLibraryUploader:
 
-    def __init__(self, headless=False):
+    MEDIA_SEGMENTS = {
+        "Document": "document",
+        "Extracted Text": "extracted-text"
+    }
+
+    def __init__(self, headless=False, identifiers=None, lean=None):
         config = configparser.ConfigParser()
         config.read('../docs/config.ini')
+        if identifiers is None:
+            identifiers = get_registry("../docs/uuid_mapping.csv")
+        self.identifiers = identifiers
+        self.driver_path = config.get('Browser', 'driver_path', fallback=None)
+        self.profile_dir = config.get('Browser', 'profile_dir', fallback=None)
+        self.session_file = Path(config.get('Browser', 'session_cookies', fallback="../docs/session_cookies.json"))
+        self.lean = config.getboolean('Browser', 'lean', fallback=False) if lean is None else lean
         self.driver = self._init_driver(headless)
+        self.network = NetworkWatcher(self.driver)
+        allowlist = config.get('Browser', 'lean_allowlist', fallback=None)
+        self.pages = PageLoader(
+            self.driver, self.lean,
+            allowlist=[p.strip() for p in allowlist.split(',') if p.strip()] if allowlist is not None else LEAN_ALLOWLIST
+        )
         self.wait = WebDriverWait(self.driver, 20)
+        self.page_loads = 0  # Page loads for the current item
+        self.item_transcripts = []  # (url, title) links on the current item page
         self.base_url = config['Credentials']['base_url']
         self.collection_href = config['Credentials']['collection_href']
+        self.screenshots = ScreenshotRecorder(
+            self.driver,
+            directory=config.get('Screenshots', 'directory', fallback="../screenshots"),
+            policy=config.get('Screenshots', 'policy', fallback="errors"),
+            kind=config.get('Screenshots', 'kind', fallback="png"),
+            sample_rate=config.getfloat('Screenshots', 'sample_rate', fallback=0.1),
+            max_files=config.getint('Screenshots', 'max_files', fallback=50)
+        )
+        self.timer = StageTimer(config.get('Progress', 'timings', fallback="../docs/upload_timings.jsonl"),
+                                page_count=lambda: self.page_loads)
 
     def _init_driver(self, headless):
-        options = webdriver.ChromeOptions()
-        if headless:
-            options.add_argument("--headless=new")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-
-        # Use Service object for ChromeDriverManager
-        service = Service(ChromeDriverManager().install())
-        return webdriver.Chrome(
-            service=service,
-            options=options
-        )
+        # Cached chromedriver path: no ChromeDriverManager network lookup after the first run
+        driver, self.startup_timings = create_driver(headless, self.profile_dir, self.driver_path,
+                                                     lean=self.lean, network_log=True)
+        return driver
+
+    def _get(self, url):
+        """driver.get that counts towards the current item's page loads"""
+        self.page_loads += 1
+        self.pages.get(url)
 
     def _extract_base_identifier(self, filename):
         match = re.search(r'(mvp_[\d\.]+_\d+)', filename)
@@ -49,78 +86,98 @@ class DigitalLibraryUploader:
         return base_id
 
     def _take_screenshot(self, name):
-        path = os.path.abspath(f"screenshots/error_screenshot_{name}_{int(time.time())}.png")
-        self.driver.save_screenshot(path)
-        print(f"⚠️ Screenshot saved: file://{path}")
-
-        # Manage the number of screenshots
-        files = glob.glob(os.path.join("../screenshots", "error_screenshot_*.png"))
-        file_times = []
-        for file in files:
-            filename = os.path.basename(file)
-            parts = filename.split('_')
-            if len(parts) < 3:
-                continue  # Invalid filename format
-            timestamp_part = parts[-1].split('.')[0]
-            if not timestamp_part.isdigit():
-                continue  # Invalid timestamp
-            timestamp = int(timestamp_part)
-            file_times.append((file, timestamp))
-
-        # Sort files by timestamp (oldest first)
-        file_times.sort(key=lambda x: x[1])
-
-        # Delete oldest files if more than max_num
-        max_num = 50
-        if len(file_times) > max_num:
-            num_to_delete = len(file_times) - max_num
-            files_to_delete = [file for file, _ in file_times[:num_to_delete]]
-            for file_path in files_to_delete:
-                try:
-                    os.remove(file_path)
-                    print(f"Deleted old screenshot: {file_path}")
-                except Exception as e:
-                    print(f"Error deleting {file_path}: {e}")
+        """Error capture; written in the background according to the screenshot policy"""
+        self.screenshots.capture(name, error=True)
 
     def login(self, username, password):
+        start = time.perf_counter()
+        if self._restore_session(username):
+            print(f"✅ Reused saved session ({time.perf_counter() - start:.2f}s)")
+            return
+
         print("🔑 Navigating to login page...")
         try:
-            self.driver.get(f"{self.base_url}/user/login")
+            self.pages.get(f"{self.base_url}/user/login")
             self.wait.until(EC.presence_of_element_located((By.ID, "edit-name"))).send_keys(username)
             self.driver.find_element(By.ID, "edit-pass").send_keys(password)
             self.driver.find_element(By.ID, "edit-submit").click()
-            WebDriverWait(self.driver, 1).until(
-                (EC.url_contains("check_logged_in=1")))
-            print("✅ Login successful")
+            # Resolves on the redirect or on the error message, whichever comes first
+            WebDriverWait(self.driver, 20).until(
+                lambda d: "check_logged_in=1" in d.current_url or d.find_elements(By.CSS_SELECTOR, ".messages--error")
+            )
+            if "check_logged_in=1" not in self.driver.current_url:
+                raise TimeoutException("login form returned an error")
+            print(f"✅ Login successful ({time.perf_counter() - start:.2f}s)")
+            self._save_session(username)
         except TimeoutException as e:
             self._take_screenshot("login_failure")
             raise RuntimeError(f"Login failed: {str(e)} please make sure your username and password in config.ini are correct.")
 
+    def _logged_in(self):
+        """One page load: Drupal sends a logged-in /user request on to /user/<uid>"""
+        self.pages.get(f"{self.base_url}/user")
+        return re.search(r'/user/\d+', self.driver.current_url) is not None
 
-    def _get_uuid_mapping(self):
-        """Load UUID to identifier mapping from CSV"""
-        mapping_file = Path("../docs/uuid_mapping.csv")
-        if not mapping_file.exists():
-            raise FileNotFoundError("UUID mapping file not found")
+    def _restore_session(self, username):
+        """Reuse the Chrome profile's session or the saved cookie jar; False means a full login is needed"""
+        try:
+            if self.profile_dir:
+                return self._logged_in()
+            if not self.session_file.exists():
+                return False
+
+            saved = json.loads(self.session_file.read_text())
+            if saved.get('base_url') != self.base_url or saved.get('account') != username:
+                return False
+            now = time.time()
+            cookies = [cookie for cookie in saved.get('cookies', []) if cookie.get('expiry', now + 1) > now]
+            if not cookies:
+                return False
+
+            # CDP sets cookies for the site without loading one of its pages first
+            for cookie in cookies:
+                params = {k: v for k, v in cookie.items() if k in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite')}
+                if 'expiry' in cookie:
+                    params['expires'] = cookie['expiry']
+                params['url'] = self.base_url
+                self.driver.execute_cdp_cmd('Network.setCookie', params)
+            return self._logged_in()
+        except Exception as e:
+            print(f"⚠️ Could not reuse saved session: {str(e)}")
+            return False
 
-        df = pd.read_csv(mapping_file)
-        return dict(zip(df['BaseIdentifier'], df['UUID']))
+    def _save_session(self, username):
+        """Keep the session cookies (readable only by this user) for the next run"""
+        if self.profile_dir:
+            return
+        try:
+            self.session_file.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.session_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'base_url': self.base_url, 'account': username, 'cookies': self.driver.get_cookies()}, f)
+        except Exception as e:
+            print(f"⚠️ Could not save session cookies: {str(e)}")
 
     def _navigate_to_record(self, identifier):
         """Direct navigation using UUID mapping"""
         base_id = self._extract_base_identifier(identifier)
-        uuid_mapping = self._get_uuid_mapping()
 
         try:
-            item_uuid = uuid_mapping[base_id]
+            item_uuid = self.identifiers.uuid_for(base_id)
             direct_url = f"{self.base_url}{self.collection_href}{item_uuid}"
-            self.driver.get(direct_url)
+            self._get(direct_url)
 
             # Verify we're on the correct page
             WebDriverWait(self.driver, 10).until(
                 EC.presence_of_element_located((By.XPATH, f"//div[contains(text(), '{base_id}')]"))
             )
             print(f"✅ Directly accessed {base_id}")
+
+            # Transcript links already shown on the item, so a finished edit can be skipped
+            self.item_transcripts = [tuple(link) for link in self.driver.execute_script(
+                "return Array.from(document.querySelectorAll('.field--name-field-transcript-file-s a'),"
+                " a => [a.href, a.textContent.trim()]);"
+            ) or []]
             return
 
         except KeyError:
@@ -131,142 +188,117 @@ class DigitalLibraryUploader:
 
 
 
-    def _upload_media_file(self, file_path, media_type, media_url):
-        """Optimized media file_uploader with direct URL handling"""
-        try:
-            print(f"🔄 Navigating to media creation page for {media_type}")
-            self.driver.get(f"{media_url}/add")
-
-            # Wait for media type selection
-            WebDriverWait(self.driver, 1).until(
-                EC.presence_of_element_located((By.XPATH, "//h1[contains(text(), 'Add media')]"))
-            )
-
-            # Select media type
-            media_choice = self.wait.until(EC.element_to_be_clickable(
-                (By.XPATH, f"//span[@class='label' and contains(text(), '{media_type}')]")
-            ))
-            media_choice.click()
-            print(f"📁 File {file_path.name} selected")
-            print(f"Current page title: {self.driver.title}")
-            print(f"Current URL: {self.driver.current_url}")
-            self._take_screenshot("pre_upload_state")
-            # File file_uploader handling
-            file_input = self.wait.until(EC.element_to_be_clickable(
-                (By.XPATH, "//input[@type='file']")
-            ))
-            # Upload the file
-            file_input.send_keys(str(file_path.resolve()))
-            print("⏳ Waiting for upload to complete...")
-
-            # Wait until the input value is updated (or you could check for a new DOM element)
-            self.wait.until(
-                lambda d: file_input.get_attribute("value") and file_input.get_attribute("value") != ''
-            )
-
-            # Or if the site displays uploaded file info
-            # self.wait.until(EC.text_to_be_present_in_element((By.CSS_SELECTOR, ".file-name"), file_path.name))
-
-            print("✅ File upload detected")
-
+    def _find_save_button(self):
+        """Save button of the media form, trying several selectors"""
+        save_button_xpaths = [
+            "//input[@data-drupal-selector='edit-submit' and @value='Save']",
+            "//input[@id='edit-submit' and @name='op']",
+            "//input[contains(@class, 'button--primary') and @value='Save']",
+            "//*[@id='edit-submit']"
+        ]
+        for xpath in save_button_xpaths:
+            buttons = self.driver.find_elements(By.XPATH, xpath)
+            if buttons:
+                return buttons[0]
+        raise RuntimeError("Could not find save button with any selector")
+
+    def _attach_file(self, file_path):
+        """Send the file to the managed-file widget and wait for its AJAX upload to return"""
+        file_input = self.wait.until(EC.presence_of_element_located(
+            (By.XPATH, "//input[@type='file']")
+        ))
+        # Drupal's JS managed-file widget uploads on change through its hidden upload button;
+        # without one the file is sent along with the form on save
+        ajax_upload = bool(self.driver.find_elements(By.CSS_SELECTOR, "input[type='submit'][name$='_upload_button']"))
+        self.network.mark()
+        file_input.send_keys(str(file_path.resolve()))
+        if not ajax_upload:
+            return
 
-            # 6. Handle save button with multiple fallbacks
-            save_button_xpaths = [
-                "//input[@data-drupal-selector='edit-submit' and @value='Save']",
-                "//input[@id='edit-submit' and @name='op']",
-                "//input[contains(@class, 'button--primary') and @value='Save']",
-                "//*[@id='edit-submit']"
-            ]
+        print("⏳ Waiting for upload to complete...")
+        response = self.network.wait_for(
+            lambda r: r.method == 'POST' and ('ajax_form=1' in r.first_url or '_wrapper_format=drupal_ajax' in r.first_url),
+            timeout=60
+        )
+        if response.failed or response.status >= 400:
+            raise RuntimeError(f"File upload request failed: {response.failed or response.status}")
+        body = self.network.body(response)
+        if 'File already locked for writing' in body:
+            raise FileLockedError(file_path.name)
+        if 'messages--error' in body:
+            raise RuntimeError(f"File upload rejected: {re.sub(r'<[^>]+>', ' ', body)[:300]}")
+        print("✅ File upload detected")
+
+    def _save_media_form(self):
+        """Submit the media form; the POST's redirect means saved, a re-rendered form carries the error"""
+        form_url = self.driver.current_url
+        save_button = self._find_save_button()
+        self.network.mark()
+        self.driver.execute_script("arguments[0].click();", save_button)
+        self.page_loads += 1
+
+        response = self.network.wait_for(
+            lambda r: r.method == 'POST' and r.resource_type == 'Document', timeout=60
+        )
+        if response.failed:
+            raise RuntimeError(f"Media save request failed: {response.failed}")
+        if response.redirected and response.status < 400:
+            return response.url
+
+        body = self.network.body(response)
+        if 'File already locked for writing' in body:
+            raise FileLockedError(form_url)
+        errors = re.findall(r'messages--error.*?</div>\s*</div>', body, re.S)
+        detail = re.sub(r'\s+', ' ', re.sub(r'<[^>]+>', ' ', errors[0])).strip() if errors else f"HTTP {response.status}"
+        raise RuntimeError(f"Media save failed: {detail}")
+
+    def _upload_media_file(self, file_path, media_type, media_url, max_attempts=3):
+        """Create one media entity; lock errors start over on a fresh form, at most max_attempts times"""
+        try:
+            for attempt in range(max_attempts):
+                print(f"🔄 Navigating to media creation page for {media_type}")
+                self._get(f"{media_url}/add")
+
+                # Select media type
+                media_choice = self.wait.until(EC.element_to_be_clickable(
+                    (By.XPATH, f"//span[@class='label' and contains(text(), '{media_type}')]")
+                ))
+                media_choice.click()
+                self.page_loads += 1
+                print(f"📁 File {file_path.name} selected")
+                self.screenshots.capture("pre_upload_state")
 
-            save_button = None
-            for xpath in save_button_xpaths:
                 try:
-                    save_button = self.wait.until(EC.element_to_be_clickable(
-                        (By.XPATH, xpath)
-                    ))
-                    break
-                except TimeoutException:
+                    self._attach_file(file_path)
+                    saved_url = self._save_media_form()
+                except FileLockedError:
+                    print(f"⚠️ File lock error on attempt {attempt + 1}, retrying...")
+                    self.timer.retry()
                     continue
 
-            if not save_button:
-                raise RuntimeError("Could not find save button with any selector")
+                print(f"✅ Media saved successfully ({saved_url})")
+                return
 
-            # 7. Enhanced error handling during save
-            error_detected = False
-            for attempt in range(3):
-                try:
-                    self.driver.execute_script("arguments[0].click();", save_button)
-
-                    # Check for "File locked" error immediately after click
-                    error_xpath = """
-                                     //div[@role='contentinfo' and contains(@class, 'messages--error')]
-                                     //div[contains(text(), 'File already locked for writing')]
-                                 """
-                    try:
-                        WebDriverWait(self.driver, 1).until(  # Timeout set to 1 second
-                            EC.presence_of_element_located((By.XPATH, error_xpath))
-                        )
-                        print("⚠️ File lock error detected, refreshing...")
-                        self.driver.refresh()
-                        error_detected = True
-                        break  # Exit retry loop to handle refresh
-                    except TimeoutException:
-                        pass  # No error found, continue
-
-                    # Original success check
-                    self.wait.until(lambda d: "media" in d.current_url)
-                    error_detected = False
-                    break  # If no error detected, exit the loop
-
-                except Exception as e:
-                    print(f"❌ Error on attempt {attempt + 1}: {str(e)}")
-                    if attempt == 2:  # After 3 attempts, raise the error
-                        raise e
-
-
-            if error_detected:
-                print("🔄 Retrying after error refresh...")
-                return self._upload_media_file(file_path, media_type)
-            self.driver.refresh()
-            self.wait.until(EC.url_matches(f"{self.base_url}/admin/content/media"))
-            print("✅ Media saved successfully")
-            return
+            raise RuntimeError(f"File stayed locked after {max_attempts} attempts")
 
         except Exception as e:
-            self._take_screenshot("metadata_update_error")
-            raise RuntimeError(f"Metadata update failed: {str(e)}")
+            self._take_screenshot("media_upload_error")
+            raise RuntimeError(f"Media upload failed: {str(e)}")
 
-    def get_file_urls(self):
-        """Get URLs for both PDF and TXT files from item media page"""
+    def get_file_urls(self, found=None):
+        """URLs for both PDF and TXT files, from a media page scan (default: the current page)"""
         try:
-            # Ensure we're on the item's media page
-            if not self.driver.current_url.endswith("/media"):
-                raise RuntimeError("Not on item media page")
+            if found is None:
+                # Ensure we're on the item's media page
+                if not self.driver.current_url.endswith("/media"):
+                    raise RuntimeError("Not on item media page")
+                found = self._scan_media(self.driver.current_url)
 
-            print("🔗 Collecting file URLs from media page...")
             urls = {
-                'pdf': None,
-                'txt': None
-            }
-
-            # Find all media links with type indicators
-            media_links = self.wait.until(EC.presence_of_all_elements_located(
-                (By.XPATH, "//a[contains(@href, '/media/')]")
-            ))
-
-            # Map URL paths to our types
-            type_mapping = {
-                'document': 'pdf',
-                'extracted-text': 'txt'
+                'pdf': found.get(self.MEDIA_SEGMENTS["Document"]),
+                'txt': found.get(self.MEDIA_SEGMENTS["Extracted Text"])
             }
 
-            for link in media_links:
-                href = link.get_attribute('href')
-                for path_segment, file_type in type_mapping.items():
-                    if f'/media/{path_segment}/' in href and not urls[file_type]:
-                        urls[file_type] = href
-                        print(f"  ✅ Found {file_type.upper()} URL: {href}")
-
             # Validate we found both
             if not all(urls.values()):
                 missing = [k.upper() for k,v in urls.items() if not v]
@@ -280,33 +312,45 @@ class DigitalLibraryUploader:
 
 
     def _fill_url_fields(self, pdf_url, txt_url):
-        """Fill both URL fields with proper field addition handling"""
+        """Fill both URL rows and save once; returns False when they already hold these values"""
         try:
-            print("📝Filling PDF metadata!")
-            # First field (PDF)
-            self._fill_single_url_field(pdf_url, "PDF Transcript", 0)
-            print("✅PDF metadata filled successfully!")
-            save_button = self.wait.until(EC.element_to_be_clickable(
-                (By.CSS_SELECTOR, 'input#edit-submit')
-            ))
-            current_url = self.driver.current_url
-            print(current_url)
-            save_button.click()
-            self.driver.get(current_url)
+            wanted = [(pdf_url, "PDF Transcript"), (txt_url, "TXT Transcript")]
+            if self._url_field_values() == wanted:
+                print("⏩ Transcript URLs already set, skipping edit")
+                return False
+
+            # Make sure the second row exists before filling anything
+            if not self.driver.find_elements(By.ID, "edit-field-transcript-file-s-1-uri"):
+                self._add_another_item()
+
+            print("📝Filling PDF and TXT metadata!")
+            for index, (url, title) in enumerate(wanted):
+                self._fill_single_url_field(url, title, index)
 
-            print("📝Filling TXT metadata!")
-            # Now fill second field (TXT)
-            self._fill_single_url_field(txt_url, "TXT Transcript", 1)
             save_button = self.wait.until(EC.element_to_be_clickable(
                 (By.CSS_SELECTOR, 'input#edit-submit')
             ))
             save_button.click()
-            print("✅TXT metadata filled successfully!")
+            self.page_loads += 1
+            print("✅PDF and TXT metadata filled successfully!")
+            return True
 
         except Exception as e:
             self._take_screenshot("url_field_fill_error")
             raise RuntimeError(f"Failed to fill URL fields: {str(e)}")
 
+    def _url_field_values(self):
+        """(uri, title) of each transcript URL row present in the edit form"""
+        values = []
+        for index in range(2):
+            uri_fields = self.driver.find_elements(By.ID, f"edit-field-transcript-file-s-{index}-uri")
+            if not uri_fields:
+                break
+            title_fields = self.driver.find_elements(By.ID, f"edit-field-transcript-file-s-{index}-title")
+            values.append((uri_fields[0].get_attribute("value") or '',
+                           title_fields[0].get_attribute("value") or '' if title_fields else ''))
+        return values
+
     def _fill_single_url_field(self, url, title, index):
         """Fill individual URL and title fields"""
         try:
@@ -339,13 +383,15 @@ class DigitalLibraryUploader:
 
             # Find the 'Add another item' button
             add_button = self.wait.until(EC.element_to_be_clickable(
-                (By.CSS_SELECTOR, 'input[name="field_transcript_file_s__add_more"]')
+                (By.CSS_SELECTOR, 'input[name^="field_transcript_file_s"][name$="add_more"]')
             ))
 
             # Scroll to and click the add button
             self.driver.execute_script("arguments[0].scrollIntoView(true);", add_button)
             add_button.click()
 
+            # The new row arrives by AJAX; wait for its URI input
+            self.wait.until(EC.presence_of_element_located((By.ID, "edit-field-transcript-file-s-1-uri")))
 
             print("➕ Added new URL field set")
 
@@ -353,104 +399,153 @@ class DigitalLibraryUploader:
             self._take_screenshot("add_item_failure")
             raise RuntimeError(f"Failed to add new URL field set: {str(e)}")
 
-    def _update_metadata(self, pdf_url, txt_url):
-        """Update parent record with both file URLs"""
+    def _update_metadata(self, pdf_url, txt_url, media_url=None):
+        """Update parent record with both file URLs, from its media tab URL (default: the current page)"""
         try:
             print("📝 Updating metadata...")
-            current_url = self.driver.current_url
+            current_url = media_url or self.driver.current_url
             edit_url = current_url.replace("/media", "/edit")
-            self.driver.get(edit_url)
-            # Fill both URL fields
-            self._fill_url_fields(pdf_url, txt_url)
-
-
-            self.wait.until(EC.url_contains("/collections/"))
-            print("✅ Metadata updated successfully")
+            self._get(edit_url)
+            # Fill both URL fields in one submission
+            if self._fill_url_fields(pdf_url, txt_url):
+                self.wait.until(EC.url_contains("/collections/"))
+                print("✅ Metadata updated successfully")
             return
 
         except Exception as e:
             self._take_screenshot("metadata_update_error")
             raise RuntimeError(f"Metadata update failed: {str(e)}")
 
-    def upload_transcript(self, identifier, pdf_path, txt_path):
-        """Optimized file_uploader process with direct access"""
+    def upload_transcript(self, identifier, pdf_path, txt_path, resume=None, checkpoint=None):
+        """
+        Optimized file_uploader process with direct access.
+        resume holds the stages recorded by earlier attempts (ProgressTracker.checkpoints), so a
+        retry starts at the first unfinished one; checkpoint(stage, **values) records each stage.
+        """
+        self.page_loads = 0
+        self.item_transcripts = []
+        self.timer.start_item(identifier)
+        timer = self.timer
+        resume = resume or {}
+        checkpoint = checkpoint or (lambda stage, **values: None)
         try:
-            # Direct navigation using UUID mapping
-            self._navigate_to_record(identifier)
-
-            # Navigate to media page through proper menu
-            media_url = self._access_media_page()
-
-            # Process PDF
-            if not self._check_file_exists("Document", media_url):
-                print(f"📤 Starting PDF file_uploader process for {pdf_path}")
-                self._upload_media_file(pdf_path, "Document", media_url)
-                self.driver.get(media_url)  # Refresh media page
-
-            # Process TXT
-            if not self._check_file_exists("Extracted Text", media_url):
-                print(f"📤 Starting TXT file_uploader process for {txt_path}")
-                self._upload_media_file(txt_path, "Extracted Text", media_url)
-                self.driver.get(media_url)  # Refresh media page
-
-            # Get URLs and update metadata
-            urls = self.get_file_urls()
+            media_url = resume.get('media_page')
+            if media_url and resume.get('pdf_url') and resume.get('txt_url'):
+                # Both media exist and their URLs are known: only the edit is left
+                print(f"⏩ Resuming {identifier} at the metadata edit")
+                urls = {'pdf': resume['pdf_url'], 'txt': resume['txt_url']}
+            else:
+                if not media_url:
+                    # Direct navigation using UUID mapping
+                    with timer.span('navigate'):
+                        self._navigate_to_record(identifier)
+
+                    # Go straight to the item's media tab
+                    with timer.span('media_page'):
+                        media_url = self._access_media_page()
+
+                # Scan the media tab once for both media types; it also guards against
+                # creating a second media entity when an earlier save went unrecorded
+                with timer.span('scan_media'):
+                    found = self._scan_media(media_url)
+
+                uploaded = False
+                if self.MEDIA_SEGMENTS["Document"] not in found:
+                    print(f"📤 Starting PDF file_uploader process for {pdf_path}")
+                    with timer.span('upload_pdf'):
+                        self._upload_media_file(pdf_path, "Document", media_url)
+                    checkpoint('pdf', media_page=media_url)
+                    uploaded = True
+
+                if self.MEDIA_SEGMENTS["Extracted Text"] not in found:
+                    print(f"📤 Starting TXT file_uploader process for {txt_path}")
+                    with timer.span('upload_txt'):
+                        self._upload_media_file(txt_path, "Extracted Text", media_url)
+                    checkpoint('txt', media_page=media_url)
+                    uploaded = True
+
+                # The scan is only stale once something was uploaded
+                if uploaded:
+                    with timer.span('rescan_media'):
+                        found = self._scan_media(media_url, reload=True)
+
+                # Get URLs and update metadata
+                with timer.span('get_file_urls'):
+                    urls = self.get_file_urls(found)
+                checkpoint('urls', media_page=media_url, pdf_url=urls['pdf'], txt_url=urls['txt'])
             print(f"🔗 Obtained URLs: PDF={urls['pdf']}, TXT={urls['txt']}")
-            self._update_metadata(urls['pdf'], urls['txt'])
+            if self.item_transcripts == [(urls['pdf'], "PDF Transcript"), (urls['txt'], "TXT Transcript")]:
+                print("⏩ Transcript URLs already set, skipping edit")
+            else:
+                with timer.span('update_metadata'):
+                    self._update_metadata(urls['pdf'], urls['txt'], media_url)
+            checkpoint('metadata')
+            timer.finish_item('completed')
             return
 
         except Exception as e:
             self._take_screenshot("upload_process_error")
+            timer.finish_item('failed', e)
             raise
 
+        finally:
+            print(f"📄 {self.page_loads} page loads for {identifier}")
+
     def _access_media_page(self):
-        """Reliable media page navigation"""
+        """Open the item's media tab by URL, using the node id from the item page's shortlink"""
         try:
-            # Use the admin toolbar for consistent access
-            admin_menu = self.wait.until(EC.presence_of_element_located(
-                (By.CSS_SELECTOR, "div.toolbar-tab a[href='/admin']")
-            ))
-            self.driver.execute_script("arguments[0].click();", admin_menu)
-
-            media_link = self.wait.until(EC.element_to_be_clickable(
-                (By.XPATH, "//a[contains(@href, '/media') and contains(text(), 'Media')]")
-            ))
-            media_url = media_link.get_attribute("href")
-            media_link.click()
+            links = self.driver.find_elements(By.CSS_SELECTOR, "link[rel='shortlink']")
+            match = re.search(r'/node/(\d+)', links[0].get_attribute("href") or '') if links else None
+            if not match:
+                raise RuntimeError(f"Could not find node id on {self.driver.current_url}")
 
+            media_url = f"{self.base_url}/node/{match.group(1)}/media"
+            self._get(media_url)
             self.wait.until(EC.url_contains("/media"))
-            return self.driver.current_url
+            return media_url
 
         except Exception as e:
             self._take_screenshot("media_access_error")
             raise RuntimeError(f"Failed to access media page: {str(e)}")
 
-    def _check_file_exists(self, media_type, media_url):
-        """Check for existing files without page reload"""
-        try:
-            self.driver.get(media_url)
-            type_mapping = {
-                "Document": "document",
-                "Extracted Text": "extracted-text"
-            }
-            path_segment = type_mapping[media_type]
+    def _scan_media(self, media_url, reload=False):
+        """Map media path segment to the first matching URL on the media page, in one pass"""
+        if reload or self.driver.current_url.rstrip('/') != media_url.rstrip('/'):
+            self._get(media_url)
 
-            return bool(self.driver.find_elements(
-                By.XPATH, f"//a[contains(@href, '/media/{path_segment}/')]"
-            ))
-        except Exception:
-            return False
+        # One script call instead of a WebDriver round-trip per link
+        hrefs = self.driver.execute_script(
+            "return Array.from(document.querySelectorAll(\"a[href*='/media/']\"), a => a.href);"
+        )
+        found = {}
+        for href in hrefs or []:
+            for segment in self.MEDIA_SEGMENTS.values():
+                if f'/media/{segment}/' in href and segment not in found:
+                    found[segment] = href
+                    print(f"  ✅ Found {segment} media: {href}")
+        return found
 
 
     def close(self):
+        for line in self.pages.summary():
+            print(f"🕑 {line}")
+        self.screenshots.close()
         self.driver.quit()
         print("🛑 Browser closed")
 
 
 
-def process_uploads():
+def create_uploader(backend="browser", headless=False, identifiers=None, lean=None):
+    """Uploader for the selected backend; both expose login, upload_transcript and close"""
+    if backend == "http":
+        return HttpDigitalLibraryUploader(identifiers=identifiers)
+    return DigitalLibraryUploader(headless=headless, identifiers=identifiers, lean=lean)
+
+
+def process_uploads(workers=1, backend="browser", lean=None, shard=None):
     """
-    Optimized batch processor with robust error handling and logging
+    Optimized batch processor with robust error handling and logging.
+    With workers > 1, items are spread over that many uploader processes.
     """
     # Configure logging
     required_files = [
@@ -475,46 +570,75 @@ def process_uploads():
         format='%(asctime)s - %(levelname)s: %(message)s',
         filename='../docs/upload_log.txt'
     )
-    uploader = DigitalLibraryUploader(headless=False)
     config = configparser.ConfigParser()
     config.read('../docs/config.ini')
     account = config['Credentials']['account']
     password = config['Credentials']['password']
+    settings = tracker_config(config)
+    scheduler = RetryScheduler.from_config(config)
+
+    if workers > 1:
+        # Imported here because upload_workers imports this module
+        from upload_workers import run_upload_pool
+
+        progress = ProgressTracker(settings)
+        try:
+            run_upload_pool(progress, workers, account, password, scheduler=scheduler, backend=backend, lean=lean,
+                            shard=shard)
+            progress.generate_report()
+        except Exception as e:
+            logging.critical(f"Unexpected error during file_uploader: {str(e)}")
+            raise
+        finally:
+            progress.close()
+            print("🏁 Processing complete")
+        return
+
+    identifiers = get_registry("../docs/uuid_mapping.csv")
+    print(f"ℹ️ Loaded {len(identifiers)} UUID mappings")
+    uploader = create_uploader(backend, headless=False, identifiers=identifiers, lean=lean)
+    progress = None
     try:
         uploader.login(account, password)
 
-        # Configuration
-        config = {
-            'base_dir': Path("../"),
-            'source_pdf': "files/file_uploader/input/pdf",
-            'source_txt': "files/file_uploader/input/txt",
-            'processed_dir': "files/file_uploader/output",
-            'max_retries': 3
-        }
-
         # Initialize progress tracker
-        progress = ProgressTracker(config)
-
-        # Flag to track if any files were processed
-        batches = list(progress.get_upload_batches(chunk_size=10))
-        # Get batch of files to process
-        for batch in batches:
-            print(f"🚀 Processing batch of {len(batch)} files")
-
-            for (base_name, pdf_path, txt_path) in batch:
-                print(base_name, pdf_path, txt_path)
-                for attempt in range(config['max_retries']):
-                    try:
-                        uploader.upload_transcript(base_name, pdf_path, txt_path)
-                        progress.mark_completed(base_name, pdf_path, txt_path)
-                        break
-                    except Exception as retry_error:
-                        logging.warning(f"Attempt {attempt+1} failed for {base_name}: {str(retry_error)}")
-
-                        if attempt == config['max_retries'] - 1:
-                            progress.mark_failed(base_name, str(retry_error))
-                            logging.error(f"Final attempt failed for {base_name}: {str(retry_error)}")
+        progress = ProgressTracker(settings)
+
+        # Items arrive while the input directory is still being read; retries whose
+        # backoff has passed go first, and the run waits only when nothing else is left
+        pending = (item for batch in progress.get_upload_batches(chunk_size=10, shard=shard) for item in batch)
+        total, exhausted = 0, False
+        while True:
+            item = scheduler.pop_due()
+            if item is None and not exhausted:
+                item = next(pending, None)
+                if item is None:
+                    exhausted = True
+                else:
+                    total += 1
+            if item is None:
+                wait = scheduler.next_due_in()
+                if wait is None:
+                    break
+                print(f"⏳ Waiting {wait:.0f}s to retry {len(scheduler)} items")
+                time.sleep(wait)
+                continue
 
+            base_name, pdf_path, txt_path = item
+            try:
+                # Checkpoints go straight to the store, and a retry resumes where the last attempt stopped
+                uploader.upload_transcript(
+                    base_name, pdf_path, txt_path, resume=progress.checkpoints(base_name),
+                    checkpoint=lambda stage, **values: progress.checkpoint(base_name, stage, **values)
+                )
+            except Exception as e:
+                record_failure(progress, scheduler, item, e)
+            else:
+                scheduler.succeeded(item)
+                progress.mark_completed(base_name, pdf_path, txt_path)
+            progress.report_progress(total, more=not exhausted)
+
+        progress.report_summary()
         progress.generate_report()
 
     except Exception as e:
@@ -522,104 +646,187 @@ def process_uploads():
         raise
 
     finally:
+        # Also on errors, so other hosts can pick up the items this run had claimed
+        if progress is not None:
+            progress.close()
         uploader.close()
         print("🏁 Processing complete")
 
+def tracker_config(config):
+    """ProgressTracker settings for the repository layout and the [Progress] section of config.ini"""
+    return {
+        'base_dir': Path("../"),
+        'source_pdf': "files/file_uploader/input/pdf",
+        'source_txt': "files/file_uploader/input/txt",
+        'processed_dir': "files/file_uploader/output",
+        'shared_store': config.getboolean('Progress', 'shared', fallback=False),
+        'lease_ttl': config.getint('Progress', 'lease_ttl', fallback=300),
+        'export_interval': config.getfloat('Progress', 'csv_export_interval', fallback=60),
+        'timings': config.get('Progress', 'timings', fallback="../docs/upload_timings.jsonl"),
+    }
+
+
+def record_failure(progress, scheduler, item, error):
+    """Record a failed attempt and hand transient failures back to the scheduler; True when it will be retried"""
+    base_name = item[0]
+    delay = scheduler.failed(item, error)
+    progress.mark_failed(base_name, str(error), retry_in=delay)
+    if delay is None:
+        logging.error(f"Final attempt failed for {base_name} ({classify_failure(error)}): {str(error)}")
+        return False
+    logging.warning(f"Attempt {scheduler.attempts[base_name]} failed for {base_name}, "
+                    f"retrying in {delay:.0f}s: {str(error)}")
+    return True
+
+
+def record_abandoned(progress, items, reason):
+    """Record items no uploader is left to attempt as failed for good; returns how many there were"""
+    for item in items:
+        logging.error(f"Abandoned {item[0]}: {reason}")
+        progress.mark_failed(item[0], reason)
+    return len(items)
+
+
+def in_shard(base_name, k, n):
+    """Stable assignment of an identifier to shard k of n (1-based), the same on every host"""
+    return zlib.crc32(base_name.encode('utf-8')) % n == k - 1
+
+
+def parse_shard(value):
+    """'K/N' -> (K, N)"""
+    try:
+        k, n = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected K/N, got {value!r}")
+    if not 1 <= k <= n:
+        raise argparse.ArgumentTypeError(f"shard {k} is not between 1 and {n}")
+    return k, n
+
+
 class ProgressTracker:
-    """Enhanced progress tracking with batch processing"""
+    """
+    Enhanced progress tracking with batch processing.
+    Items are leased in the progress store as they are discovered, so several hosts can
+    work from one input share and one store without uploading the same identifier twice.
+    """
     def __init__(self, config):
         self.config = config
         self.progress_file = self.config['base_dir'] / "docs/upload_progress.csv"
+        self.timings_file = Path(self.config.get('timings') or self.config['base_dir'] / "docs/upload_timings.jsonl")
+        self.run_started = time.time()  # The report covers stage timings of this run only
+        self._run_clock = time.monotonic()
+        self.completed_count = self.failed_count = 0  # Items finished this run
         self._init_storage()
 
     def _init_storage(self):
         """Initialize file structure and progress tracking"""
-        # Create processed directories
+        # Progress lives in SQLite; the CSV is kept as an export for other tools
+        self.store = ProgressStore(self.progress_file, export_interval=self.config.get('export_interval', 60),
+                                   shared=self.config.get('shared_store', False))
         self.validate_csv_structure()
 
-        (self.config['base_dir'] / self.config['processed_dir']).mkdir(parents=True, exist_ok=True)
+        # Work claims: held by hostname:pid, renewed by a heartbeat thread, expired when a host dies
+        self.owner = lease_owner()
+        self.lease_ttl = self.config.get('lease_ttl', 300)
+        self._heartbeat = None
+        stale = self.store.release_dead_local_owners()
+        if stale:
+            print(f"🔓 Released leases of {stale} stopped processes on this host")
 
-        # Initialize CSV with proper columns
-        required_columns = [
-            'BaseIdentifier', 'PDF', 'TXT', 'Metadata',
-            'Timestamp', 'Attempts', 'LastError'
-        ]
+        # Create processed directories
+        (self.config['base_dir'] / self.config['processed_dir']).mkdir(parents=True, exist_ok=True)
 
         if not self.progress_file.exists():
-            pd.DataFrame(columns=required_columns).to_csv(self.progress_file, index=False)
-        else:
-            # Ensure existing CSV has all required columns
-            df = pd.read_csv(self.progress_file)
-            for col in required_columns:
-                if col not in df.columns:
-                    df[col] = pd.NA
-            df.to_csv(self.progress_file, index=False)
-
-    def get_upload_batches(self, chunk_size=10):
-        """Yields batches of files needing processing"""
+            self.store.export_csv()
+
+    def get_upload_batches(self, chunk_size=10, shard=None):
+        """
+        Yields batches of files needing processing, as the PDF directory is read.
+        shard=(k, n) keeps only the items whose identifier hashes to shard k of n (1-based),
+        so several hosts can split one input tree.
+        """
         # Resolve full source paths
         source_pdf_dir = self.config['base_dir'] / self.config['source_pdf']
         source_txt_dir = self.config['base_dir'] / self.config['source_txt']
 
-
-        # Get all PDF files with case-insensitive search
-        pdf_files = list(source_pdf_dir.glob("*.pdf"))
+        # One listing of the TXT directory instead of an exists() call per PDF
+        with os.scandir(source_txt_dir) as entries:
+            txt_names = {entry.name for entry in entries if entry.name.endswith('.txt')}
 
         # Load progress data
-        try:
-            df = pd.read_csv(self.progress_file) if self.progress_file.exists() else pd.DataFrame()
-        except pd.errors.EmptyDataError:
-            df = pd.DataFrame()
-
         current_batch = []
-        completed_files = set(df[df['Metadata'] == 'Yes']['BaseIdentifier'])
+        completed_files = self.store.completed_identifiers()
+        skipped = leased = yielded = 0
 
-        for pdf_path in pdf_files:
-            base_name = self._clean_base_name(pdf_path.stem)
+        with os.scandir(source_pdf_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.pdf') or not entry.is_file():
+                    continue
+                base_name = self._clean_base_name(entry.name[:-len('.pdf')])
 
-            # Skip completely if already completed
-            if base_name in completed_files:
-                print(f"⏩ Skipping completed file: {base_name}")
-                continue
+                if shard and not in_shard(base_name, *shard):
+                    continue
 
-            txt_filename = f"{base_name}_transcript.txt"
-            txt_path = source_txt_dir / txt_filename
+                # Skip completely if already completed
+                if base_name in completed_files:
+                    skipped += 1
+                    continue
 
-            # Skip if TXT file doesn't exist
-            if not txt_path.exists():
-                print(f"❌ TXT file not found for {base_name}: {txt_path}")
-                continue
+                txt_filename = f"{base_name}_transcript.txt"
+
+                # Skip if TXT file doesn't exist
+                if txt_filename not in txt_names:
+                    print(f"❌ TXT file not found for {base_name}: {source_txt_dir / txt_filename}")
+                    continue
+
+                # Another host is working on it, or finished it since the run started
+                if not self.claim(base_name):
+                    leased += 1
+                    continue
 
-            current_batch.append((base_name, pdf_path, txt_path))
+                current_batch.append((base_name, Path(entry.path), source_txt_dir / txt_filename))
 
-            if len(current_batch) >= chunk_size:
-                yield current_batch
-                current_batch = []
+                if len(current_batch) >= chunk_size:
+                    yielded += len(current_batch)
+                    yield current_batch
+                    current_batch = []
 
         if current_batch:  # Yield remaining files
+            yielded += len(current_batch)
             yield current_batch
 
+        if skipped:
+            print(f"⏩ Skipped {skipped} completed files")
+        if leased:
+            print(f"⏩ Skipped {leased} files claimed by other hosts")
         # If no files to process, print a message
-        if not pdf_files or len(pdf_files) == len(completed_files):
+        if not yielded:
             print("✅ All files have been processed.")
 
-    def _clean_base_name(self, stem):
-        """Normalize base filename"""
-        return stem.replace('_transcript', '').replace('_TRANSCRIPT', '').strip()
+    def claim(self, base_name):
+        """Lease an item for this process; False when it is completed or leased by another host"""
+        if not self.store.claim(base_name, self.owner, self.lease_ttl):
+            return False
+        if self._heartbeat is None:
+            self._heartbeat = LeaseHeartbeat(self.store.db_path, self.owner, self.lease_ttl)
+            self._heartbeat.start()
+        return True
 
-    def _get_file_status(self, df, base_name):
-        """Get processing status from dataframe"""
-        if df.empty:
-            return 'new'
+    def checkpoints(self, base_name):
+        """Upload stages recorded for an item by earlier attempts, for upload_transcript(resume=...)"""
+        return self.store.checkpoints(base_name)
 
-        record = df[df['BaseIdentifier'] == base_name]
-        if record.empty:
-            return 'new'
+    def checkpoint(self, base_name, stage, **values):
+        """Record one finished upload stage ('pdf', 'txt', 'urls' or 'metadata') and any media URLs"""
+        try:
+            self.store.checkpoint(base_name, stage, **values)
+        except Exception as e:
+            print(f"❌ Failed to checkpoint {stage} for {base_name}: {str(e)}")
 
-        if record['Metadata'].values[0] == 'Yes':
-            return 'completed'
+    def _clean_base_name(self, stem):
+        """Normalize base filename"""
+        return stem.replace('_transcript', '').replace('_TRANSCRIPT', '').strip()
 
-        return 'failed'
     def mark_completed(self, base_name, pdf_path, txt_path):
         """Update progress for successful file_uploader"""
         try:
@@ -635,61 +842,50 @@ class ProgressTracker:
             pdf_path.rename(pdf_dest)
             txt_path.rename(txt_dest)
 
-            # Update CSV
-            timestamp = datetime.now().isoformat()
-            new_data = {
-                'BaseIdentifier': base_name,
-                'PDF': 'Yes',
-                'TXT': 'Yes',
-                'Metadata': 'Yes',
-                'Timestamp': timestamp,
-                'Attempts': 1,
-                'LastError': ''
-            }
-
-            # Read or create DF
-            if self.progress_file.exists():
-                df = pd.read_csv(self.progress_file)
-            else:
-                df = pd.DataFrame(columns=new_data.keys())
-                print("DF creation error")
-            # Remove existing entry if present
-            df = df[df['BaseIdentifier'] != base_name]
-
-            # Add new entry
-            df = pd.concat([df, pd.DataFrame([new_data])], ignore_index=True)
-            df.to_csv(self.progress_file, index=False)
+            # Single upsert instead of rewriting the whole CSV
+            self.store.mark_completed(base_name)
+            self.completed_count += 1
 
             print(f"✅ Marked {base_name} as completed")
             return True
         except Exception as e:
             print(f"❌ Failed to mark {base_name} as completed: {str(e)}")
-            if 'BaseIdentifier' in str(e):
-                print("⚠️ Check CSV column headers match: BaseIdentifier, PDF, TXT, Metadata, Timestamp, Attempts, LastError")
+        finally:
+            self.store.release(base_name, self.owner)
+
+    def report_progress(self, total, more=False):
+        """Progress line after an item's attempt; more means discovery is still finding items"""
+        done = self.completed_count + self.failed_count
+        elapsed = time.monotonic() - self._run_clock
+        rate = done / elapsed * 60 if elapsed > 0 else 0
+        print(f"📈 {done}/{total}{'+' if more else ''} done, {rate:.1f} items/min")
+
+    def report_summary(self, workers=1):
+        """Print and log the items finished this run and the rate"""
+        elapsed = time.monotonic() - self._run_clock
+        done = self.completed_count + self.failed_count
+        rate = done / elapsed * 60 if elapsed > 0 else 0
+        summary = (f"{self.completed_count} completed, {self.failed_count} failed with {workers} "
+                   f"{'worker' if workers == 1 else 'workers'} in {elapsed:.0f}s ({rate:.1f} items/min)")
+        print(f"🏁 {summary}")
+        logging.info(summary)
 
     def validate_csv_structure(self):
-        """Ensure CSV has correct columns"""
-        required_columns = [
-            'BaseIdentifier', 'PDF', 'TXT', 'Metadata',
-            'Timestamp', 'Attempts', 'LastError'
-        ]
+        """Ensure the progress store and its CSV export have the correct columns"""
+        self.store._create_schema()
 
         if self.progress_file.exists():
-            df = pd.read_csv(self.progress_file)
-            if not all(col in df.columns for col in required_columns):
+            with open(self.progress_file, 'r', newline='') as csvfile:
+                header = next(csv.reader(csvfile), [])
+            if header != ProgressStore.COLUMNS:
                 print("⚠️ Fixing CSV structure...")
-                for col in required_columns:
-                    if col not in df.columns:
-                        df[col] = pd.NA
-                df.to_csv(self.progress_file, index=False)
+                self.store.export_csv()
+
     def generate_report(self):
         """Generate summary report of file_uploader operations"""
         try:
-            if not self.progress_file.exists():
-                print("ℹ️ No progress data available for reporting")
-                return
-
-            df = pd.read_csv(self.progress_file)
+            df = pd.DataFrame(self.store.rows(), columns=ProgressStore.COLUMNS)
+            self.store.export_csv()
             if df.empty:
                 print("📊 Report: No files processed yet")
                 return
@@ -717,11 +913,16 @@ class ProgressTracker:
                     report.append(
                         f"- {row['BaseIdentifier']}: "
                         f"Attempts {row['Attempts']}, "
+                        f"PDF {row['PdfMedia'] or 'No'}, TXT {row['TxtMedia'] or 'No'}, "
+                        f"URLs {'Yes' if row['PdfUrl'] and row['TxtUrl'] else 'No'}, "
                         f"Last error: {row['LastError']}"
                     )
             else:
                 report.append("None")
 
+            # Where the time went, from the uploaders' stage spans
+            report.extend(timing_report(read_timings(self.timings_file, since=self.run_started)))
+
             # Print to console
             print("\n".join(report))
 
@@ -734,34 +935,45 @@ class ProgressTracker:
         except Exception as e:
             print(f"❌ Failed to generate report: {str(e)}")
 
-    def mark_failed(self, base_name, error_message=""):
-        """Update progress for failed file_uploader"""
+    def mark_failed(self, base_name, error_message="", retry_in=None):
+        """
+        Update progress for failed file_uploader. With retry_in (seconds) the attempt is
+        recorded but the item stays leased to this process until its retry.
+        """
         try:
-            df = pd.read_csv(self.progress_file) if self.progress_file.exists() else pd.DataFrame()
-
-            # Update existing record or create new
-            if base_name in df['BaseIdentifier'].values:
-                df.loc[df['BaseIdentifier'] == base_name, 'Attempts'] += 1
-                df.loc[df['BaseIdentifier'] == base_name, 'LastError'] = str(error_message)[:500]  # Truncate long errors
+            self.store.mark_failed(base_name, error_message)
+            if retry_in is None:
+                self.failed_count += 1
+                print(f"⚠️ Marked {base_name} as failed")
             else:
-                new_entry = pd.DataFrame([{
-                    'BaseIdentifier': base_name,
-                    'PDF': 'No',
-                    'TXT': 'No',
-                    'Metadata': 'No',
-                    'Timestamp': datetime.now().isoformat(),
-                    'Attempts': 1,
-                    'LastError': str(error_message)[:500]
-                }])
-                df = pd.concat([df, new_entry], ignore_index=True)
-
-            df.to_csv(self.progress_file, index=False)
-            print(f"⚠️ Marked {base_name} as failed")
+                print(f"🔁 {base_name} failed, retrying in {retry_in:.0f}s")
 
         except Exception as e:
             print(f"❌ Failed to record failure for {base_name}: {str(e)}")
+        finally:
+            if retry_in is None:
+                self.store.release(base_name, self.owner)
+
+    def close(self):
+        """Give up remaining leases, flush the CSV export and close the progress store"""
+        if self._heartbeat is not None:
+            self._heartbeat.stop()
+            self._heartbeat = None
+        self.store.release_all(self.owner)
+        self.store.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upload transcripts to the digital library")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of parallel browser sessions")
+    parser.add_argument("--backend", choices=["browser", "http"], default="browser",
+                        help="drive the site with Selenium or submit its forms over HTTP")
+    parser.add_argument("--lean", action="store_true", default=None,
+                        help="block images, fonts, stylesheets and analytics while driving Chrome")
+    parser.add_argument("--shard", type=parse_shard, default=None, metavar="K/N",
+                        help="only upload shard K of N (by identifier hash), for splitting one input tree across hosts")
+    args = parser.parse_args()
+
     print("=== STARTING UPLOAD PROCESS ===")
-    process_uploads()
+    process_uploads(workers=args.workers, backend=args.backend, lean=args.lean, shard=args.shard)
     print("=== PROCESS COMPLETED ===")
\ No newline at end of file
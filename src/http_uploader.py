@@ -0,0 +1,484 @@
+from urllib.parse import urlsplit, urljoin, urlencode
+from identifier_registry import get_registry
+from stage_timing import StageTimer
+from http.cookies import SimpleCookie
+from html.parser import HTMLParser
+from pathlib import Path
+import http.client
+import configparser
+import mimetypes
+import uuid
+import re
+
+
+class HttpResponse:
+    def __init__(self, status, url, headers, content):
+        self.status = status
+        self.url = url
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+
+class HttpSession:
+    """Cookie-aware HTTP client that keeps one persistent connection per host"""
+
+    IDEMPOTENT = ('GET', 'HEAD')  # Safe to resend after the connection drops mid-response
+
+    def __init__(self, timeout=30, max_redirects=10):
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.cookies = {}
+        self._connections = {}
+
+    def _connection(self, scheme, netloc):
+        key = (scheme, netloc)
+        if key not in self._connections:
+            connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            self._connections[key] = connection_class(netloc, timeout=self.timeout)
+        return self._connections[key]
+
+    def _store_cookies(self, headers):
+        for header in headers.get_all('Set-Cookie') or []:
+            cookie = SimpleCookie()
+            cookie.load(header)
+            for name, morsel in cookie.items():
+                if morsel.value in ('', 'deleted') or morsel['max-age'] == '0':
+                    self.cookies.pop(name, None)
+                else:
+                    self.cookies[name] = morsel.value
+
+    def _send(self, method, url, body, headers):
+        parts = urlsplit(url)
+        path = (parts.path or '/') + (f"?{parts.query}" if parts.query else '')
+        headers = dict(headers)
+        headers.setdefault('User-Agent', 'DST-Automation')
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f"{k}={v}" for k, v in self.cookies.items())
+
+        for attempt in range(2):
+            connection = self._connection(parts.scheme, parts.netloc)
+            sent = False
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                sent = True
+                response = connection.getresponse()
+                return response, response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # Server closed an idle keep-alive connection; reconnect once. A POST the server
+                # may have received is not resent: it could create a second media entity, so the
+                # caller's scan and the retry scheduler deal with it instead
+                connection.close()
+                self._connections.pop((parts.scheme, parts.netloc), None)
+                if attempt == 1 or (sent and method not in self.IDEMPOTENT):
+                    raise
+
+    def request(self, method, url, body=None, headers=None):
+        headers = headers or {}
+        for _ in range(self.max_redirects + 1):
+            response, content = self._send(method, url, body, headers)
+            self._store_cookies(response.headers)
+
+            location = response.headers.get('Location')
+            if response.status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                if response.status in (301, 302, 303):
+                    method, body = 'GET', None
+                    headers = {k: v for k, v in headers.items() if k.lower() != 'content-type'}
+                continue
+
+            return HttpResponse(response.status, url, response.headers, content)
+
+        raise RuntimeError(f"Too many redirects for {url}")
+
+    def get(self, url):
+        return self.request('GET', url)
+
+    def post(self, url, fields, files=None):
+        """POST form fields, as multipart/form-data when files are attached"""
+        if files:
+            body, content_type = encode_multipart(fields, files)
+        else:
+            body = urlencode(fields).encode('utf-8')
+            content_type = 'application/x-www-form-urlencoded'
+        return self.request('POST', url, body=body, headers={'Content-Type': content_type})
+
+    def close(self):
+        for connection in self._connections.values():
+            connection.close()
+        self._connections.clear()
+
+
+def encode_multipart(fields, files):
+    """Build a multipart/form-data body from (name, value) fields and (name, path) files"""
+    boundary = f"----DSTAutomation{uuid.uuid4().hex}"
+    chunks = []
+    for name, value in fields:
+        chunks.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode('utf-8')
+        )
+    for name, file_path in files:
+        file_path = Path(file_path)
+        content_type = mimetypes.guess_type(file_path.name)[0] or 'application/octet-stream'
+        chunks.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{file_path.name}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode('utf-8')
+        )
+        chunks.append(file_path.read_bytes())
+        chunks.append(b'\r\n')
+    chunks.append(f'--{boundary}--\r\n'.encode('utf-8'))
+    return b''.join(chunks), f'multipart/form-data; boundary={boundary}'
+
+
+class HtmlForm:
+    def __init__(self, attrs):
+        self.id = attrs.get('id', '')
+        self.action = attrs.get('action', '')
+        self.method = attrs.get('method', 'get').lower()
+        self.fields = []
+        self.submits = []
+        self.file_inputs = []
+        self.ids = {}
+
+    def get(self, name):
+        for field_name, value in self.fields:
+            if field_name == name:
+                return value
+        return None
+
+    def set(self, name, value):
+        for i, (field_name, _) in enumerate(self.fields):
+            if field_name == name:
+                self.fields[i] = (name, value)
+                return
+        self.fields.append((name, value))
+
+    def has_field(self, name):
+        return any(field_name == name for field_name, _ in self.fields)
+
+    def submit_value(self, name):
+        """(name, value) pair of the submit button with this name or id"""
+        for submit in self.submits:
+            if name in (submit['name'], submit['id']):
+                return submit['name'], submit['value']
+        return None
+
+
+class PageParser(HTMLParser):
+    """Collects forms, links, RDFa properties and Drupal error messages from a page"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.forms = []
+        self.links = []
+        self.properties = {}
+        self.errors = []
+        self.shortlink = None
+        self._form = None
+        self._textarea = None
+        self._select = None
+        self._captures = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {k: (v if v is not None else '') for k, v in attrs}
+
+        for capture in self._captures:
+            if capture['tag'] == tag:
+                capture['depth'] += 1
+
+        if tag == 'link' and attrs.get('rel') == 'shortlink':
+            self.shortlink = attrs.get('href')
+        elif tag == 'a' and 'href' in attrs:
+            link = {'href': attrs['href'], 'text': '', 'attrs': attrs}
+            self.links.append(link)
+            self._capture(tag, link)
+        elif tag == 'form':
+            self._form = HtmlForm(attrs)
+            self.forms.append(self._form)
+        elif tag in ('input', 'button') and self._form is not None:
+            self._add_input(tag, attrs)
+        elif tag == 'textarea' and self._form is not None:
+            self._textarea = {'name': attrs.get('name'), 'text': ''}
+            self._capture(tag, self._textarea)
+        elif tag == 'select' and self._form is not None:
+            self._select = {'name': attrs.get('name'), 'value': None, 'first': None}
+        elif tag == 'option' and self._select is not None:
+            value = attrs.get('value', '')
+            if self._select['first'] is None:
+                self._select['first'] = value
+            if 'selected' in attrs:
+                self._select['value'] = value
+
+        if 'property' in attrs and tag not in ('meta', 'link'):
+            record = {'text': ''}
+            self.properties.setdefault(attrs['property'], record)
+            self._capture(tag, record)
+        if 'messages--error' in attrs.get('class', ''):
+            record = {'text': ''}
+            self.errors.append(record)
+            self._capture(tag, record)
+
+    def _capture(self, tag, record):
+        self._captures.append({'tag': tag, 'depth': 1, 'record': record})
+
+    def _add_input(self, tag, attrs):
+        name = attrs.get('name')
+        input_type = attrs.get('type', 'submit' if tag == 'button' else 'text').lower()
+        if attrs.get('id') and name:
+            self._form.ids[attrs['id']] = name
+        if input_type in ('submit', 'image'):
+            self._form.submits.append({
+                'name': name or '', 'value': attrs.get('value', ''), 'id': attrs.get('id', '')
+            })
+        elif input_type == 'file':
+            self._form.file_inputs.append(name)
+        elif input_type in ('checkbox', 'radio'):
+            if 'checked' in attrs and name:
+                self._form.fields.append((name, attrs.get('value', 'on')))
+        elif input_type not in ('button', 'reset') and name:
+            self._form.fields.append((name, attrs.get('value', '')))
+
+    def handle_endtag(self, tag):
+        if tag == 'form':
+            self._form = None
+        elif tag == 'textarea' and self._textarea is not None and self._form is not None:
+            if self._textarea['name']:
+                self._form.fields.append((self._textarea['name'], self._textarea['text']))
+            self._textarea = None
+        elif tag == 'select' and self._select is not None and self._form is not None:
+            value = self._select['value'] if self._select['value'] is not None else self._select['first']
+            if self._select['name'] and value is not None:
+                self._form.fields.append((self._select['name'], value))
+            self._select = None
+
+        for capture in list(self._captures):
+            if capture['tag'] == tag:
+                capture['depth'] -= 1
+                if capture['depth'] == 0:
+                    self._captures.remove(capture)
+
+    def handle_data(self, data):
+        for capture in self._captures:
+            capture['record']['text'] += data
+
+
+def parse_page(html):
+    parser = PageParser()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+class HttpDigitalLibraryUploader:
+    """Uploads transcripts by submitting the Drupal forms directly over HTTP"""
+
+    MEDIA_SEGMENTS = {
+        "Document": "document",
+        "Extracted Text": "extracted-text"
+    }
+
+    def __init__(self, identifiers=None, base_url=None, config_path='../docs/config.ini'):
+        config = configparser.ConfigParser()
+        config.read(config_path)
+        self.base_url = (base_url or config['Credentials']['base_url']).rstrip('/')
+        self.collection_href = config['Credentials']['collection_href']
+        if identifiers is None:
+            identifiers = get_registry("../docs/uuid_mapping.csv")
+        self.identifiers = identifiers
+        self.session = HttpSession()
+        self.page_loads = 0  # Requests for the current item
+        self.timer = StageTimer(config.get('Progress', 'timings', fallback="../docs/upload_timings.jsonl"),
+                                page_count=lambda: self.page_loads)
+
+    def _url(self, path):
+        return urljoin(self.base_url + '/', path)
+
+    def _extract_base_identifier(self, filename):
+        match = re.search(r'(mvp_[\d\.]+_\d+)', filename)
+        if not match:
+            raise ValueError(f"Invalid filename format: {filename}")
+        return match.group(1)
+
+    def _get_page(self, url):
+        self.page_loads += 1
+        response = self.session.get(url)
+        if response.status >= 400:
+            raise RuntimeError(f"GET {url} returned HTTP {response.status}")
+        return response, parse_page(response.text)
+
+    def _submit(self, form, page_url, fields, files=None):
+        action = urljoin(page_url, form.action) if form.action else page_url
+        self.page_loads += 1
+        response = self.session.post(action, fields, files)
+        page = parse_page(response.text)
+        errors = [e['text'].strip() for e in page.errors]
+        if response.status >= 400:
+            raise RuntimeError(f"POST {action} returned HTTP {response.status}")
+        return response, page, errors
+
+    def login(self, username, password):
+        print("🔑 Logging in over HTTP...")
+        login_url = self._url("/user/login")
+        _, page = self._get_page(login_url)
+        form = next((f for f in page.forms if f.has_field('name') or 'login' in f.id), None)
+        if form is None:
+            raise RuntimeError("Login failed: login form not found")
+
+        form.set('name', username)
+        form.set('pass', password)
+        fields = form.fields + [form.submit_value('op') or ('op', 'Log in')]
+        response, _, _ = self._submit(form, login_url, fields)
+        if "check_logged_in=1" not in response.url:
+            raise RuntimeError("Login failed: please make sure your username and password in config.ini are correct.")
+        print("✅ Login successful")
+
+    def _media_url(self, base_id):
+        """Resolve the item's /node/N/media URL from its shortlink"""
+        try:
+            item_uuid = self.identifiers.uuid_for(base_id)
+        except KeyError:
+            raise RuntimeError(f"No UUID mapping found for {base_id}")
+
+        item_url = f"{self.base_url}{self.collection_href}{item_uuid}"
+        _, page = self._get_page(item_url)
+        match = re.search(r'/node/(\d+)', page.shortlink or '')
+        if not match:
+            raise RuntimeError(f"Could not find node id on {item_url}")
+        return self._url(f"/node/{match.group(1)}/media")
+
+    def _scan_media(self, media_url):
+        """Map media path segment to the first matching URL on the media page"""
+        _, page = self._get_page(media_url)
+        found = {}
+        for link in page.links:
+            href = urljoin(media_url, link['href'])
+            for segment in self.MEDIA_SEGMENTS.values():
+                if f'/media/{segment}/' in href and segment not in found:
+                    found[segment] = href
+        return found
+
+    def _upload_media_file(self, file_path, media_type, media_url, max_attempts=3):
+        """Create one media entity through the media add form"""
+        _, chooser = self._get_page(f"{media_url}/add")
+        link = next((l for l in chooser.links if media_type in l['text']), None)
+        if link is None:
+            raise RuntimeError(f"Media type {media_type} not offered on {media_url}/add")
+        form_url = urljoin(media_url, link['href'])
+
+        for attempt in range(max_attempts):
+            _, page = self._get_page(form_url)
+            form = next((f for f in page.forms if f.file_inputs), None)
+            if form is None:
+                raise RuntimeError(f"No file field on {form_url}")
+
+            if form.has_field('name[0][value]') and not form.get('name[0][value]'):
+                form.set('name[0][value]', Path(file_path).name)
+            fields = form.fields + [form.submit_value('edit-submit') or ('op', 'Save')]
+            files = [(form.file_inputs[0], file_path)]
+            response, _, errors = self._submit(form, form_url, fields, files)
+
+            if any('File already locked for writing' in e for e in errors):
+                print(f"⚠️ File lock error on attempt {attempt + 1}, retrying...")
+                self.timer.retry()
+                continue
+            if errors:
+                raise RuntimeError(f"Media save failed: {'; '.join(errors)}")
+            if "/media" not in urlsplit(response.url).path:
+                raise RuntimeError(f"Unexpected page after media save: {response.url}")
+            print(f"✅ {media_type} media saved")
+            return
+
+        raise RuntimeError(f"File stayed locked after {max_attempts} attempts")
+
+    def _update_metadata(self, media_url, pdf_url, txt_url):
+        """Fill both transcript URL rows in the node edit form and save once"""
+        edit_url = media_url[:-len("/media")] + "/edit"
+        _, page = self._get_page(edit_url)
+        form = next((f for f in page.forms if f.has_field('field_transcript_file_s[0][uri]')), None)
+        if form is None:
+            raise RuntimeError(f"Transcript fields not found on {edit_url}")
+
+        wanted = [(pdf_url, "PDF Transcript"), (txt_url, "TXT Transcript")]
+        if all(form.get(f'field_transcript_file_s[{i}][uri]') == url and
+               form.get(f'field_transcript_file_s[{i}][title]') == title
+               for i, (url, title) in enumerate(wanted)):
+            print("⏩ Transcript URLs already set, skipping edit")
+            return
+
+        if not form.has_field('field_transcript_file_s[1][uri]'):
+            add_more = form.submit_value('field_transcript_file_s_add_more')
+            if add_more is None:
+                raise RuntimeError("Could not add a second transcript field")
+            _, page, errors = self._submit(form, edit_url, form.fields + [add_more])
+            form = next((f for f in page.forms if f.has_field('field_transcript_file_s[1][uri]')), None)
+            if form is None:
+                raise RuntimeError(f"Failed to add new URL field set: {'; '.join(errors)}")
+
+        for index, (url, title) in enumerate(wanted):
+            form.set(f'field_transcript_file_s[{index}][uri]', url)
+            form.set(f'field_transcript_file_s[{index}][title]', title)
+
+        fields = form.fields + [form.submit_value('edit-submit') or ('op', 'Save')]
+        response, _, errors = self._submit(form, edit_url, fields)
+        if errors or response.url.rstrip('/').endswith('/edit'):
+            raise RuntimeError(f"Metadata update failed: {'; '.join(errors) or response.url}")
+        print("✅ Metadata updated successfully")
+
+    def upload_transcript(self, identifier, pdf_path, txt_path, resume=None, checkpoint=None):
+        """Same interface as DigitalLibraryUploader.upload_transcript"""
+        self.page_loads = 0
+        self.timer.start_item(identifier)
+        timer = self.timer
+        resume = resume or {}
+        checkpoint = checkpoint or (lambda stage, **values: None)
+        try:
+            base_id = self._extract_base_identifier(identifier)
+            media_url = resume.get('media_page')
+            if media_url and resume.get('pdf_url') and resume.get('txt_url'):
+                print(f"⏩ Resuming {identifier} at the metadata edit")
+                pdf_url, txt_url = resume['pdf_url'], resume['txt_url']
+            else:
+                if not media_url:
+                    with timer.span('media_page'):
+                        media_url = self._media_url(base_id)
+                with timer.span('scan_media'):
+                    found = self._scan_media(media_url)
+
+                uploaded = False
+                if "document" not in found:
+                    print(f"📤 Uploading PDF {pdf_path}")
+                    with timer.span('upload_pdf'):
+                        self._upload_media_file(pdf_path, "Document", media_url)
+                    checkpoint('pdf', media_page=media_url)
+                    uploaded = True
+                if "extracted-text" not in found:
+                    print(f"📤 Uploading TXT {txt_path}")
+                    with timer.span('upload_txt'):
+                        self._upload_media_file(txt_path, "Extracted Text", media_url)
+                    checkpoint('txt', media_page=media_url)
+                    uploaded = True
+                if uploaded:
+                    with timer.span('rescan_media'):
+                        found = self._scan_media(media_url)
+
+                missing = [t for t, s in self.MEDIA_SEGMENTS.items() if s not in found]
+                if missing:
+                    raise RuntimeError(f"Missing file URLs: {', '.join(missing)}")
+
+                pdf_url, txt_url = found["document"], found["extracted-text"]
+                checkpoint('urls', media_page=media_url, pdf_url=pdf_url, txt_url=txt_url)
+            print(f"🔗 Obtained URLs: PDF={pdf_url}, TXT={txt_url}")
+            with timer.span('update_metadata'):
+                self._update_metadata(media_url, pdf_url, txt_url)
+            checkpoint('metadata')
+        except Exception as e:
+            timer.finish_item('failed', e)
+            raise
+        timer.finish_item('completed')
+
+    def close(self):
+        self.session.close()
+        print("🛑 HTTP session closed")
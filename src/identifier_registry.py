@@ -0,0 +1,107 @@
+from pathlib import Path
+import csv
+import re
+import os
+
+
+class IdentifierRegistry:
+    """In-memory index of uuid_mapping.csv, reloaded only when the file changes"""
+
+    def __init__(self, mapping_file="../docs/uuid_mapping.csv"):
+        self.mapping_file = Path(mapping_file)
+        self._signature = None
+        self._by_base = {}
+        self._by_original = {}
+        self._base_by_original = {}
+        self._uuids = set()
+
+    def _refresh(self):
+        """Reload the mapping if the file's mtime or size changed since the last load"""
+        try:
+            stat = os.stat(self.mapping_file)
+        except FileNotFoundError:
+            raise FileNotFoundError("UUID mapping file not found")
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return
+
+        by_base, by_original, base_by_original, uuids = {}, {}, {}, set()
+        with open(self.mapping_file, 'r', newline='') as csvfile:
+            reader = csv.reader(csvfile)
+            header = next(reader, [])
+            original_col = header.index('OriginalIdentifier')
+            base_col = header.index('BaseIdentifier')
+            uuid_col = header.index('UUID')
+            for row in reader:
+                if len(row) < len(header) or not row[uuid_col]:
+                    continue
+                uuid, base_id, original = row[uuid_col], row[base_col], row[original_col]
+                if base_id == 'unknown':
+                    continue  # The identifier lookup failed; the item still needs mapping
+                uuids.add(uuid)
+                if base_id:
+                    by_base[base_id] = uuid
+                if original:
+                    by_original[original] = uuid
+                    base_by_original[original] = base_id
+
+        self._by_base = by_base
+        self._by_original = by_original
+        self._base_by_original = base_by_original
+        self._uuids = uuids
+        self._signature = signature
+
+    def uuid_for(self, base_id):
+        """UUID for a base identifier (mvp_x.x_xxx); raises KeyError when unmapped"""
+        self._refresh()
+        return self._by_base[base_id]
+
+    def uuid_for_original(self, original_id):
+        """UUID for the full identifier as shown on the item page; raises KeyError when unmapped"""
+        self._refresh()
+        return self._by_original[original_id]
+
+    def base_for_original(self, original_id):
+        """Base identifier recorded for an original identifier, or None"""
+        self._refresh()
+        return self._base_by_original.get(original_id)
+
+    def lookup(self, identifier):
+        """UUID for either a base or an original identifier, or None"""
+        self._refresh()
+        if identifier in self._by_base:
+            return self._by_base[identifier]
+        if identifier in self._by_original:
+            return self._by_original[identifier]
+        match = re.search(r'(mvp_[\d\.]+_\d+)', identifier)
+        return self._by_base.get(match.group(1)) if match else None
+
+    def known_uuids(self):
+        """Every UUID present in the mapping file, except rows written as 'unknown' after a failed lookup"""
+        self._refresh()
+        return set(self._uuids)
+
+    def base_identifiers(self):
+        """Every base identifier that has a UUID"""
+        self._refresh()
+        return set(self._by_base)
+
+    def __contains__(self, base_id):
+        self._refresh()
+        return base_id in self._by_base
+
+    def __len__(self):
+        self._refresh()
+        return len(self._by_base)
+
+
+_registries = {}
+
+
+def get_registry(mapping_file="../docs/uuid_mapping.csv"):
+    """Shared registry instance per mapping file"""
+    key = os.path.abspath(mapping_file)
+    if key not in _registries:
+        _registries[key] = IdentifierRegistry(mapping_file)
+    return _registries[key]
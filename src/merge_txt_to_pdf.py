@@ -1,150 +1,470 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfmetrics
 from collections import defaultdict
 from pathlib import Path
+from array import array
+import argparse
+import hashlib
+import json
+import zlib
+import os
 import re
 
-def process_transcripts(input_dir, output_root):
-    """Process text files into merged transcripts and PDFs with specified file_uploader structure"""
-    input_path = Path(input_dir)
-
-    print(f"\n=== INITIAL SETUP ===")
-    print(f"Input directory: {input_path.resolve()}")
-    print(f"Output root: {output_root}")
-
-    # Create file_uploader directories
-    pdf_output_dir = Path(output_root) / " merged pdf Files"
-    txt_output_dir = Path(output_root) / "merged txt Files"
-
-    print(f"\nCreating directories:")
-    print(f"PDF file_uploader: {pdf_output_dir}")
-    print(f"TXT file_uploader: {txt_output_dir}")
-
-    pdf_output_dir.mkdir(parents=True, exist_ok=True)
-    txt_output_dir.mkdir(parents=True, exist_ok=True)
-
-    # Verify directory creation
-    print(f"\nDirectory check:")
-    print(f"PDF dir exists: {pdf_output_dir.exists()}")
-    print(f"TXT dir exists: {txt_output_dir.exists()}")
-
-    # Organize files by their base identifier
+MANIFEST_NAME = "merge_manifest.json"
+NON_ASCII = re.compile(r'[^\x00-\x7F]+')
+PDF_ESCAPES = re.compile(r'[\\()\x00-\x1f\x7f]')
+
+
+class PdfPageWriter:
+    """
+    Minimal text-only PDF written page by page: each finished page's content stream goes
+    straight to the file, so memory does not grow with the document (ReportLab's canvas
+    holds every page until save). Only object offsets and page numbers are kept, as
+    compact arrays, for the page tree and cross-reference table written by close().
+    Text is drawn in the standard Helvetica font, which needs no embedding.
+    """
+
+    def __init__(self, path, pagesize=letter, font_name="Helvetica", font_size=12):
+        self.file = open(path, 'wb')
+        self.pagesize = pagesize
+        self.font_name = font_name
+        self.font_size = font_size
+        self.page_objects = array('q')
+        self.offsets = array('q', [0, 0, 0, 0])  # Object 0 is the free-list head; 1-3 are written below
+        self._ops = [f"BT /F1 {font_size} Tf"]  # One text object per page
+        self.file.write(b"%PDF-1.4\n%\x93\x8c\x8b\x9e\n")
+        # Catalog, then the font; the page tree (object 2) is written last, once its kids are known
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        self._object(3, f"<< /Type /Font /Subtype /Type1 /BaseFont /{font_name} "
+                        f"/Encoding /WinAnsiEncoding >>".encode('ascii'))
+
+    def _object(self, number, body):
+        if number >= len(self.offsets):
+            self.offsets.append(0)
+        self.offsets[number] = self.file.tell()
+        self.file.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    def draw_string(self, x, y, text):
+        text = PDF_ESCAPES.sub(lambda m: '\\%03o' % ord(m.group()), text)
+        self._ops.append(f"1 0 0 1 {x:.2f} {y:.2f} Tm ({text}) Tj")
+
+    def show_page(self):
+        """Write the current page's content stream and page object, and start a new page"""
+        self._ops.append("ET")
+        content = zlib.compress('\n'.join(self._ops).encode('latin-1'))
+        self._ops = [f"BT /F1 {self.font_size} Tf"]
+        stream_number = len(self.offsets)
+        self._object(stream_number, b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content)
+                     + content + b"\nendstream")
+        width, height = self.pagesize
+        self._object(stream_number + 1, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width:g} {height:g}] /Contents {stream_number} 0 R "
+            f"/Resources << /Font << /F1 3 0 R >> >> >>"
+        ).encode('ascii'))
+        self.page_objects.append(stream_number + 1)
+
+    def close(self):
+        """Finish the last page, then write the page tree, cross-reference table and trailer"""
+        self.show_page()
+        # The kids list is written in slices rather than built as one string
+        self.offsets[2] = self.file.tell()
+        self.file.write(b"2 0 obj\n<< /Type /Pages /Count %d /Kids [" % len(self.page_objects))
+        for start in range(0, len(self.page_objects), 4096):
+            self.file.write(' '.join(f"{number} 0 R" for number in self.page_objects[start:start + 4096])
+                            .encode('ascii') + b"\n")
+        self.file.write(b"] >>\nendobj\n")
+        xref_offset = self.file.tell()
+        self.file.write(b"xref\n0 %d\n0000000000 65535 f \n" % len(self.offsets))
+        for offset in self.offsets[1:]:
+            self.file.write(b"%010d 00000 n \n" % offset)
+        self.file.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                        % (len(self.offsets), xref_offset))
+        self.file.close()
+
+
+def _collect_groups(input_path, verbose=True):
+    """Organize files by their base identifier, in a deterministic order"""
     file_groups = defaultdict(list)
-    print("\n=== FILE PROCESSING ===")
 
     # Process files matching the multi-page pattern
-    for txt_file in input_path.rglob('*.txt'):
-        print(f"\nProcessing file: {txt_file.name}")
-        print(f"Full path: {txt_file.resolve()}")
+    for txt_file in sorted(input_path.rglob('*.txt')):
+        if verbose:
+            print(f"\nProcessing file: {txt_file.name}")
+            print(f"Full path: {txt_file.resolve()}")
 
         # Extract base identifier and page number from filename
         stem = txt_file.stem
-        print(f"File stem: {stem}")
+        if verbose:
+            print(f"File stem: {stem}")
 
         match = re.match(r'^(.+?)_(\d{3})_(\d{3})$', stem)
         if match:
-            print("Multi-page file detected")
+            if verbose:
+                print("Multi-page file detected")
             base_id = f"{match.group(1)}_{match.group(2)}"
             page_num = match.group(3)
         else:
-            print("Single-page file detected")
+            if verbose:
+                print("Single-page file detected")
             base_id = stem
             page_num = None
 
-        print(f"Base ID: {base_id}")
-        print(f"Page number: {page_num}")
+        if verbose:
+            print(f"Base ID: {base_id}")
+            print(f"Page number: {page_num}")
         file_groups[base_id].append((page_num, txt_file))
 
-    print(f"\n=== FILE GROUPS ===")
-    print(f"Found {len(file_groups)} file groups")
-
-    for group_id, files in file_groups.items():
-        print(f"\nProcessing group: {group_id}")
-        print(f"Number of files: {len(files)}")
+    return dict(sorted(file_groups.items()))
+
+
+class TranscriptWriter:
+    """
+    Writes the merged TXT and PDF of one group at the same time, one input line at a time.
+    PDF lines are wrapped at word boundaries using Helvetica metrics, with word widths cached;
+    finished PDF pages are written out as they fill, so memory stays flat with group size.
+    """
+
+    def __init__(self, txt_output, pdf_output, font_name="Helvetica", font_size=12):
+        self.txt_file = open(txt_output, 'w', encoding='utf-8')
+        self.pdf = PdfPageWriter(pdf_output, pagesize=letter, font_name=font_name, font_size=font_size)
+        self.width, self.height = letter
+        self.margin = 72
+        self.line_height = 14
+        self.font_name = font_name
+        self.font_size = font_size
+        self.max_width = self.width - 2 * self.margin
+        self.y_position = self.height - self.margin
+        self.pages_written = 0
+        self.pdf_pages = 1
+        self._widths = {}
+        self.space_width = self._width(' ')
+
+    def _width(self, token):
+        width = self._widths.get(token)
+        if width is None:
+            if len(self._widths) > 100_000:
+                self._widths.clear()  # Keep the cache bounded on huge vocabularies
+            width = pdfmetrics.stringWidth(token, self.font_name, self.font_size)
+            self._widths[token] = width
+        return width
+
+    def _split_long_word(self, word):
+        """Break a word wider than the line into pieces that fit"""
+        piece, piece_width = '', 0
+        for char in word:
+            char_width = self._width(char)
+            if piece and piece_width + char_width > self.max_width:
+                yield piece
+                piece, piece_width = '', 0
+            piece += char
+            piece_width += char_width
+        if piece:
+            yield piece
+
+    def _wrap(self, line):
+        current, current_width = [], 0
+        for word in line.split(' '):
+            word_width = self._width(word)
+            if word_width > self.max_width:
+                if current:
+                    yield ' '.join(current)
+                pieces = list(self._split_long_word(word))
+                yield from pieces[:-1]
+                current, current_width = [pieces[-1]], self._width(pieces[-1])
+                continue
+            added = word_width + (self.space_width if current else 0)
+            if current and current_width + added > self.max_width:
+                yield ' '.join(current)
+                current, current_width = [word], word_width
+            else:
+                current.append(word)
+                current_width += added
+        if current:
+            yield ' '.join(current)
+
+    def _draw_line(self, line):
+        if line:
+            for chunk in self._wrap(line):
+                if self.y_position < self.margin + self.line_height:
+                    self.pdf.show_page()
+                    self.pdf_pages += 1
+                    self.y_position = self.height - self.margin
+
+                self.pdf.draw_string(self.margin, self.y_position, chunk)
+                self.y_position -= self.line_height
+
+        self.y_position -= self.line_height  # Paragraph spacing
+
+    def _emit(self, line, first):
+        if not first:
+            self.txt_file.write('\n')
+        self.txt_file.write(line)
+        self._draw_line(line)
+
+    def write_page(self, file_path):
+        """Append one page file; it is cleaned and stripped like the whole-file version, line by line"""
+        if self.pages_written:
+            self.txt_file.write('\n\n')
+
+        held, blanks, first = None, [], True
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for raw_line in f:
+                # Clean non-ASCII characters
+                line = NON_ASCII.sub('', raw_line.rstrip('\n'))
+                if line.strip() == '':
+                    if held is not None:
+                        blanks.append(line)
+                    continue
+                if held is None:
+                    held = line.lstrip()
+                    continue
+                self._emit(held, first)
+                first = False
+                for blank in blanks:
+                    self._emit(blank, first)
+                held, blanks = line, []
+
+        # Trailing whitespace of the page is dropped, as with str.strip()
+        if held is not None:
+            self._emit(held.rstrip(), first)
+        self.y_position -= self.line_height * 2  # Page separation
+        self.pages_written += 1
+
+    def close(self):
+        self.txt_file.close()
+        self.pdf.close()
+
+
+def _merge_group(group_id, files, txt_output_dir, pdf_output_dir, verbose=True):
+    """Merge one group's pages into a TXT and a PDF; returns a result dict instead of raising"""
+    result = {'group': group_id, 'txt': None, 'pdf': None, 'error': None}
+    log = print if verbose else (lambda *args, **kwargs: None)
+    try:
+        log(f"\nProcessing group: {group_id}")
+        log(f"Number of files: {len(files)}")
 
         # Sort multi-page files numerically
         sorted_files = sorted(
             [f for f in files if f[0] is not None],
             key=lambda x: int(x[0])
         )
-        print(f"Sorted multi-page files: {[f[0] for f in sorted_files]}")
+        log(f"Sorted multi-page files: {[f[0] for f in sorted_files]}")
 
         # Add single-page file if it exists
         sorted_files = [f for f in files if f[0] is None] + sorted_files
-        print(f"Final sorted files: {[f[0] for f in sorted_files]}")
+        log(f"Final sorted files: {[f[0] for f in sorted_files]}")
 
-        # Read and merge content
-        merged_content = []
-        for page_num, file_path in sorted_files:
-            print(f"\nProcessing page: {page_num or 'single-page'}")
-            print(f"File path: {file_path}")
+        # Create file_uploader file names
+        txt_output, pdf_output = _output_paths(group_id, txt_output_dir, pdf_output_dir)
+        log(f"\nWriting TXT to: {txt_output}")
+        log(f"Writing PDF to: {pdf_output}")
+
+        # Stream each page into temporary files that replace the outputs once complete, so a
+        # re-merge never rewrites a file (or a hard link to it) that is already in use
+        txt_tmp = txt_output.with_name(txt_output.name + '.tmp')
+        pdf_tmp = pdf_output.with_name(pdf_output.name + '.tmp')
+        try:
+            writer = TranscriptWriter(txt_tmp, pdf_tmp)
+            try:
+                for page_num, file_path in sorted_files:
+                    log(f"Processing page: {page_num or 'single-page'} ({file_path})")
+                    writer.write_page(file_path)
+            finally:
+                writer.close()
+            os.replace(txt_tmp, txt_output)
+            os.replace(pdf_tmp, pdf_output)
+        finally:
+            for tmp_path in (txt_tmp, pdf_tmp):
+                if tmp_path.exists():
+                    tmp_path.unlink()
+
+        log(f"TXT file created: {txt_output.exists()} ({txt_output.stat().st_size} bytes)")
+        log(f"PDF saved successfully: {pdf_output.exists()} ({pdf_output.stat().st_size} bytes, "
+            f"{writer.pdf_pages} pages)")
+        result['txt'] = str(txt_output)
+        result['pdf'] = str(pdf_output)
+
+    except Exception as e:
+        print(f"Error processing group {group_id}: {str(e)}")
+        result['error'] = str(e)
+
+    return result
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_manifest(manifest_path):
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('groups', {})
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_manifest(manifest_path, groups):
+    """Write the manifest atomically so an interrupted run leaves the previous one intact"""
+    tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'groups': groups}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def _group_entry(files, input_path, previous=None):
+    """Manifest entry for a group: each member's size, mtime and content hash.
+    Hashes from the previous entry are reused for files whose size and mtime are unchanged."""
+    known = {m['path']: m for m in (previous or {}).get('files', [])}
+    members = []
+    for _, file_path in sorted(files, key=lambda f: str(f[1])):
+        stat = file_path.stat()
+        rel_path = file_path.relative_to(input_path).as_posix()
+        old = known.get(rel_path)
+        if old and old['size'] == stat.st_size and old['mtime_ns'] == stat.st_mtime_ns:
+            file_hash = old['sha256']
+        else:
+            file_hash = _file_hash(file_path)
+        members.append({'path': rel_path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_hash})
+    return {'files': members}
 
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                print(f"Original content length: {len(content)} characters")
 
-                # Clean non-ASCII characters
-                clean_content = re.sub(r'[^\x00-\x7F]+', '', content).strip()
-                print(f"Cleaned content length: {len(clean_content)} characters")
+def _group_unchanged(previous, current, txt_output, pdf_output):
+    """Same member files with the same content, and both outputs still present"""
+    if not previous or not txt_output.exists() or not pdf_output.exists():
+        return False
+    strip = lambda entry: [(m['path'], m['sha256']) for m in entry['files']]
+    return strip(previous) == strip(current)
 
-                merged_content.append(clean_content)
 
-        print(f"\nMerged content contains {len(merged_content)} pages")
+def _output_paths(group_id, txt_output_dir, pdf_output_dir):
+    output_prefix = f"{group_id}_transcript"
+    return txt_output_dir / f"{output_prefix}.txt", pdf_output_dir / f"{output_prefix}.pdf"
 
-        # Create file_uploader file names
-        output_prefix = f"{group_id}_transcript"
-        txt_output = txt_output_dir / f"{output_prefix}.txt"
-        pdf_output = pdf_output_dir / f"{output_prefix}.pdf"
 
-        print(f"\nSaving TXT to: {txt_output}")
-        with open(txt_output, 'w', encoding='utf-8') as txt_file:
-            txt_file.write('\n\n'.join(merged_content))
-        print(f"TXT file created: {txt_output.exists()} ({txt_output.stat().st_size} bytes)")
+def _merge_group_task(unit):
+    """Process-pool entry point for one (group_id, files) unit"""
+    group_id, files, txt_output_dir, pdf_output_dir = unit
+    return _merge_group(group_id, files, txt_output_dir, pdf_output_dir, verbose=False)
 
-        print(f"\nGenerating PDF to: {pdf_output}")
-        try:
-            c = canvas.Canvas(str(pdf_output), pagesize=letter)
-            width, height = letter
-            margin = 72
-            line_height = 14
-            y_position = height - margin
-            font_size = 12
 
-            c.setFont("Helvetica", font_size)
-            print("PDF canvas created successfully")
+def iter_merged(input_dir, output_root, workers=1, full_rebuild=False):
+    """
+    Merge the groups that need it and yield each group's result as soon as its TXT and PDF
+    are written (in completion order when workers > 1). The manifest is saved when the
+    generator finishes or is closed, covering the groups merged so far.
+    """
+    input_path = Path(input_dir)
+    verbose = workers <= 1
 
-            for page_content in merged_content:
-                lines = page_content.split('\n')
-                print(f"Processing {len(lines)} lines in page")
+    print(f"\n=== INITIAL SETUP ===")
+    print(f"Input directory: {input_path.resolve()}")
+    print(f"Output root: {output_root}")
 
-                for line in lines:
-                    while len(line) > 0:
-                        chunk = line[:85]
-                        line = line[85:]
+    # Create file_uploader directories
+    pdf_output_dir = Path(output_root) / " merged pdf Files"
+    txt_output_dir = Path(output_root) / "merged txt Files"
 
-                        if y_position < margin + line_height:
-                            print("New PDF page created")
-                            c.showPage()
-                            y_position = height - margin
-                            c.setFont("Helvetica", font_size)
+    print(f"\nCreating directories:")
+    print(f"PDF file_uploader: {pdf_output_dir}")
+    print(f"TXT file_uploader: {txt_output_dir}")
 
-                        c.drawString(margin, y_position, chunk)
-                        y_position -= line_height
+    pdf_output_dir.mkdir(parents=True, exist_ok=True)
+    txt_output_dir.mkdir(parents=True, exist_ok=True)
 
-                    y_position -= line_height  # Paragraph spacing
+    # Verify directory creation
+    print(f"\nDirectory check:")
+    print(f"PDF dir exists: {pdf_output_dir.exists()}")
+    print(f"TXT dir exists: {txt_output_dir.exists()}")
 
-                y_position -= line_height * 2  # Page separation
+    print("\n=== FILE PROCESSING ===")
+    file_groups = _collect_groups(input_path, verbose=verbose)
 
-            c.save()
-            print(f"PDF saved successfully: {pdf_output.exists()} ({pdf_output.stat().st_size} bytes)")
+    print(f"\n=== FILE GROUPS ===")
+    print(f"Found {len(file_groups)} file groups")
 
-        except Exception as e:
-            print(f"Error generating PDF: {str(e)}")
+    # Compare against the manifest of the previous run
+    manifest_path = Path(output_root) / MANIFEST_NAME
+    recorded = _load_manifest(manifest_path)
+    previous = {} if full_rebuild else recorded
+    manifest, pending = {}, {}
+    for group_id, files in file_groups.items():
+        entry = _group_entry(files, input_path, previous.get(group_id))
+        txt_output, pdf_output = _output_paths(group_id, txt_output_dir, pdf_output_dir)
+        if _group_unchanged(previous.get(group_id), entry, txt_output, pdf_output):
+            manifest[group_id] = entry
+        else:
+            pending[group_id] = (files, entry)
+
+    # Remove outputs of groups whose inputs no longer exist
+    for group_id in sorted(set(recorded) - set(file_groups)):
+        for output in _output_paths(group_id, txt_output_dir, pdf_output_dir):
+            if output.exists():
+                output.unlink()
+        print(f"Removed outputs of deleted group: {group_id}")
+
+    print(f"{len(pending)} groups to rebuild, {len(manifest)} unchanged")
+
+    try:
+        if workers <= 1:
+            for group_id, (files, _) in pending.items():
+                result = _merge_group(group_id, files, txt_output_dir, pdf_output_dir)
+                if not result['error']:
+                    manifest[group_id] = pending[group_id][1]
+                yield result
+        else:
+            units = [
+                (group_id, files, txt_output_dir, pdf_output_dir)
+                for group_id, (files, _) in pending.items()
+            ]
+            print(f"Merging with {workers} worker processes")
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_merge_group_task, unit) for unit in units]
+                try:
+                    for future in as_completed(futures):
+                        result = future.result()
+                        if not result['error']:
+                            manifest[result['group']] = pending[result['group']][1]
+                        yield result
+                finally:
+                    for future in futures:
+                        future.cancel()
+    finally:
+        # Failed groups stay out of the manifest so the next run retries them
+        _save_manifest(manifest_path, manifest)
+
+
+def process_transcripts(input_dir, output_root, workers=1, full_rebuild=False):
+    """
+    Process text files into merged transcripts and PDFs with specified file_uploader structure.
+    With workers > 1 each group is merged in a separate process; returns per-group results.
+    A manifest in output_root limits re-runs to groups whose inputs changed, were added or were
+    removed, unless full_rebuild is set.
+    """
+    # Group order, as a serial run would produce it
+    results = sorted(iter_merged(input_dir, output_root, workers, full_rebuild), key=lambda r: r['group'])
+
+    errors = [r for r in results if r['error']]
+    print(f"\nMerged {len(results) - len(errors)} groups, {len(errors)} errors")
+    for r in errors:
+        print(f"- {r['group']}: {r['error']}")
+    return results
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Merge transcript pages into TXT and PDF files")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes used to merge groups")
+    parser.add_argument("--full", action="store_true",
+                        help="rebuild every group, ignoring the merge manifest")
+    args = parser.parse_args()
+
     input_directory = '../files/merge_txt_to_pdf/input'
     output_root_directory = '../files/merge_txt_to_pdf/output'
 
     print("=== STARTING PROCESS ===")
-    process_transcripts(input_directory, output_root_directory)
-    print("\n=== PROCESS COMPLETE ===")
\ No newline at end of file
+    process_transcripts(input_directory, output_root_directory, workers=args.workers, full_rebuild=args.full)
+    print("\n=== PROCESS COMPLETE ===")
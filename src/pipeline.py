@@ -0,0 +1,321 @@
+from file_uploader import ProgressTracker, record_abandoned, record_failure, tracker_config
+from identifier_registry import get_registry
+from merge_txt_to_pdf import iter_merged
+from retry_scheduler import RetryScheduler
+from spreadsheet_editor import update_in_place
+from upload_workers import serve_uploads
+from pathlib import Path
+import pandas as pd
+import configparser
+import threading
+import argparse
+import logging
+import shutil
+import queue
+import time
+import os
+
+
+def _merge_stage(input_dir, output_root, workers, full_rebuild, merged):
+    """Hand every merged group to the coordinator as soon as its outputs are written"""
+    try:
+        for result in iter_merged(input_dir, output_root, workers=workers, full_rebuild=full_rebuild):
+            merged.put(result)
+    except Exception as e:
+        logging.critical(f"Merge stage stopped: {str(e)}")
+        print(f"❌ Merge stage stopped: {str(e)}")
+    finally:
+        merged.put(None)
+
+
+def _upload_stage(worker_id, backend, headless, lean, identifiers, account, password, uploads, results, fed):
+    """One uploader thread taking items until fed is set and the queue is empty"""
+    def take():
+        while True:
+            try:
+                return uploads.get(timeout=0.5)
+            except queue.Empty:
+                if fed.is_set():
+                    return None
+
+    serve_uploads(backend, account, password, take,
+                  lambda kind, payload: results.put((kind, worker_id, payload)),
+                  headless=headless, identifiers=identifiers, lean=lean)
+
+
+def _status_stage(workbook_path, completed, batch_size, interval):
+    """Mark completed identifiers in the workbook, batch_size at a time or every interval seconds"""
+    pending = []
+    last_flush = time.monotonic()
+
+    def flush():
+        nonlocal pending, last_flush
+        last_flush = time.monotonic()
+        if not pending:
+            return
+        progress = pd.DataFrame({'BaseIdentifier': pending, 'PDF': 'Yes', 'Metadata': 'Yes'})
+        try:
+            edited = update_in_place(workbook_path, progress)
+        except Exception as e:
+            # Typically the workbook is open in Excel; keep the batch for the next flush
+            print(f"⚠️ Spreadsheet update failed, will retry: {str(e)}")
+            return
+        print(f"📊 Spreadsheet updated for {len(pending)} items ({edited} cells)")
+        pending = []
+
+    while True:
+        try:
+            base_name = completed.get(timeout=max(0.1, interval - (time.monotonic() - last_flush)))
+        except queue.Empty:
+            flush()
+            continue
+        if base_name is None:
+            flush()
+            return
+        pending.append(base_name)
+        if len(pending) >= batch_size:
+            flush()
+
+
+def _stage_file(path, directory):
+    """
+    Link (or copy) a merged output into the uploader's input directory. Merging replaces
+    its outputs with new files rather than rewriting them, so a staged link keeps its content.
+    """
+    target = directory / Path(path).name
+    if target.exists():
+        target.unlink()
+    try:
+        os.link(path, target)
+    except OSError:
+        shutil.copy2(path, target)
+    return target
+
+
+def run_pipeline(input_dir, output_root, workbook_path, merge_workers=1, uploaders=1, backend="browser",
+                 lean=None, headless=False, queue_size=4, status_batch=10, status_interval=60.0,
+                 full_rebuild=False):
+    """
+    Merge, upload and spreadsheet reconciliation as concurrent stages joined by bounded queues.
+    Each merged group is claimed, staged into the uploader's input directory and queued for upload
+    as soon as its TXT and PDF exist; completed uploads feed batched in-place status edits.
+    This thread is the only one that touches the progress store, as in run_upload_pool, and
+    it requeues transient upload failures once their backoff has passed.
+    Items left in the input directory by earlier runs are uploaded once merging is done.
+    """
+    config = configparser.ConfigParser()
+    config.read('../docs/config.ini')
+    account = config['Credentials']['account']
+    password = config['Credentials']['password']
+
+    progress = ProgressTracker(tracker_config(config))
+    pdf_dir = progress.config['base_dir'] / progress.config['source_pdf']
+    txt_dir = progress.config['base_dir'] / progress.config['source_txt']
+    pdf_dir.mkdir(parents=True, exist_ok=True)
+    txt_dir.mkdir(parents=True, exist_ok=True)
+    identifiers = get_registry("../docs/uuid_mapping.csv")
+    scheduler = RetryScheduler.from_config(config)
+
+    merged = queue.Queue(maxsize=queue_size)
+    uploads = queue.Queue(maxsize=queue_size)
+    results = queue.Queue()  # Unbounded, so uploaders never wait on the coordinator
+    completed_queue = queue.Queue(maxsize=queue_size * status_batch)
+    fed = threading.Event()  # Set once the last item is queued for upload
+
+    threads = [threading.Thread(target=_merge_stage, name="merge", daemon=True,
+                                args=(input_dir, output_root, merge_workers, full_rebuild, merged))]
+    for worker_id in range(uploaders):
+        threads.append(threading.Thread(
+            target=_upload_stage, name=f"upload-{worker_id}", daemon=True,
+            args=(worker_id, backend, headless, lean, identifiers, account, password, uploads, results, fed)
+        ))
+    status_thread = None
+    if Path(workbook_path).exists():
+        status_thread = threading.Thread(target=_status_stage, name="status", daemon=True,
+                                         args=(workbook_path, completed_queue, status_batch, status_interval))
+        threads.append(status_thread)
+    else:
+        print(f"⚠️ {workbook_path} not found, spreadsheet statuses will not be updated")
+
+    print(f"🚀 Pipeline: {merge_workers} merge workers, {uploaders} uploaders, queues of {queue_size}")
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+
+    seen = set()
+    ready_at = {}  # base_name -> when its merged files were handed over
+    live = set(range(uploaders))
+    merging = True
+    leftovers = None
+    outstanding = 0  # Handed to uploaders and not reported back yet
+    completed = failed = 0
+    latencies = []
+
+    def handle(kind, worker_id, payload):
+        nonlocal completed, failed, outstanding
+        if kind == 'checkpoint':
+            base_name, stage, values = payload
+            progress.checkpoint(base_name, stage, **values)
+        elif kind == 'completed':
+            base_name, pdf_path, txt_path, _ = payload
+            outstanding -= 1
+            scheduler.succeeded(payload)
+            progress.mark_completed(base_name, pdf_path, txt_path)
+            completed += 1
+            latencies.append(time.monotonic() - ready_at.pop(base_name, start))
+            if status_thread is not None:
+                completed_queue.put(base_name)
+        elif kind == 'failed':
+            outstanding -= 1
+            if not record_failure(progress, scheduler, payload[:3], payload[3]):
+                ready_at.pop(payload[0], None)
+                failed += 1
+        elif kind == 'worker_error':
+            print(f"❌ Uploader {worker_id} failed: {payload}")
+        elif kind == 'worker_done':
+            live.discard(worker_id)
+
+    def next_source_item(upload=True):
+        """
+        Next (base_name, pdf, txt) to upload, None when nothing is ready yet, or False when
+        done. A group is staged once claimed; without upload (no uploader left) it is staged only.
+        """
+        nonlocal merging, leftovers
+        if merging:
+            try:
+                result = merged.get(timeout=0.2)
+            except queue.Empty:
+                return None
+            if result is None:
+                merging = False
+                print("✅ Merging finished")
+                return None
+            if result['error']:
+                return None
+            base_name = result['group']
+            if upload:
+                # Completed earlier or leased by another host: left alone, not staged or uploaded
+                if base_name in seen or not progress.claim(base_name):
+                    return None
+                seen.add(base_name)
+            item = (base_name, _stage_file(result['pdf'], pdf_dir), _stage_file(result['txt'], txt_dir))
+            if not upload:
+                return None
+            ready_at[base_name] = time.monotonic()
+            return item
+        if not upload:
+            return False
+        if leftovers is None:
+            # Discovery claims what it yields; items handed over in this run are already ours
+            leftovers = (item for batch in progress.get_upload_batches(chunk_size=10) for item in batch
+                         if item[0] not in seen)
+        item = next(leftovers, False)
+        if item:
+            seen.add(item[0])
+            ready_at.setdefault(item[0], time.monotonic())
+        return item
+
+    try:
+        feeding, source_done, warned, next_item = True, False, False, None
+        # Uploaders report every result before they exit, so the loop ends once all have exited
+        while feeding or live:
+            while True:
+                try:
+                    handle(*results.get_nowait())
+                except queue.Empty:
+                    break
+            if not feeding:
+                try:
+                    handle(*results.get(timeout=0.5))
+                except queue.Empty:
+                    pass
+                continue
+
+            if not live and not warned:
+                print("❌ No uploader left; merged files stay in the upload input directory")
+                warned = True
+                # The held item, those still queued and those waiting for a retry fail for good
+                dropped = [] if next_item is None else [next_item]
+                while True:
+                    try:
+                        dropped.append(uploads.get_nowait())
+                        outstanding -= 1
+                    except queue.Empty:
+                        break
+                dropped += scheduler.drain()
+                next_item = None
+                for item in dropped:
+                    ready_at.pop(item[0], None)
+                failed += record_abandoned(progress, dropped, "No uploader left")
+            if next_item is None and live:
+                next_item = scheduler.pop_due()
+            if next_item is None and not source_done:
+                next_item = next_source_item(upload=bool(live))
+                if next_item is False:
+                    source_done, next_item = True, None
+
+            if next_item is not None:
+                try:
+                    # A full queue holds the next item here, which in turn holds up the merge stage;
+                    # the item goes with the checkpoints of its earlier attempts
+                    uploads.put((*next_item, progress.checkpoints(next_item[0])), timeout=0.2)
+                    outstanding += 1
+                    next_item = None
+                except queue.Full:
+                    pass
+            elif source_done:
+                if not live or not (outstanding or len(scheduler)):
+                    feeding = False
+                    fed.set()
+                    continue
+                # Only uploads in flight and retries in backoff are left
+                wait = scheduler.next_due_in()
+                try:
+                    handle(*results.get(timeout=0.5 if wait is None else min(0.5, max(0.05, wait))))
+                except queue.Empty:
+                    pass
+
+        if status_thread is not None:
+            completed_queue.put(None)
+            status_thread.join()
+        progress.generate_report()
+    finally:
+        progress.close()
+
+    elapsed = time.monotonic() - start
+    summary = f"{completed} uploaded, {failed} failed in {elapsed:.0f}s"
+    if latencies:
+        latencies.sort()
+        summary += (f"; merge-to-uploaded median {latencies[len(latencies) // 2]:.0f}s, "
+                    f"max {latencies[-1]:.0f}s")
+    print(f"🏁 {summary}")
+    logging.info(summary)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge, upload and update the spreadsheet in one streaming run")
+    parser.add_argument("--workers", type=int, default=1, help="processes used to merge groups")
+    parser.add_argument("--uploaders", type=int, default=1, help="parallel uploader sessions")
+    parser.add_argument("--backend", choices=["browser", "http"], default="browser",
+                        help="drive the site with Selenium or submit its forms over HTTP")
+    parser.add_argument("--lean", action="store_true", default=None,
+                        help="block images, fonts, stylesheets and analytics while driving Chrome")
+    parser.add_argument("--queue-size", type=int, default=4, help="items buffered between stages")
+    parser.add_argument("--status-batch", type=int, default=10,
+                        help="completed uploads per spreadsheet update")
+    parser.add_argument("--status-interval", type=float, default=60.0,
+                        help="seconds before a partial batch is written to the spreadsheet")
+    parser.add_argument("--full", action="store_true", help="re-merge every group, ignoring the merge manifest")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s: [%(threadName)s] %(message)s',
+        filename='../docs/upload_log.txt'
+    )
+    print("=== STARTING PIPELINE ===")
+    run_pipeline('../files/merge_txt_to_pdf/input', '../files/merge_txt_to_pdf/output', '../files/spreadsheet.xlsx',
+                 merge_workers=args.workers, uploaders=args.uploaders, backend=args.backend, lean=args.lean,
+                 queue_size=args.queue_size, status_batch=args.status_batch, status_interval=args.status_interval,
+                 full_rebuild=args.full)
+    print("=== PIPELINE COMPLETED ===")
@@ -0,0 +1,270 @@
+from datetime import datetime
+from pathlib import Path
+import threading
+import sqlite3
+import socket
+import time
+import csv
+import os
+
+
+class ProgressStore:
+    """SQLite (WAL) progress records keyed by BaseIdentifier with a CSV export"""
+
+    COLUMNS = ['BaseIdentifier', 'PDF', 'TXT', 'Metadata', 'Timestamp', 'Attempts', 'LastError',
+               'MediaPage', 'PdfUrl', 'TxtUrl', 'PdfMedia', 'TxtMedia']
+    # Media saved by each upload stage checkpoint; 'urls' also stores the media URLs.
+    # PDF, TXT and Metadata, which the spreadsheet is synced from, are only set by mark_completed
+    STAGES = {
+        'pdf': ('PdfMedia',),
+        'txt': ('TxtMedia',),
+        'urls': ('PdfMedia', 'TxtMedia'),
+        'metadata': ('PdfMedia', 'TxtMedia'),
+    }
+
+    def __init__(self, csv_path, db_path=None, export_interval=60, shared=False):
+        self.csv_path = Path(csv_path)
+        self.db_path = Path(db_path) if db_path else self.csv_path.with_suffix('.db')
+        # The CSV export is rewritten at most every export_interval seconds (never when 0)
+        # and on close, so it lags the database; a full rewrite per batch of writes would
+        # stall the uploaders at hundreds of thousands of rows
+        self.export_interval = export_interval
+        self._last_export = time.monotonic()
+
+        fresh = not self.db_path.exists()
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30)
+        # WAL needs shared memory on one machine; a database on a share used by several
+        # hosts has to use the rollback journal
+        self.conn.execute("PRAGMA journal_mode=DELETE" if shared else "PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+        if fresh:
+            self._import_csv()
+
+    def _create_schema(self):
+        """Create the progress table and add any columns missing from older databases"""
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS progress ("
+                "BaseIdentifier TEXT PRIMARY KEY, PDF TEXT, TXT TEXT, Metadata TEXT, "
+                "Timestamp TEXT, Attempts INTEGER DEFAULT 0, LastError TEXT, "
+                "MediaPage TEXT, PdfUrl TEXT, TxtUrl TEXT, PdfMedia TEXT, TxtMedia TEXT)"
+            )
+            existing = {row[1] for row in self.conn.execute("PRAGMA table_info(progress)")}
+            for col in self.COLUMNS:
+                if col not in existing:
+                    print(f"⚠️ Adding missing progress column: {col}")
+                    self.conn.execute(f"ALTER TABLE progress ADD COLUMN {col} TEXT")
+            if 'PdfMedia' not in existing:
+                self._split_stage_flags()
+            # Work claims of the hosts sharing this store; not part of the CSV export
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "BaseIdentifier TEXT PRIMARY KEY, Owner TEXT NOT NULL, Expires REAL NOT NULL)"
+            )
+
+    def _import_csv(self):
+        """Seed a new database from the legacy progress CSV"""
+        if not self.csv_path.exists():
+            return
+
+        with open(self.csv_path, 'r', newline='') as csvfile:
+            reader = csv.DictReader(csvfile)
+            rows = [
+                tuple(row.get(col) or None for col in self.COLUMNS)
+                for row in reader
+                if row.get('BaseIdentifier')
+            ]
+
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO progress ({', '.join(self.COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                rows
+            )
+            if 'PdfMedia' not in (reader.fieldnames or []):
+                self._split_stage_flags()
+        print(f"ℹ️ Imported {len(rows)} progress rows from {self.csv_path}")
+
+    def _split_stage_flags(self):
+        """Move stage checkpoints that older versions kept in PDF and TXT to PdfMedia and TxtMedia"""
+        self.conn.execute(
+            "UPDATE progress SET PdfMedia = PDF, TxtMedia = TXT, "
+            "PDF = CASE Metadata WHEN 'Yes' THEN PDF ELSE 'No' END, "
+            "TXT = CASE Metadata WHEN 'Yes' THEN TXT ELSE 'No' END"
+        )
+
+    def mark_completed(self, base_name):
+        """Record a fully uploaded item with a single upsert; Attempts counts the failed attempts before it too"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO progress (BaseIdentifier, PDF, TXT, Metadata, Timestamp, Attempts, LastError, "
+                "PdfMedia, TxtMedia) VALUES (?, 'Yes', 'Yes', 'Yes', ?, 1, '', 'Yes', 'Yes') "
+                "ON CONFLICT(BaseIdentifier) DO UPDATE SET "
+                "PDF = 'Yes', TXT = 'Yes', Metadata = 'Yes', PdfMedia = 'Yes', TxtMedia = 'Yes', "
+                "Timestamp = excluded.Timestamp, Attempts = COALESCE(Attempts, 0) + 1, LastError = ''",
+                (base_name, datetime.now().isoformat())
+            )
+        self._after_write()
+
+    def mark_failed(self, base_name, error_message=""):
+        """Record a failed attempt, bumping the attempt counter of an existing row"""
+        error_message = str(error_message)[:500]  # Truncate long errors
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO progress (BaseIdentifier, PDF, TXT, Metadata, Timestamp, Attempts, LastError) "
+                "VALUES (?, 'No', 'No', 'No', ?, 1, ?) "
+                "ON CONFLICT(BaseIdentifier) DO UPDATE SET "
+                "Attempts = COALESCE(Attempts, 0) + 1, LastError = excluded.LastError",
+                (base_name, datetime.now().isoformat(), error_message)
+            )
+        self._after_write()
+
+    def checkpoint(self, base_name, stage, media_page=None, pdf_url=None, txt_url=None):
+        """
+        Record one finished upload stage (a key of STAGES) without clearing the others.
+        The item stays 'No' in PDF, TXT and Metadata until it is completed.
+        """
+        done = self.STAGES[stage]
+        flags = ['Yes' if col in done else 'No' for col in ('PdfMedia', 'TxtMedia')]
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO progress (BaseIdentifier, PDF, TXT, Metadata, Timestamp, Attempts, LastError, "
+                "MediaPage, PdfUrl, TxtUrl, PdfMedia, TxtMedia) VALUES (?, 'No', 'No', 'No', ?, 0, '', ?, ?, ?, ?, ?) "
+                "ON CONFLICT(BaseIdentifier) DO UPDATE SET "
+                "PdfMedia = CASE excluded.PdfMedia WHEN 'Yes' THEN 'Yes' ELSE PdfMedia END, "
+                "TxtMedia = CASE excluded.TxtMedia WHEN 'Yes' THEN 'Yes' ELSE TxtMedia END, "
+                "Timestamp = excluded.Timestamp, MediaPage = COALESCE(excluded.MediaPage, MediaPage), "
+                "PdfUrl = COALESCE(excluded.PdfUrl, PdfUrl), TxtUrl = COALESCE(excluded.TxtUrl, TxtUrl)",
+                (base_name, datetime.now().isoformat(), media_page, pdf_url, txt_url, *flags)
+            )
+        self._after_write()
+
+    def checkpoints(self, base_name):
+        """Stages recorded for an item, as passed to upload_transcript(resume=...); empty when unseen"""
+        row = self.conn.execute(
+            "SELECT PdfMedia, TxtMedia, Metadata, MediaPage, PdfUrl, TxtUrl FROM progress WHERE BaseIdentifier = ?",
+            (base_name,)
+        ).fetchone()
+        if row is None:
+            return {}
+        return {
+            'pdf': row[0] == 'Yes', 'txt': row[1] == 'Yes', 'metadata': row[2] == 'Yes',
+            'media_page': row[3] or None, 'pdf_url': row[4] or None, 'txt_url': row[5] or None,
+        }
+
+    def completed_identifiers(self):
+        """Set of identifiers whose metadata has been updated"""
+        return {row[0] for row in self.conn.execute(
+            "SELECT BaseIdentifier FROM progress WHERE Metadata = 'Yes'"
+        )}
+
+    def claim(self, base_name, owner, ttl=300):
+        """
+        Lease an item for owner unless it is completed or held by another owner whose lease
+        has not expired. One statement, so two hosts can never both succeed. Returns True
+        when owner holds the lease.
+        """
+        now = time.time()
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO leases (BaseIdentifier, Owner, Expires) "
+                "SELECT ?, ?, ? WHERE NOT EXISTS "
+                "(SELECT 1 FROM progress WHERE BaseIdentifier = ? AND Metadata = 'Yes') "
+                "ON CONFLICT(BaseIdentifier) DO UPDATE SET Owner = excluded.Owner, Expires = excluded.Expires "
+                "WHERE leases.Expires < ? OR leases.Owner = excluded.Owner",
+                (base_name, owner, now + ttl, base_name, now)
+            )
+        return cursor.rowcount == 1
+
+    def release(self, base_name, owner):
+        """Give up a lease, if owner still holds it"""
+        with self.conn:
+            self.conn.execute("DELETE FROM leases WHERE BaseIdentifier = ? AND Owner = ?", (base_name, owner))
+
+    def release_all(self, owner):
+        """Give up every lease owner holds"""
+        with self.conn:
+            self.conn.execute("DELETE FROM leases WHERE Owner = ?", (owner,))
+
+    def release_dead_local_owners(self, hostname=None):
+        """Drop leases left by processes on this host that are no longer running"""
+        hostname = hostname or socket.gethostname()
+        stale = []
+        for (owner,) in self.conn.execute(
+                "SELECT DISTINCT Owner FROM leases WHERE Owner LIKE ?", (f"{hostname}:%",)):
+            pid = owner.rsplit(':', 1)[1]
+            if pid.isdigit() and not _pid_running(int(pid)):
+                stale.append(owner)
+        for owner in stale:
+            self.release_all(owner)
+        return len(stale)
+
+    def rows(self):
+        """All progress rows as dictionaries, in insertion order"""
+        cursor = self.conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM progress ORDER BY rowid")
+        return [dict(zip(self.COLUMNS, row)) for row in cursor]
+
+    def _after_write(self):
+        if self.export_interval and time.monotonic() - self._last_export >= self.export_interval:
+            self.export_csv()
+
+    def export_csv(self):
+        """Atomically rewrite the CSV export used by spreadsheet_editor.py and other tools"""
+        tmp_path = self.csv_path.with_name(self.csv_path.name + '.tmp')
+        with open(tmp_path, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(self.COLUMNS)
+            writer.writerows(
+                self.conn.execute(f"SELECT {', '.join(self.COLUMNS)} FROM progress ORDER BY rowid")
+            )
+        os.replace(tmp_path, self.csv_path)
+        self._last_export = time.monotonic()
+
+    def close(self):
+        self.export_csv()
+        self.conn.close()
+
+
+def lease_owner():
+    """Owner id of this process: hostname and pid"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _pid_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class LeaseHeartbeat(threading.Thread):
+    """Renews all of an owner's leases every interval seconds, on its own connection"""
+
+    def __init__(self, db_path, owner, ttl=300, interval=None):
+        super().__init__(name="lease-heartbeat", daemon=True)
+        self.db_path = str(db_path)
+        self.owner = owner
+        self.ttl = ttl
+        self.interval = interval or ttl / 3
+        self._stop_event = threading.Event()
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            while not self._stop_event.wait(self.interval):
+                try:
+                    with conn:
+                        conn.execute("UPDATE leases SET Expires = ? WHERE Owner = ?",
+                                     (time.time() + self.ttl, self.owner))
+                except sqlite3.Error as e:
+                    print(f"⚠️ Lease renewal failed: {str(e)}")
+        finally:
+            conn.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
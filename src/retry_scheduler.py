@@ -0,0 +1,90 @@
+import itertools
+import random
+import heapq
+import time
+
+# Failures that another attempt cannot fix; anything else (timeouts, "File already
+# locked for writing", dropped connections, slow pages) is retried later
+PERMANENT_ERRORS = (
+    "No UUID mapping found",
+    "Invalid filename format",
+)
+
+
+def classify_failure(error):
+    """'permanent' or 'transient', from an exception or its message"""
+    message = str(error)
+    if any(marker in message for marker in PERMANENT_ERRORS):
+        return 'permanent'
+    return 'transient'
+
+
+class RetryScheduler:
+    """
+    Deferred retries: a transient failure puts its item back after an exponential
+    backoff with jitter, so other items are uploaded in the meantime. Items are
+    tuples whose first element is the base identifier.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=15.0, max_delay=600.0, jitter=0.5, clock=time.monotonic):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.clock = clock
+        self.attempts = {}  # base_name -> failed attempts so far
+        self._heap = []
+        self._order = itertools.count()
+
+    @classmethod
+    def from_config(cls, config):
+        """Scheduler set up from the [Retries] section of config.ini"""
+        return cls(
+            max_attempts=config.getint('Retries', 'max_attempts', fallback=3),
+            base_delay=config.getfloat('Retries', 'base_delay', fallback=15.0),
+            max_delay=config.getfloat('Retries', 'max_delay', fallback=600.0),
+        )
+
+    def __len__(self):
+        return len(self._heap)
+
+    def backoff(self, attempt):
+        """Delay before retry number attempt (1-based), spread by up to jitter either way"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def failed(self, item, error):
+        """
+        Record a failed attempt. Returns the delay before the item comes back, or None
+        when it has failed for good (a permanent error or the last attempt).
+        """
+        base_name = item[0]
+        attempt = self.attempts.get(base_name, 0) + 1
+        if classify_failure(error) == 'permanent' or attempt >= self.max_attempts:
+            self.attempts.pop(base_name, None)
+            return None
+        self.attempts[base_name] = attempt
+        delay = self.backoff(attempt)
+        heapq.heappush(self._heap, (self.clock() + delay, next(self._order), item))
+        return delay
+
+    def succeeded(self, item):
+        self.attempts.pop(item[0], None)
+
+    def pop_due(self):
+        """The next item whose backoff has passed, or None"""
+        if self._heap and self._heap[0][0] <= self.clock():
+            return heapq.heappop(self._heap)[2]
+        return None
+
+    def next_due_in(self):
+        """Seconds until the next retry is due, or None when nothing is waiting"""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - self.clock())
+
+    def drain(self):
+        """Remove and return every waiting item, e.g. when no uploader is left to retry them"""
+        items = [entry[2] for entry in sorted(self._heap)]
+        self._heap = []
+        return items
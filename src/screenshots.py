@@ -0,0 +1,119 @@
+from collections import deque
+from pathlib import Path
+import threading
+import base64
+import random
+import queue
+import time
+import os
+
+POLICIES = ('off', 'errors', 'sampled', 'always')
+EXTENSIONS = {'png': '.png', 'dom': '.html'}
+
+
+class ScreenshotRecorder:
+    """
+    Policy-driven browser captures written on a background thread.
+
+    policy: 'off', 'errors' (only error captures), 'sampled' (errors plus sample_rate
+    of the others) or 'always'. kind: 'png' screenshots or 'dom' page-source snapshots.
+    At most max_files captures are kept in directory; the oldest are deleted first.
+    """
+
+    def __init__(self, driver, directory="../screenshots", policy="errors", kind="png",
+                 sample_rate=0.1, max_files=50, queue_size=16):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown screenshot policy: {policy}")
+        if kind not in EXTENSIONS:
+            raise ValueError(f"Unknown capture kind: {kind}")
+        self.driver = driver
+        self.directory = Path(directory).resolve()
+        self.policy = policy
+        self.kind = kind
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._index = deque()
+        self._writer = None
+
+    def _should_capture(self, error):
+        if self.policy == 'always':
+            return True
+        if self.policy == 'sampled':
+            return error or random.random() < self.sample_rate
+        return self.policy == 'errors' and error
+
+    def _start(self):
+        """Create the directory, index existing captures oldest first and start the writer"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with os.scandir(self.directory) as entries:
+            existing = [(entry.stat().st_mtime_ns, entry.path) for entry in entries
+                        if entry.is_file() and entry.name.endswith(tuple(EXTENSIONS.values()))]
+        self._index.extend(path for _, path in sorted(existing))
+        self._writer = threading.Thread(target=self._write_loop, name="screenshot-writer", daemon=True)
+        self._writer.start()
+
+    def capture(self, name, error=False):
+        """Grab the page now and queue it for writing; returns the target path, or None if skipped"""
+        if not self._should_capture(error):
+            return None
+        if self._writer is None:
+            self._start()
+
+        try:
+            # Only the browser round-trip happens here; decoding and disk I/O are on the writer thread
+            if self.kind == 'png':
+                payload = self.driver.get_screenshot_as_base64()
+            else:
+                payload = self.driver.page_source
+        except Exception as e:
+            print(f"⚠️ Screenshot capture failed: {str(e)}")
+            return None
+
+        prefix = "error_screenshot" if error else "screenshot"
+        path = self.directory / f"{prefix}_{name}_{time.time_ns()}_{os.getpid()}{EXTENSIONS[self.kind]}"
+        try:
+            # Error captures wait for room; routine ones are dropped rather than stall the upload
+            self._queue.put((path, payload), block=error)
+        except queue.Full:
+            self.dropped += 1
+            return None
+        if error:
+            print(f"⚠️ Screenshot saved: file://{path}")
+        return path
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                path, payload = item
+                if self.kind == 'png':
+                    path.write_bytes(base64.b64decode(payload))
+                else:
+                    path.write_text(payload, encoding='utf-8')
+                self._index.append(str(path))
+                self._prune()
+            except Exception as e:
+                print(f"Error writing screenshot: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _prune(self):
+        while len(self._index) > self.max_files:
+            file_path = self._index.popleft()
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"Error deleting {file_path}: {e}")
+
+    def close(self):
+        """Write out everything still queued and stop the writer"""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
@@ -1,51 +1,143 @@
+from xlsx_patch import patch_cells, column_letter
+from identifier_registry import get_registry
 import pandas as pd
-import csv
-
-# Load CSV data into a dictionary
-csv_data = {}
-path = "../docs/upload_progress.csv"
-with open(path, 'r') as csvfile:
-    reader = csv.DictReader(csvfile)
-    for row in reader:
-        base_id = row['BaseIdentifier']
-        pdf = row['PDF']
-        metadata = row['Metadata']
-        csv_data[base_id] = (pdf, metadata)
-
-# Load the Excel file
-excel_file = pd.ExcelFile('../files/spreadsheet.xlsx')
-df = pd.read_excel(excel_file, sheet_name=0)  # Assuming the first sheet is the data
-
-# Update PDF and Transcript columns based on CSV data
-for index, row in df.iterrows():
-    identifiers = str(row['field_identifier']).split(',')
-
-    # Normalize values
-    pdf_created = str(df.at[index, 'PDF/TXT Created?']).strip()
-    transcript_uploaded = str(df.at[index, 'Transcript Uploaded?']).strip()
-
-    pdf_created = pdf_created if pdf_created in ['Yes', 'No'] else 'No'
-    transcript_uploaded = transcript_uploaded if transcript_uploaded in ['Yes', 'No'] else 'No'
-
-    for part in identifiers:
-        cleaned_part = part.strip().lstrip(':').strip()
-        if cleaned_part.startswith('mvp_') and cleaned_part in csv_data:
-            pdf_val, metadata_val = csv_data[cleaned_part]
-            if pdf_val == 'Yes' and pdf_created != 'Yes':
-                pdf_created = 'Yes'
-            if metadata_val == 'Yes' and transcript_uploaded != 'Yes':
-                transcript_uploaded = 'Yes'
-
-    df.at[index, 'PDF/TXT Created?'] = pdf_created
-    df.at[index, 'Transcript Uploaded?'] = transcript_uploaded
-
-
-# Save the updated DataFrame to a new Excel file
-with pd.ExcelWriter('../files/updated_project_status.xlsx') as writer:
-    df.to_excel(writer, sheet_name='spreadsheet', index=False)
-    # If there's a second sheet with file names, include it as well
-    if len(excel_file.sheet_names) > 1:
-        file_names_df = pd.read_excel(excel_file, sheet_name=1)
-        file_names_df.to_excel(writer, sheet_name='file names', index=False)
-
-print("Update completed. Saved to 'updated_project_status.xlsx'")
\ No newline at end of file
+import numpy as np
+import argparse
+import openpyxl
+
+STATUS_COLUMNS = {'PDF': 'PDF/TXT Created?', 'Metadata': 'Transcript Uploaded?'}
+
+
+def load_progress(path="../docs/upload_progress.csv"):
+    """BaseIdentifier, PDF and Metadata columns of the progress CSV; the last row wins for repeated identifiers"""
+    progress = pd.read_csv(path, dtype=str, keep_default_na=False,
+                           usecols=['BaseIdentifier', 'PDF', 'Metadata'])
+    return progress.drop_duplicates('BaseIdentifier', keep='last')
+
+
+def sheet_identifiers(df):
+    """Cleaned mvp_ identifiers of every row, one per entry, indexed by row position"""
+    # Blank cells become '' first: astype(str) keeps NaN on newer pandas, and an all-blank column has no strings
+    parts = pd.Series(df['field_identifier'].to_numpy(), dtype=object).fillna('').astype(str).str.split(',').explode()
+    parts = parts.str.strip().str.lstrip(':').str.strip()
+    return parts[parts.str.startswith('mvp_').fillna(False).astype(bool)]
+
+
+def normalize_status(values):
+    """'Yes' and 'No' are kept, anything else becomes 'No'"""
+    values = pd.Series(values.to_numpy(), dtype=object).fillna('').astype(str).str.strip()
+    return np.where(values.isin(['Yes', 'No']), values, 'No')
+
+
+def reconcile_status(df, progress, identifiers=None):
+    """
+    Set the status columns to 'Yes' for rows with any identifier marked 'Yes' in the
+    progress data; other rows keep their normalized value. Returns the updated frame.
+    """
+    if identifiers is None:
+        identifiers = sheet_identifiers(df)
+    matches = pd.DataFrame({'row': identifiers.index, 'BaseIdentifier': identifiers.to_numpy()})
+    matches = matches.merge(progress, on='BaseIdentifier', how='inner')
+
+    for progress_col, sheet_col in STATUS_COLUMNS.items():
+        rows = matches.loc[matches[progress_col] == 'Yes', 'row'].unique()
+        done = np.zeros(len(df), dtype=bool)
+        done[rows.astype(np.int64)] = True
+        df[sheet_col] = np.where(done, 'Yes', normalize_status(df[sheet_col]))
+    return df
+
+
+def scan_status(workbook_path, sheet_index=0):
+    """
+    Stream the identifier and status columns of one sheet in read-only mode.
+    Returns a frame with one entry per non-empty data row, its sheet row number in
+    'row', and the column letters of the status columns.
+    """
+    wb = openpyxl.load_workbook(workbook_path, read_only=True)
+    try:
+        ws = wb.worksheets[sheet_index]
+        ws.reset_dimensions()  # Don't trust a stale <dimension> tag
+        rows = ws.iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else None for value in next(rows, ())]
+        columns = ['field_identifier', *STATUS_COLUMNS.values()]
+        positions = [header.index(column) for column in columns]
+
+        data = {column: [] for column in columns}
+        row_numbers = []
+        for row_number, values in enumerate(rows, start=2):
+            if not any(value is not None for value in values):
+                continue
+            row_numbers.append(row_number)
+            for column, position in zip(columns, positions):
+                data[column].append(values[position] if position < len(values) else None)
+    finally:
+        wb.close()
+
+    frame = pd.DataFrame(data, dtype=object)
+    frame['row'] = row_numbers
+    letters = {column: column_letter(position + 1) for column, position in zip(columns, positions)}
+    return frame, letters
+
+
+def update_in_place(workbook_path, progress, output_path=None):
+    """
+    Rewrite only the status cells that change, leaving the rest of the workbook as it is.
+    Prints how many rows flipped to Yes; returns the number of edited cells.
+    """
+    frame, letters = scan_status(workbook_path)
+    before = {column: normalize_status(frame[column]) for column in STATUS_COLUMNS.values()}
+    original = frame[list(STATUS_COLUMNS.values())].copy()
+    updated = reconcile_status(frame, progress)
+
+    edits = {}
+    for column in STATUS_COLUMNS.values():
+        changed = (original[column] != updated[column]).to_numpy()
+        flipped = int(((before[column] != 'Yes') & (updated[column].to_numpy() == 'Yes')).sum())
+        print(f"{column}: {flipped} rows flipped to Yes, {int(changed.sum()) - flipped} other cells normalized")
+        for row_number, value in zip(updated['row'].to_numpy()[changed], updated[column].to_numpy()[changed]):
+            edits.setdefault(int(row_number), {})[letters[column]] = value
+
+    if edits:
+        patch_cells(workbook_path, edits, output_path=output_path)
+    return sum(len(cells) for cells in edits.values())
+
+
+def main():
+    progress = load_progress("../docs/upload_progress.csv")
+
+    # Load the Excel file
+    excel_file = pd.ExcelFile('../files/spreadsheet.xlsx')
+    df = pd.read_excel(excel_file, sheet_name=0)  # Assuming the first sheet is the data
+
+    # Update PDF and Transcript columns based on CSV data
+    identifiers = sheet_identifiers(df)
+    df = reconcile_status(df, progress, identifiers)
+
+    # Shared UUID index, used to flag identifiers that have no item mapping
+    uuid_index = get_registry("../docs/uuid_mapping.csv")
+    if uuid_index.mapping_file.exists():
+        unmapped = set(identifiers[~identifiers.isin(uuid_index.base_identifiers())])
+        if unmapped:
+            print(f"⚠️ {len(unmapped)} identifiers have no UUID mapping in uuid_mapping.csv")
+
+    # Save the updated DataFrame to a new Excel file
+    with pd.ExcelWriter('../files/updated_project_status.xlsx') as writer:
+        df.to_excel(writer, sheet_name='spreadsheet', index=False)
+        # If there's a second sheet with file names, include it as well
+        if len(excel_file.sheet_names) > 1:
+            file_names_df = pd.read_excel(excel_file, sheet_name=1)
+            file_names_df.to_excel(writer, sheet_name='file names', index=False)
+
+    print("Update completed. Saved to 'updated_project_status.xlsx'")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--in-place", action="store_true",
+                        help="Edit the changed status cells of spreadsheet.xlsx instead of writing updated_project_status.xlsx")
+    args = parser.parse_args()
+    if args.in_place:
+        edited = update_in_place('../files/spreadsheet.xlsx', load_progress("../docs/upload_progress.csv"))
+        print(f"Update completed. {edited} cells changed in 'spreadsheet.xlsx'")
+    else:
+        main()
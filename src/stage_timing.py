@@ -0,0 +1,126 @@
+from contextlib import contextmanager
+from pathlib import Path
+import json
+import math
+import time
+import os
+
+# Upload stages in pipeline order, for reports
+STAGES = ('navigate', 'media_page', 'scan_media', 'upload_pdf', 'upload_txt', 'rescan_media',
+          'get_file_urls', 'update_metadata')
+
+
+class StageTimer:
+    """
+    Per-item stage spans, appended as one JSON line per upload attempt: wall time,
+    page loads and retries of each stage. A span costs two perf_counter calls;
+    page_count is a callable returning the uploader's running page-load counter.
+    """
+
+    def __init__(self, path="../docs/upload_timings.jsonl", page_count=None):
+        self.path = Path(path) if path else None
+        self.page_count = page_count or (lambda: 0)
+        self._item = None
+        self._stage = None
+
+    def start_item(self, identifier):
+        self._item = {'identifier': identifier, 'pid': os.getpid(), 'started': time.time(), 'stages': {}}
+        self._start = time.perf_counter()
+        self._pages = self.page_count()
+
+    def _record(self, stage):
+        return self._item['stages'].setdefault(stage, {'seconds': 0.0, 'page_loads': 0, 'retries': 0})
+
+    @contextmanager
+    def span(self, stage):
+        """Time one stage of the current item; a no-op outside start_item/finish_item"""
+        if self._item is None:
+            yield
+            return
+        start, pages = time.perf_counter(), self.page_count()
+        outer, self._stage = self._stage, stage
+        try:
+            yield
+        finally:
+            record = self._record(stage)
+            record['seconds'] += time.perf_counter() - start
+            record['page_loads'] += self.page_count() - pages
+            self._stage = outer
+
+    def retry(self):
+        """Count a retry inside the current stage"""
+        if self._item is not None and self._stage is not None:
+            self._record(self._stage)['retries'] += 1
+
+    def finish_item(self, status, error=None):
+        """Write the current item's line; status is 'completed' or 'failed'"""
+        item, self._item, self._stage = self._item, None, None
+        if item is None or self.path is None:
+            return
+        stages = item['stages'].values()
+        item.update(
+            status=status,
+            error=str(error)[:200] if error else None,
+            seconds=round(time.perf_counter() - self._start, 4),
+            page_loads=self.page_count() - self._pages,
+            retries=sum(record['retries'] for record in stages),
+        )
+        for record in stages:
+            record['seconds'] = round(record['seconds'], 4)
+        try:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(item) + '\n')
+        except OSError as e:
+            print(f"⚠️ Could not write stage timings: {str(e)}")
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def read_timings(path, since=None):
+    """Timing lines of attempts started at or after the since timestamp"""
+    path = Path(path)
+    if not path.exists():
+        return []
+    items = []
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue  # A line cut short by a crash
+            if since is None or item.get('started', 0) >= since:
+                items.append(item)
+    return items
+
+
+def timing_report(items):
+    """Report lines: p50, p95 and max per stage, then overall attempts and items per hour"""
+    if not items:
+        return []
+    per_stage = {}
+    for item in items:
+        for stage, record in item['stages'].items():
+            per_stage.setdefault(stage, []).append(record)
+
+    order = [stage for stage in STAGES if stage in per_stage] + sorted(set(per_stage) - set(STAGES))
+    lines = ["\nStage timings (seconds):"]
+    for stage in order:
+        records = per_stage[stage]
+        seconds = [record['seconds'] for record in records]
+        pages = sum(record['page_loads'] for record in records) / len(records)
+        retries = sum(record['retries'] for record in records)
+        lines.append(f"- {stage}: p50 {percentile(seconds, 50):.2f}, p95 {percentile(seconds, 95):.2f}, "
+                     f"max {max(seconds):.2f} over {len(records)} runs, {pages:.1f} page loads, {retries} retries")
+
+    totals = [item['seconds'] for item in items]
+    completed = sum(1 for item in items if item['status'] == 'completed')
+    span = max(item['started'] + item['seconds'] for item in items) - min(item['started'] for item in items)
+    per_hour = completed / span * 3600 if span > 0 else 0
+    lines.append(f"- per attempt: p50 {percentile(totals, 50):.2f}, p95 {percentile(totals, 95):.2f}, "
+                 f"max {max(totals):.2f} over {len(items)} attempts")
+    lines.append(f"Throughput: {completed} items completed, {per_hour:.1f} items/hour")
+    return lines
@@ -0,0 +1,184 @@
+from file_uploader import create_uploader, record_abandoned, record_failure
+from retry_scheduler import RetryScheduler
+import multiprocessing as mp
+import itertools
+import logging
+import queue
+
+
+def serve_uploads(backend, account, password, take, report, **options):
+    """
+    One logged-in uploader making one attempt at each item take() returns, until it returns None.
+    Items are (base_name, pdf, txt, resume) with the checkpoints of earlier attempts; stage
+    checkpoints and results go to report(kind, payload), as the coordinator schedules retries.
+    Shared by the pool's worker processes and the pipeline's uploader threads.
+    """
+    uploader = None
+    try:
+        uploader = create_uploader(backend, **options)
+        uploader.login(account, password)
+
+        for base_name, pdf_path, txt_path, resume in iter(take, None):
+            report('started', (base_name, pdf_path, txt_path))
+
+            def checkpoint(stage, **values):
+                report('checkpoint', (base_name, stage, values))
+
+            error = None
+            try:
+                uploader.upload_transcript(base_name, pdf_path, txt_path, resume=resume, checkpoint=checkpoint)
+            except Exception as e:
+                # Retries are scheduled by the coordinator, so this uploader moves on to the next item
+                error = str(e)
+                logging.warning(f"Attempt failed for {base_name}: {error}")
+
+            report('completed' if error is None else 'failed', (base_name, pdf_path, txt_path, error))
+
+    except Exception as e:
+        logging.critical(f"Uploader stopped: {str(e)}")
+        report('worker_error', str(e))
+
+    finally:
+        if uploader is not None:
+            uploader.close()
+        report('worker_done', None)
+
+
+def _upload_worker(worker_id, account, password, headless, backend, lean, work_queue, result_queue):
+    """Worker process: serves items from work_queue until it receives a sentinel"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=f'%(asctime)s - %(levelname)s: [worker {worker_id}] %(message)s',
+        filename='../docs/upload_log.txt'
+    )
+    serve_uploads(backend, account, password, work_queue.get,
+                  lambda kind, payload: result_queue.put((kind, worker_id, payload)),
+                  headless=headless, lean=lean)
+
+
+def run_upload_pool(progress, workers, account, password, scheduler=None, headless=False, backend="browser",
+                    lean=None, shard=None):
+    """
+    Upload pending items with several uploader processes.
+    Only this process writes to the progress store; workers report results over a queue.
+    Items are queued as discovery finds them, a few per worker ahead of the uploads.
+    Failed attempts go to scheduler (a RetryScheduler), which hands transient failures
+    back once their backoff has passed.
+    """
+    if scheduler is None:
+        scheduler = RetryScheduler()
+    ctx = mp.get_context('spawn')
+    work_queue = ctx.Queue()
+    result_queue = ctx.Queue()
+
+    pending = (item for batch in progress.get_upload_batches(chunk_size=10, shard=shard) for item in batch)
+    first = list(itertools.islice(pending, workers))
+    if not first:
+        return
+
+    def hand_off(item):
+        # Checkpoints are read as the item is queued, after any reported by its last attempt
+        work_queue.put((*item, progress.checkpoints(item[0])))
+
+    workers = min(workers, len(first))
+    for item in first:
+        hand_off(item)
+    total = len(first)
+    outstanding = len(first)  # Queued or being uploaded, not reported back yet
+    exhausted = stopping = False
+
+    print(f"🚀 Starting {workers} upload workers")
+    processes = {}
+    for worker_id in range(workers):
+        process = ctx.Process(
+            target=_upload_worker,
+            args=(worker_id, account, password, headless, backend, lean, work_queue, result_queue),
+            daemon=True
+        )
+        process.start()
+        processes[worker_id] = process
+
+    in_flight = {}
+    finished = set()
+
+    def report_failure(item, error):
+        nonlocal outstanding
+        outstanding -= 1
+        record_failure(progress, scheduler, item, error)
+
+    while len(finished) < workers:
+        # Keep about two items per worker queued, retries whose backoff has passed first
+        while not stopping and outstanding < 2 * workers:
+            item = scheduler.pop_due()
+            if item is None and not exhausted:
+                item = next(pending, None)
+                if item is None:
+                    exhausted = True
+                else:
+                    total += 1
+            if item is None:
+                break
+            hand_off(item)
+            outstanding += 1
+
+        # Sentinels follow the last item once nothing can come back for a retry
+        if exhausted and not stopping and not outstanding and not len(scheduler):
+            stopping = True
+            for _ in range(workers):
+                work_queue.put(None)
+
+        wait = scheduler.next_due_in()
+        try:
+            kind, worker_id, payload = result_queue.get(timeout=5 if wait is None else min(5, max(0.1, wait)))
+        except queue.Empty:
+            # A worker that died without reporting loses only its in-flight item
+            for worker_id, process in processes.items():
+                if worker_id not in finished and not process.is_alive():
+                    finished.add(worker_id)
+                    item = in_flight.pop(worker_id, None)
+                    if item:
+                        report_failure(item, f"Worker {worker_id} exited unexpectedly")
+            continue
+
+        if kind == 'started':
+            in_flight[worker_id] = payload
+        elif kind == 'checkpoint':
+            base_name, stage, values = payload
+            progress.checkpoint(base_name, stage, **values)
+        elif kind == 'completed':
+            base_name, pdf_path, txt_path, _ = payload
+            in_flight.pop(worker_id, None)
+            outstanding -= 1
+            scheduler.succeeded(payload)
+            progress.mark_completed(base_name, pdf_path, txt_path)
+        elif kind == 'failed':
+            in_flight.pop(worker_id, None)
+            report_failure(payload[:3], payload[3])
+        elif kind == 'worker_error':
+            print(f"❌ Worker {worker_id} failed: {payload}")
+            item = in_flight.pop(worker_id, None)
+            if item:
+                report_failure(item, payload)
+        elif kind == 'worker_done':
+            finished.add(worker_id)
+
+        if kind in ('completed', 'failed'):
+            progress.report_progress(total, more=not exhausted)
+
+    for process in processes.values():
+        process.join(timeout=10)
+
+    # Only left when every worker stopped: items still queued or waiting for a retry fail for good
+    abandoned = scheduler.drain()
+    while True:
+        try:
+            item = work_queue.get(timeout=0.1)
+        except queue.Empty:
+            break
+        if item is not None:
+            abandoned.append(item)
+    if abandoned:
+        print(f"⚠️ {len(abandoned)} items were left when the workers stopped")
+        record_abandoned(progress, abandoned, "No upload worker left")
+
+    progress.report_summary(workers)
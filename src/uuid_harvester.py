@@ -0,0 +1,295 @@
+from concurrent.futures import ThreadPoolExecutor
+from http_uploader import HttpSession, parse_page
+from html.parser import HTMLParser
+from urllib.parse import urlsplit, urlunsplit, urljoin, parse_qsl, urlencode
+import threading
+import json
+import time
+import re
+
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+
+def split_identifier(full_identifier):
+    """Original and base (mvp_x.x_xxx) identifier from dcterms:identifier text"""
+    base_identifier = None
+    match = re.search(r'(mvp_[\d\.]+_\d+)', full_identifier)
+    if match:
+        base_identifier = match.group(1)
+    return {'original': full_identifier, 'base': base_identifier}
+
+
+def page_url(collection_url, page_num):
+    """Collection URL for a zero-based pager page"""
+    parts = urlsplit(collection_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != 'page']
+    if page_num:
+        query.append(('page', str(page_num)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def page_number(href):
+    """Zero-based page number from a pager href, or None"""
+    value = dict(parse_qsl(urlsplit(href).query)).get('page')
+    return int(value) if value is not None and value.isdigit() else None
+
+
+class RateLimiter:
+    """Spaces requests at least 1/requests_per_second apart across all threads"""
+
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ListingParser(HTMLParser):
+    """Item links, identifiers shown on listing cards, and pager links of a collection page"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.items = []
+        self.next_href = None
+        self.last_href = None
+        self._stack = []
+        self._row = None
+        self._identifier_text = None
+
+    def _open_roles(self):
+        return {role for _, role in self._stack if role}
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {k: (v if v is not None else '') for k, v in attrs}
+        classes = attrs.get('class', '').split()
+        role = None
+
+        if tag == 'article' or 'views-row' in classes:
+            role = 'row'
+            self._row = {'href': None, 'identifier': None}
+        elif attrs.get('property') == 'dcterms:identifier':
+            role = 'identifier'
+            self._identifier_text = ''
+        elif tag == 'li' and 'pager__item--next' in classes:
+            role = 'next'
+        elif tag == 'li' and 'pager__item--last' in classes:
+            role = 'last'
+
+        if tag == 'a' and attrs.get('href'):
+            href = attrs['href']
+            open_roles = self._open_roles()
+            if attrs.get('rel') == 'bookmark' and 'ghost' in classes:
+                if self._row is not None:
+                    self._row['href'] = self._row['href'] or href
+                else:
+                    self.items.append({'href': href, 'identifier': None})
+            elif 'next' in open_roles:
+                self.next_href = href
+            elif 'last' in open_roles:
+                self.last_href = href
+
+        if tag not in VOID_TAGS:
+            self._stack.append((tag, role))
+
+    def handle_endtag(self, tag):
+        if not any(open_tag == tag for open_tag, _ in self._stack):
+            return
+        while self._stack:
+            open_tag, role = self._stack.pop()
+            self._close(role)
+            if open_tag == tag:
+                break
+
+    def _close(self, role):
+        if role == 'identifier':
+            if self._row is not None and self._identifier_text.strip():
+                self._row['identifier'] = self._identifier_text.strip()
+            self._identifier_text = None
+        elif role == 'row':
+            if self._row and self._row['href']:
+                self.items.append(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._identifier_text is not None:
+            self._identifier_text += data
+
+
+def parse_listing(html):
+    parser = ListingParser()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+class UUIDHarvester:
+    """Bulk UUID harvesting over plain HTTP; detail pages are fetched only for unlisted identifiers"""
+
+    def __init__(self, detail_workers=4, jsonapi_url=None, rate_limiter=None):
+        self.detail_workers = detail_workers
+        self.jsonapi_url = jsonapi_url
+        self.rate_limiter = rate_limiter
+        self.last_listing = None
+        self.stats = {'listing_pages': 0, 'detail_pages': 0, 'jsonapi_pages': 0, 'items': 0}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._sessions = []  # Every thread's session, so close() reaches them all
+        self._pool = None
+
+    def _session(self):
+        # One keep-alive session per thread
+        if not hasattr(self._local, 'session'):
+            self._local.session = HttpSession()
+            with self._lock:
+                self._sessions.append(self._local.session)
+        return self._local.session
+
+    def _fetch(self, url):
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait()
+        response = self._session().get(url)
+        if response.status >= 400:
+            raise RuntimeError(f"GET {url} returned HTTP {response.status}")
+        return response.text
+
+    def _row(self, uuid, full_identifier):
+        identifier = split_identifier(full_identifier) if full_identifier else {'original': 'unknown', 'base': 'unknown'}
+        return {'OriginalIdentifier': identifier['original'], 'BaseIdentifier': identifier['base'], 'UUID': uuid}
+
+    def _detail_identifier(self, item_url):
+        """dcterms:identifier text from an item page, or None"""
+        try:
+            page = parse_page(self._fetch(item_url))
+        except Exception as e:
+            print(f"Identifier not found: {str(e)}")
+            return None
+        with self._lock:
+            self.stats['detail_pages'] += 1
+        record = page.properties.get('dcterms:identifier')
+        return record['text'].strip() if record else None
+
+    def harvest_page(self, url, skip_uuids=()):
+        """
+        Rows for one listing page, the next page URL (or None), the number of items listed and
+        whether every row was mapped; rows whose identifier could not be read are 'unknown'
+        """
+        listing = parse_listing(self._fetch(url))
+        self.stats['listing_pages'] += 1
+
+        items = []
+        for item in listing.items:
+            item_url = urljoin(url, item['href'])
+            uuid = item_url.rstrip('/').split('/')[-1]
+            if uuid not in skip_uuids:
+                items.append((uuid, item_url, item['identifier']))
+
+        missing = [(uuid, url) for uuid, url, identifier in items if not identifier]
+        details = {}
+        if missing:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.detail_workers)
+            identifiers = self._pool.map(self._detail_identifier, [url for _, url in missing])
+            details = {uuid: identifier for (uuid, _), identifier in zip(missing, identifiers)}
+
+        rows = [self._row(uuid, identifier or details.get(uuid)) for uuid, _, identifier in items]
+        self.stats['items'] += len(rows)
+        self.last_listing = listing
+        next_url = urljoin(url, listing.next_href) if listing.next_href else None
+        clean = all(row['BaseIdentifier'] != 'unknown' for row in rows)
+        return rows, next_url, len(listing.items), clean
+
+    def harvest_listing(self, collection_url):
+        """Follow the listing pager from the collection's first page"""
+        next_url = collection_url
+        while next_url:
+            rows, next_url, _, _ = self.harvest_page(next_url)
+            yield from rows
+
+    def harvest_jsonapi(self):
+        """Page through the JSON:API node collection"""
+        url = self.jsonapi_url
+        while url:
+            document = json.loads(self._fetch(url))
+            self.stats['jsonapi_pages'] += 1
+            for record in document.get('data', []):
+                identifier = record.get('attributes', {}).get('field_identifier')
+                if isinstance(identifier, list):
+                    identifier = identifier[0] if identifier else None
+                self.stats['items'] += 1
+                yield self._row(record['id'], identifier)
+            next_link = document.get('links', {}).get('next')
+            next_href = next_link.get('href') if isinstance(next_link, dict) else next_link
+            url = urljoin(url, next_href) if next_href else None
+
+    def harvest(self, collection_url):
+        """JSON:API when configured and reachable, otherwise the listing markup"""
+        if self.jsonapi_url:
+            try:
+                yield from self.harvest_jsonapi()
+                return
+            except Exception as e:
+                if self.stats['items']:
+                    raise
+                print(f"⚠️ JSON:API harvest unavailable ({str(e)}), falling back to listing pages")
+        yield from self.harvest_listing(collection_url)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+        with self._lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+
+
+def harvest_sharded(collection_url, workers=4, requests_per_second=5.0, detail_workers=2):
+    """
+    Crawl the listing with several HTTP workers, each reading a contiguous range of ?page=k.
+    All workers share one rate limit. Returns (rows, page count, stats) with rows
+    de-duplicated by UUID in page order.
+    """
+    limiter = RateLimiter(requests_per_second) if requests_per_second else None
+    harvesters = [UUIDHarvester(detail_workers=detail_workers, rate_limiter=limiter) for _ in range(workers)]
+    try:
+        rows, next_url, _, _ = harvesters[0].harvest_page(page_url(collection_url, 0))
+        listing = harvesters[0].last_listing
+        last_page = page_number(listing.last_href) if listing.last_href else None
+        pages = last_page + 1 if last_page is not None else (None if next_url else 1)
+        results = {0: rows}
+        if pages is None:
+            # No "last" pager link: fall back to following "next" from a single worker
+            while next_url:
+                page_rows, next_url, _, _ = harvesters[0].harvest_page(next_url)
+                results[len(results)] = page_rows
+            pages = len(results)
+        else:
+            remaining = list(range(1, pages))
+            chunk = -(-len(remaining) // workers) if remaining else 0
+            shards = [remaining[i:i + chunk] for i in range(0, len(remaining), chunk)] if chunk else []
+
+            def crawl(harvester, shard):
+                return {k: harvester.harvest_page(page_url(collection_url, k))[0] for k in shard}
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for shard_results in pool.map(crawl, harvesters, shards):
+                    results.update(shard_results)
+
+        seen, merged = set(), []
+        for k in sorted(results):
+            for row in results[k]:
+                if row['UUID'] not in seen:
+                    seen.add(row['UUID'])
+                    merged.append(row)
+        stats = {key: sum(h.stats[key] for h in harvesters) for key in harvesters[0].stats}
+        return merged, pages, stats
+    finally:
+        for harvester in harvesters:
+            harvester.close()
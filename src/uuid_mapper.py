@@ -1,23 +1,47 @@
 from selenium.webdriver.support import expected_conditions as EC
+from uuid_harvester import UUIDHarvester, harvest_sharded, page_url
 from selenium.webdriver.support.ui import WebDriverWait
-from file_uploader import DigitalLibraryUploader
+from browser import create_driver, PageLoader
+from identifier_registry import get_registry
 from selenium.webdriver.common.by import By
 import configparser
+import argparse
+import json
+import time
 import csv
 import re
+import os
 
 
 
 class UUIDMapper:
-    def __init__(self):
+    def __init__(self, lean=None):
         config = configparser.ConfigParser()
         config.read('../docs/config.ini')
-        self.driver = DigitalLibraryUploader(headless=True).driver
+        self._driver = None
         self.base_url = config['Credentials']['base_url']
         self.collection_url = config['Credentials']['collection_url']
+        self.jsonapi_url = config['Credentials'].get('jsonapi_url')
+        self.driver_path = config.get('Browser', 'driver_path', fallback=None)
+        self.lean = config.getboolean('Browser', 'lean', fallback=False) if lean is None else lean
+        self._pages = None
         self.output_file = "../docs/uuid_mapping.csv"
+        self.checkpoint_file = "../docs/uuid_mapping.checkpoint.json"
         self.fieldnames = ['OriginalIdentifier', 'BaseIdentifier', 'UUID']
 
+    @property
+    def driver(self):
+        # The browser is only started for the per-item crawl
+        if self._driver is None:
+            self._driver, self.startup_timings = create_driver(headless=True, driver_path=self.driver_path, lean=self.lean)
+        return self._driver
+
+    def _get(self, url):
+        """Timed page load; listing and item pages never need the full theme"""
+        if self._pages is None:
+            self._pages = PageLoader(self.driver, self.lean, allowlist=[])
+        self._pages.get(url)
+
     def _get_uuid_from_url(self, url):
         """Extract UUID from item URL"""
         return url.split('/')[-1]
@@ -45,13 +69,20 @@ class UUIDMapper:
             print(f"Identifier not found: {str(e)}")
             return {'original': 'unknown', 'base': 'unknown'}
 
-    def _process_page(self, writer):
-        """Process all items on a single page with error handling"""
+    def _process_page(self, writer, csvfile=None, known_uuids=None, page_url=None):
+        """
+        Process all items on a single page with error handling; returns the (new, listed) counts
+        and whether every item was mapped without errors
+        """
+        known_uuids = known_uuids if known_uuids is not None else set()
+        written = listed = 0
+        clean = True
         try:
             # Get fresh list of items each time
             view_buttons = WebDriverWait(self.driver, 20).until(
                 EC.presence_of_all_elements_located((By.CSS_SELECTOR, "a.btn.ghost[rel='bookmark']"))
             )
+            listed = len(view_buttons)
 
             print(f"Found {len(view_buttons)} items on this page")
 
@@ -63,6 +94,9 @@ class UUIDMapper:
 
                     item_url = button.get_attribute('href')
                     uuid = self._get_uuid_from_url(item_url)
+                    if uuid in known_uuids:
+                        print(f"Skipped {idx+1}/{len(view_buttons)}: already mapped")
+                        continue
 
                     # Open in new tab to maintain page state
                     self.driver.execute_script("window.open(arguments[0]);", item_url)
@@ -77,6 +111,14 @@ class UUIDMapper:
                         'BaseIdentifier': identifier_data['base'],
                         'UUID': uuid
                     })
+                    if csvfile is not None:
+                        csvfile.flush()
+                    if identifier_data['base'] == 'unknown':
+                        # Written for the record, but left for the next run to map again
+                        clean = False
+                    else:
+                        known_uuids.add(uuid)
+                    written += 1
                     print(f"Processed {idx+1}/{len(view_buttons)}: {identifier_data['base']}")
 
                     # Close tab and return to main window
@@ -85,24 +127,91 @@ class UUIDMapper:
 
                 except Exception as e:
                     print(f"Error processing item {idx+1}: {str(e)}")
-                    # Reset to collection page
-                    self.driver.get(self.collection_url)
+                    clean = False
+                    # Reset to the current collection page
+                    self._get(page_url or self.collection_url)
 
         except Exception as page_error:
             print(f"Page processing error: {str(page_error)}")
+            clean = False
 
-    def map_uuids(self):
-        """Main mapping function with proper CSV setup"""
-        with open(self.output_file, 'w', newline='') as csvfile:
+        return written, listed, clean
+
+    def _page_url(self, page_num):
+        """Collection URL for a zero-based pager page"""
+        return page_url(self.collection_url, page_num)
+
+    def _read_checkpoint(self):
+        """Last completed page of an interrupted run of this collection, or None"""
+        try:
+            with open(self.checkpoint_file, 'r') as f:
+                checkpoint = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if checkpoint.get('collection_url') != self.collection_url or checkpoint.get('complete'):
+            return None
+        return checkpoint.get('last_completed_page')
+
+    def _write_checkpoint(self, page_num, complete=False):
+        tmp_path = f"{self.checkpoint_file}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'collection_url': self.collection_url,
+                'last_completed_page': page_num,
+                'complete': complete
+            }, f)
+        os.replace(tmp_path, self.checkpoint_file)
+
+    def _open_output(self, incremental):
+        """Output CSV and the UUIDs it already holds; incremental runs append instead of truncating"""
+        if incremental and os.path.exists(self.output_file) and os.path.getsize(self.output_file) > 0:
+            known_uuids = get_registry(self.output_file).known_uuids()
+            csvfile = open(self.output_file, 'a', newline='')
             writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames)
-            writer.writeheader()
+            print(f"Incremental run: {len(known_uuids)} UUIDs already mapped")
+            return csvfile, writer, known_uuids
+
+        csvfile = open(self.output_file, 'w', newline='')
+        writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames)
+        writer.writeheader()
+        return csvfile, writer, set()
+
+    def _start_page(self, incremental):
+        """Page to start from and whether this run resumes an interrupted one"""
+        last_page = self._read_checkpoint() if incremental else None
+        if last_page is None:
+            return 0, False
+        print(f"Resuming after page {last_page + 1}")
+        return last_page + 1, True
 
-            self.driver.get(self.collection_url)
-            page_num = 0
+    def map_uuids(self, incremental=False):
+        """
+        Main mapping function with proper CSV setup.
+        In incremental mode known UUIDs are skipped, interrupted runs resume after the
+        last checkpointed page, and a fresh run stops at the first fully mapped page.
+        Only pages mapped without errors are checkpointed, and none after the first page
+        with errors, so a resumed run goes back to it.
+        """
+        csvfile, writer, known_uuids = self._open_output(incremental)
+        with csvfile:
+            page_num, resuming = self._start_page(incremental)
+            if not resuming:
+                self._write_checkpoint(page_num - 1)  # Nothing mapped yet
+            self._get(self._page_url(page_num))
+            all_clean = True
 
             while True:
                 print(f"\nProcessing page {page_num + 1}")
-                self._process_page(writer)
+                written, listed, clean = self._process_page(writer, csvfile, known_uuids, self._page_url(page_num))
+                if clean and all_clean:
+                    self._write_checkpoint(page_num)
+                elif all_clean:
+                    print(f"Page {page_num + 1} had errors; a resumed run will start from it")
+                    all_clean = False
+
+                if incremental and not resuming and clean and listed and not written:
+                    print("Every item on this page is already mapped, stopping early")
+                    break
 
                 # Pagination with retries
                 try:
@@ -123,9 +232,98 @@ class UUIDMapper:
                     print("No more pages found")
                     break
 
-        print(f"Mapping complete. Saved to {self.output_file}")
+        if all_clean:
+            self._write_checkpoint(page_num, complete=True)
+
+        # The shared registry picks up the rewritten file on its next lookup
+        identifiers = get_registry(self.output_file)
+        print(f"Mapping complete. {len(identifiers)} identifiers saved to {self.output_file}")
+        for line in self._pages.summary():
+            print(line)
         self.driver.quit()
 
+    def harvest_uuids(self, detail_workers=4, incremental=False):
+        """Bulk mapping over HTTP from JSON:API or listing markup, opening detail pages only for gaps"""
+        harvester = UUIDHarvester(detail_workers=detail_workers, jsonapi_url=self.jsonapi_url)
+        start = time.monotonic()
+        csvfile, writer, known_uuids = self._open_output(incremental)
+        try:
+            with csvfile:
+                if incremental:
+                    # Page by page so the run can checkpoint and stop early; as in map_uuids, only
+                    # pages mapped without errors are checkpointed, and none after the first with errors
+                    page_num, resuming = self._start_page(incremental)
+                    if not resuming:
+                        self._write_checkpoint(page_num - 1)  # Nothing mapped yet
+                    page_url = self._page_url(page_num)
+                    last_page = page_num
+                    all_clean = True
+                    while page_url:
+                        rows, page_url, listed, clean = harvester.harvest_page(page_url, skip_uuids=known_uuids)
+                        writer.writerows(rows)
+                        csvfile.flush()
+                        # 'unknown' rows are written for the record, but left for the next run to map again
+                        known_uuids.update(row['UUID'] for row in rows if row['BaseIdentifier'] != 'unknown')
+                        if clean and all_clean:
+                            self._write_checkpoint(page_num)
+                        elif all_clean:
+                            print(f"Page {page_num + 1} had errors; a resumed run will start from it")
+                            all_clean = False
+                        last_page = page_num
+                        if not resuming and clean and listed and not rows:
+                            print("Every item on this page is already mapped, stopping early")
+                            break
+                        page_num += 1
+                    if all_clean:
+                        self._write_checkpoint(last_page, complete=True)
+                else:
+                    for row in harvester.harvest(self.collection_url):
+                        writer.writerow(row)
+        finally:
+            harvester.close()
+
+        stats = harvester.stats
+        elapsed = time.monotonic() - start
+        print(f"Harvested {stats['items']} items in {elapsed:.1f}s "
+              f"({stats['listing_pages']} listing pages, {stats['jsonapi_pages']} JSON:API pages, "
+              f"{stats['detail_pages']} detail pages)")
+        print(f"Mapping complete. Saved to {self.output_file}")
+
+    def crawl_parallel(self, workers=4, requests_per_second=5.0):
+        """Sharded crawl: HTTP workers split the pager pages and results merge into one file"""
+        start = time.monotonic()
+        rows, pages, stats = harvest_sharded(
+            self.collection_url, workers=workers, requests_per_second=requests_per_second
+        )
+        with open(self.output_file, 'w', newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=self.fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+
+        elapsed = time.monotonic() - start
+        print(f"Crawled {pages} pages with {workers} workers in {elapsed:.1f}s: "
+              f"{len(rows)} unique items, {stats['detail_pages']} detail pages")
+        print(f"Mapping complete. Saved to {self.output_file}")
+
+
 if __name__ == "__main__":
-    mapper = UUIDMapper()
-    mapper.map_uuids()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Map collection item UUIDs to identifiers")
+    parser.add_argument("--harvest", action="store_true",
+                        help="harvest over HTTP instead of opening every item in the browser")
+    parser.add_argument("--incremental", action="store_true",
+                        help="keep the existing mapping, skip known UUIDs and resume interrupted runs")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="crawl pager pages with this many parallel HTTP workers")
+    parser.add_argument("--max-rps", type=float, default=5.0,
+                        help="politeness limit: requests per second across all workers")
+    parser.add_argument("--lean", action="store_true", default=None,
+                        help="block images, fonts, stylesheets and analytics in the browser crawl")
+    args = parser.parse_args()
+
+    mapper = UUIDMapper(lean=args.lean)
+    if args.workers > 1:
+        mapper.crawl_parallel(workers=args.workers, requests_per_second=args.max_rps)
+    elif args.harvest:
+        mapper.harvest_uuids(incremental=args.incremental)
+    else:
+        mapper.map_uuids(incremental=args.incremental)
\ No newline at end of file
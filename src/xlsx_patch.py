@@ -0,0 +1,139 @@
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+from pathlib import Path
+import posixpath
+import tempfile
+import zipfile
+import shutil
+import io
+import os
+import re
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+ROW_PATTERN = re.compile(r'<row\b[^>]*?(?:/>|>.*?</row>)', re.S)
+ROW_NUMBER = re.compile(r'\br="(\d+)"')
+CELL_PATTERN = re.compile(r'<c\b[^>]*?\br="([A-Z]+)\d+"[^>]*?(?:/>|>.*?</c>)', re.S)
+STYLE_ATTR = re.compile(r'\bs="\d+"')
+SPANS_ATTR = re.compile(r'\s+spans="[^"]*"')
+
+
+def column_letter(index):
+    """Spreadsheet column letters for a 1-based column index"""
+    letters = ''
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def column_index(letters):
+    index = 0
+    for char in letters:
+        index = index * 26 + ord(char) - 64
+    return index
+
+
+def sheet_part(archive, sheet_index=0):
+    """Zip member name of the sheet at sheet_index in workbook order"""
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    sheets = workbook.find(f'{{{MAIN_NS}}}sheets')
+    rel_id = sheets[sheet_index].get(f'{{{REL_NS}}}id')
+    rels = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    for rel in rels.iter(f'{{{PKG_REL_NS}}}Relationship'):
+        if rel.get('Id') == rel_id:
+            target = rel.get('Target')
+            return target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+    raise KeyError(f"No relationship {rel_id} for sheet {sheet_index}")
+
+
+def _cell_xml(ref, value, original=None):
+    """Inline string cell, keeping the style of the cell it replaces"""
+    style = STYLE_ATTR.search(original.split('>', 1)[0]) if original else None
+    style = f' {style.group(0)}' if style else ''
+    return f'<c r="{ref}"{style} t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+
+def _patch_row(row_xml, row_number, cells):
+    """Set cells ({column letters: value}) in one <row> element, inserting missing cells in column order"""
+    pending = dict(cells)
+    if row_xml.endswith('/>'):
+        row_xml = row_xml[:-2].rstrip() + '></row>'
+    head, body = row_xml.split('>', 1)
+    head = SPANS_ATTR.sub('', head)  # spans is only a hint, and may no longer cover the row
+
+    def replace(match):
+        letters = match.group(1)
+        inserted = ''.join(_cell_xml(f'{col}{row_number}', pending.pop(col))
+                           for col in sorted(pending, key=column_index)
+                           if column_index(col) < column_index(letters))
+        if letters in pending:
+            return inserted + _cell_xml(f'{letters}{row_number}', pending.pop(letters), match.group(0))
+        return inserted + match.group(0)
+
+    body = CELL_PATTERN.sub(replace, body)
+    tail = ''.join(_cell_xml(f'{col}{row_number}', pending[col]) for col in sorted(pending, key=column_index))
+    body = body[:-len('</row>')] + tail + '</row>'
+    return f'{head}>{body}'
+
+
+def _patch_sheet(source, target, edits, chunk_size=1 << 20):
+    """Copy sheet XML from source to target, rewriting only the rows named in edits"""
+    reader = io.TextIOWrapper(source, encoding='utf-8')
+    writer = io.TextIOWrapper(target, encoding='utf-8')
+    buffer, row_number = '', 0
+    while True:
+        chunk = reader.read(chunk_size)
+        buffer += chunk
+        position = 0
+        # Only complete rows match; an unfinished one at the end waits for the next chunk
+        for match in ROW_PATTERN.finditer(buffer):
+            row_xml = match.group(0)
+            number = ROW_NUMBER.search(row_xml.split('>', 1)[0])
+            row_number = int(number.group(1)) if number else row_number + 1
+            writer.write(buffer[position:match.start()])
+            writer.write(_patch_row(row_xml, row_number, edits[row_number]) if row_number in edits else row_xml)
+            position = match.end()
+        if not chunk:
+            writer.write(buffer[position:])
+            break
+        # Keep an unfinished row (or the start of one) for the next chunk
+        cut = buffer.rfind('<row', position)
+        keep_from = cut if cut != -1 else max(position, len(buffer) - 8)
+        writer.write(buffer[position:keep_from])
+        buffer = buffer[keep_from:]
+    writer.flush()
+    writer.detach()
+
+
+def patch_cells(workbook_path, edits, sheet_index=0, output_path=None):
+    """
+    Write cell values into one sheet of an .xlsx without loading the workbook.
+    edits maps sheet row numbers to {column letters: value}. Every other zip member,
+    including the other sheets, is copied with unchanged content. The result replaces output_path
+    (default: the workbook itself) atomically.
+    """
+    workbook_path = Path(workbook_path)
+    output_path = Path(output_path or workbook_path)
+    with zipfile.ZipFile(workbook_path) as archive:
+        part = sheet_part(archive, sheet_index)
+        fd, tmp_path = tempfile.mkstemp(suffix='.xlsx', dir=output_path.parent)
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(tmp_path, 'w') as patched:
+                for info in archive.infolist():
+                    copy = zipfile.ZipInfo(info.filename, info.date_time)
+                    copy.compress_type = zipfile.ZIP_DEFLATED
+                    copy.external_attr = info.external_attr
+                    large = info.file_size > zipfile.ZIP64_LIMIT // 2
+                    with archive.open(info) as source, patched.open(copy, 'w', force_zip64=large) as target:
+                        if info.filename == part:
+                            _patch_sheet(source, target, edits)
+                        else:
+                            shutil.copyfileobj(source, target)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise